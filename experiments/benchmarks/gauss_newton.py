@@ -0,0 +1,62 @@
+"""
+Compares the TrustRegions and GaussNewton solvers of RiemannianSolver on random UR10
+goals in the table environment, started from the same initializations.
+
+For every solver the success rate, mean number of iterations and mean solve time
+are reported, overall and over the problems solved by both.
+"""
+import numpy as np
+
+from graphik.solvers.riemannian_solver import RiemannianSolver
+from graphik.utils.dgp import adjacency_matrix_from_graph, distance_matrix_from_graph
+from graphik.utils.roboturdf import load_ur10
+from graphik.utils.utils import table_environment
+
+SOLVERS = {
+    "TrustRegions": {"solver": "TrustRegions"},
+    "GaussNewton": {"solver": "GaussNewton"},
+    "GaussNewton (cg)": {"solver": "GaussNewton", "linear_solver": "cg"},
+}
+
+
+def run(num_problems=200, tol=1e-9):
+    robot, graph = load_ur10()
+    for idx, obs in enumerate(table_environment()):
+        graph.add_spherical_obstacle(f"o{idx}", obs[0], obs[1])
+    solvers = {name: RiemannianSolver(graph, params) for name, params in SOLVERS.items()}
+    distance_bounds = graph.distance_bound_matrices()
+
+    results = {name: [] for name in SOLVERS}
+    for _ in range(num_problems):
+        T_goal = robot.pose(robot.random_configuration(), f"p{robot.n}")
+        G = graph.from_pose(T_goal)
+        D_goal = distance_matrix_from_graph(G)
+        omega = adjacency_matrix_from_graph(G)
+        lb, ub = graph.bound_smoothing_cache.bounds(
+            graph._pose_goal({f"p{robot.n}": T_goal})
+        )
+        Y_init = RiemannianSolver.generate_initialization(
+            (lb, ub), graph.dim, omega, *distance_bounds
+        )
+        for name, solver in solvers.items():
+            sol = solver.solve(
+                D_goal,
+                omega,
+                use_limits=True,
+                Y_init=Y_init.copy(),
+                distance_bounds=distance_bounds,
+            )
+            results[name].append((sol["f(x)"] < tol, sol["iterations"], sol["time"]))
+    return {name: np.array(res, dtype=float) for name, res in results.items()}
+
+
+if __name__ == "__main__":
+    results = run()
+    both = np.all([res[:, 0] > 0 for res in results.values()], axis=0)
+    for name, res in results.items():
+        print(name)
+        print(f"  success:                  {100 * res[:, 0].mean():.1f}%")
+        print(f"  mean iterations:          {res[:, 1].mean():.1f}")
+        print(f"  mean time [s]:            {res[:, 2].mean():.4f}")
+        print(f"  mean iterations (solved): {res[both, 1].mean():.1f}")
+        print(f"  mean time (solved) [s]:   {res[both, 2].mean():.4f}")
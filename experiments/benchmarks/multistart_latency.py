@@ -0,0 +1,52 @@
+"""
+Compares the latency distribution of sequential random restarts of
+solve_with_riemannian with the parallel multi-start solver on random UR10 goals
+in the table environment. Tail latency (p99) is the figure of merit.
+"""
+import time
+
+import numpy as np
+
+from graphik.solvers.multistart import MultiStartSolver
+from graphik.solvers.riemannian_solver import solve_with_riemannian
+from graphik.utils.roboturdf import load_ur10
+from graphik.utils.utils import table_environment
+
+
+def restarts(graph, T_goal, max_attempts=8):
+    for _ in range(max_attempts):
+        q_sol, _ = solve_with_riemannian(graph, T_goal)
+        if q_sol is not None:
+            return True
+    return False
+
+
+def report(name, latencies, successes):
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    print(f"{name}")
+    print(f"  success:         {100 * np.mean(successes):.1f}%")
+    print(f"  p50/p90/p99 [s]: {p50:.4f} / {p90:.4f} / {p99:.4f}")
+
+
+if __name__ == "__main__":
+    robot, graph = load_ur10()
+    for idx, obs in enumerate(table_environment()):
+        graph.add_spherical_obstacle(f"o{idx}", obs[0], obs[1])
+    goals = [robot.pose(robot.random_configuration(), f"p{robot.n}") for _ in range(200)]
+
+    latencies, successes = [], []
+    for T_goal in goals:
+        start = time.perf_counter()
+        successes += [restarts(graph, T_goal)]
+        latencies += [time.perf_counter() - start]
+    report("sequential restarts", latencies, successes)
+
+    with MultiStartSolver(graph, num_starts=8, deadline=1.0) as solver:
+        solver.solve(goals[0])  # warm up the workers
+        latencies, successes = [], []
+        for T_goal in goals:
+            start = time.perf_counter()
+            _, _, stats = solver.solve(T_goal)
+            successes += [stats["success"]]
+            latencies += [time.perf_counter() - start]
+    report("multi-start, K=8, deadline 1 s", latencies, successes)
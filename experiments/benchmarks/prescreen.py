@@ -0,0 +1,91 @@
+"""
+Measures the infeasibility pre-screen on UR10 goals in the table environment, half
+of them reachable (poses of random collision-free configurations) and half uniformly
+sampled in a box around the robot, most of which are out of reach.
+
+Every goal is also solved with solve_with_riemannian. A false reject is a goal that
+the pre-screen rejects although it is the pose of a feasible configuration or the
+solver finds a solution that reaches it. Reported are the rejection and false-reject rates per reason
+code, the time of the pre-screen and the solver time it saves.
+"""
+import time
+from collections import Counter
+
+import numpy as np
+from liegroups.numpy import SE3, SO3
+
+from graphik.solvers.prescreen import prescreen
+from graphik.solvers.riemannian_solver import solve_with_riemannian
+from graphik.utils.constants import OBSTACLE, POS, RADIUS, TYPE
+from graphik.utils.roboturdf import load_ur10
+from graphik.utils.utils import table_environment
+
+
+def in_collision(graph, q):
+    T_all = graph.robot.get_all_poses(q)
+    for _, data in graph.nodes(data=True):
+        if data.get(TYPE) == OBSTACLE:
+            for T in T_all.values():
+                if np.linalg.norm(T.trans - data[POS]) < data[RADIUS]:
+                    return True
+    return False
+
+
+def sample_goals(robot, graph, num_goals, half_width=1.5):
+    goals, feasible = [], []
+    while len(goals) < num_goals // 2:
+        q = robot.random_configuration()
+        if not in_collision(graph, q):
+            goals += [robot.pose(q, f"p{robot.n}")]
+            feasible += [True]
+    while len(goals) < num_goals:
+        rot = SO3.exp(np.random.randn(3))
+        goals += [SE3(rot, np.random.uniform(-half_width, half_width, 3))]
+        feasible += [False]  # unknown
+    return goals, feasible
+
+
+def reached(graph, q_sol, T_goal, tol=1e-3):
+    if q_sol is None:
+        return False
+    T = graph.get_pose(q_sol, f"p{graph.robot.n}")
+    return np.linalg.norm(T.as_matrix() - T_goal.as_matrix()) <= tol
+
+
+def run(num_goals=200):
+    robot, graph = load_ur10()
+    for idx, obs in enumerate(table_environment()):
+        graph.add_spherical_obstacle(f"o{idx}", obs[0], obs[1])
+    goals, feasible = sample_goals(robot, graph, num_goals)
+    graph.bound_smoothing_cache  # built once per graph, not part of the pre-screen
+
+    reasons, false_rejects = Counter(), Counter()
+    screen_time, solve_time, saved_time = 0.0, 0.0, 0.0
+    for T_goal, known_feasible in zip(goals, feasible):
+        start = time.perf_counter()
+        reason = prescreen(graph, T_goal)
+        screen_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        q_sol, _ = solve_with_riemannian(graph, T_goal)
+        elapsed = time.perf_counter() - start
+        solve_time += elapsed
+
+        reasons[reason] += 1
+        if reason is not None:
+            saved_time += elapsed
+            if known_feasible or reached(graph, q_sol, T_goal):
+                false_rejects[reason] += 1
+    return reasons, false_rejects, screen_time, solve_time, saved_time
+
+
+if __name__ == "__main__":
+    num_goals = 200
+    reasons, false_rejects, screen_time, solve_time, saved_time = run(num_goals)
+    print(f"rejected: {100 * (1 - reasons[None] / num_goals):.1f}%")
+    for reason, count in reasons.items():
+        if reason is not None:
+            print(f"  {reason}: {count} ({false_rejects[reason]} false rejects)")
+    print(f"false-reject rate: {100 * sum(false_rejects.values()) / num_goals:.2f}%")
+    print(f"mean pre-screen time [s]: {screen_time / num_goals:.6f}")
+    print(f"solver time saved: {saved_time:.2f} of {solve_time:.2f} s")
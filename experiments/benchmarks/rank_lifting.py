@@ -0,0 +1,52 @@
+"""
+Compares restarting solve_with_riemannian from new random initializations with the
+rank-lifted solve mode on random UR10 goals in the table environment.
+
+For every mode the first-attempt success rate and the expected time-to-solution
+(total time spent until a feasible solution is found, up to max_attempts) are reported.
+"""
+import time
+
+import numpy as np
+
+from graphik.solvers.riemannian_solver import solve_with_riemannian
+from graphik.utils.roboturdf import load_ur10
+from graphik.utils.utils import table_environment
+
+
+def time_to_solution(graph, T_goal, rank=None, max_attempts=10):
+    start = time.perf_counter()
+    for attempt in range(1, max_attempts + 1):
+        q_sol, _ = solve_with_riemannian(graph, T_goal, rank=rank)
+        if q_sol is not None:
+            return attempt, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+
+def run(num_problems=100, ranks=(None, 4, 5), max_attempts=10):
+    robot, graph = load_ur10()
+    for idx, obs in enumerate(table_environment()):
+        graph.add_spherical_obstacle(f"o{idx}", obs[0], obs[1])
+
+    goals = [
+        robot.pose(robot.random_configuration(), f"p{robot.n}") for _ in range(num_problems)
+    ]
+    results = {}
+    for rank in ranks:
+        attempts, times = [], []
+        for T_goal in goals:
+            attempt, elapsed = time_to_solution(graph, T_goal, rank, max_attempts)
+            attempts.append(attempt)
+            times.append(elapsed)
+        results[rank] = (attempts, np.array(times))
+    return results
+
+
+if __name__ == "__main__":
+    for rank, (attempts, times) in run().items():
+        first = np.mean([a == 1 for a in attempts])
+        solved = np.mean([a is not None for a in attempts])
+        print(f"rank {rank if rank is not None else 'dim'}")
+        print(f"  first-attempt success:        {100 * first:.1f}%")
+        print(f"  solved within max attempts:   {100 * solved:.1f}%")
+        print(f"  expected time-to-solution [s]: {times.mean():.4f}")
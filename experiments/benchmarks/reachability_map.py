@@ -0,0 +1,73 @@
+"""
+Builds a reachability map of the UR10 and measures it: build time and file size,
+latency of single and batched lookups, the fraction of the poses of random
+configurations that the map marks as reachable, and the number of iterations of the
+Riemannian solver initialized with the voxel seeds instead of the bound smoothing
+initialization.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+from liegroups.numpy import SE3
+
+from graphik.solvers.reachability_map import build_reachability_map
+from graphik.solvers.riemannian_solver import RiemannianSolver
+from graphik.utils.constants import ROOT
+from graphik.utils.dgp import adjacency_matrix_from_graph, distance_matrix_from_graph
+from graphik.utils.roboturdf import load_ur10
+
+
+def solve_iterations(graph, T_goal, Y_init=None):
+    ee = f"p{graph.robot.n}"
+    G = graph.from_pose(T_goal)
+    bounds = None
+    if Y_init is None:
+        bounds = graph.bound_smoothing_cache.bounds(graph._pose_goal({ee: T_goal}))
+    sol = RiemannianSolver(graph).solve(
+        distance_matrix_from_graph(G),
+        adjacency_matrix_from_graph(G),
+        use_limits=True,
+        bounds=bounds,
+        Y_init=Y_init,
+    )
+    return sol["iterations"]
+
+
+def run(num_samples=2000000, resolution=0.05, num_queries=10000, num_solves=50):
+    robot, graph = load_ur10()
+    path = os.path.join(tempfile.mkdtemp(), "ur10.map")
+    start = time.perf_counter()
+    rmap = build_reachability_map(
+        robot, path, resolution=resolution, num_samples=num_samples
+    )
+    results = {"build time [s]": time.perf_counter() - start}
+    results["file size [MB]"] = os.path.getsize(path) / 1e6
+
+    joints = [node for node in robot.joint_ids if node != ROOT]
+    Q = np.array(
+        [[robot.random_configuration()[node] for node in joints] for _ in range(num_queries)]
+    )
+    T = robot.pose_batch(Q)[:, robot.joint_ids.index(f"p{robot.n}")]
+    start = time.perf_counter()
+    for T_goal in T[:1000]:
+        rmap.lookup(T_goal)
+    results["single lookup [us]"] = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    count, _ = rmap.lookup(T)
+    results["batched lookup [us]"] = (time.perf_counter() - start) / num_queries * 1e6
+    results["reachable poses found [%]"] = 100 * np.mean(count > 0)
+
+    cold, seeded = [], []
+    for T_goal in map(SE3.from_matrix, T[:num_solves]):
+        cold += [solve_iterations(graph, T_goal)]
+        seeded += [solve_iterations(graph, T_goal, rmap.Y_init(graph, T_goal))]
+    results["iterations, bound smoothing init"] = np.mean(cold)
+    results["iterations, voxel seed init"] = np.mean(seeded)
+    return results
+
+
+if __name__ == "__main__":
+    for key, val in run().items():
+        print(f"{key}: {val:.3f}")
@@ -0,0 +1,38 @@
+"""
+Replays a stream of UR10 goals in which most queries repeat an earlier goal, as for
+retries and previews, through solve_with_riemannian with and without an IKResultCache.
+
+The mean time per query and the cache metrics are reported.
+"""
+import time
+
+import numpy as np
+
+from graphik.solvers.result_cache import IKResultCache
+from graphik.solvers.riemannian_solver import solve_with_riemannian
+from graphik.utils.roboturdf import load_ur10
+
+
+def run(num_goals=50, num_queries=300, seed=0):
+    rng = np.random.default_rng(seed)
+    robot, graph = load_ur10()
+    goals = [
+        robot.pose(robot.random_configuration(), f"p{robot.n}") for _ in range(num_goals)
+    ]
+    queries = [goals[idx] for idx in rng.integers(num_goals, size=num_queries)]
+    cache = IKResultCache(graph)
+
+    results = {}
+    for name, result_cache in [("no cache", None), ("cache", cache)]:
+        start = time.perf_counter()
+        for T_goal in queries:
+            solve_with_riemannian(graph, T_goal, result_cache=result_cache)
+        results[name] = (time.perf_counter() - start) / num_queries
+    return results, cache.stats()
+
+
+if __name__ == "__main__":
+    results, stats = run()
+    for name, mean_time in results.items():
+        print(f"{name}: mean time [s]: {mean_time:.4f}")
+    print(stats)
@@ -0,0 +1,58 @@
+"""
+Compares solve_with_riemannian with and without an IKSeedIndex on clustered UR10
+goals, as in palletizing, where goals are small perturbations of a few poses.
+
+For both modes the success rate and the mean solve time are reported, and for the
+index the time of a query at the final index size.
+"""
+import time
+
+import numpy as np
+from liegroups.numpy import SE3
+
+from graphik.solvers.riemannian_solver import solve_with_riemannian
+from graphik.solvers.seed_index import IKSeedIndex
+from graphik.utils.roboturdf import load_ur10
+
+
+def clustered_goals(robot, num_clusters=10, num_goals=300, noise=0.02, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = [
+        robot.pose(robot.random_configuration(), f"p{robot.n}") for _ in range(num_clusters)
+    ]
+    goals = []
+    for _ in range(num_goals):
+        T = centers[rng.integers(num_clusters)]
+        goals += [SE3.exp(noise * rng.standard_normal(6)).dot(T)]
+    return goals
+
+
+def run(num_goals=300):
+    robot, graph = load_ur10()
+    goals = clustered_goals(robot, num_goals=num_goals)
+    index = IKSeedIndex.for_graph(graph, capacity=1000)
+
+    results = {}
+    for name, seed_index in [("cold", None), ("seed index", index)]:
+        success, times = [], []
+        for T_goal in goals:
+            start = time.perf_counter()
+            q_sol, _ = solve_with_riemannian(graph, T_goal, seed_index=seed_index)
+            times += [time.perf_counter() - start]
+            success += [q_sol is not None]
+        results[name] = (np.mean(success), np.mean(times))
+
+    start = time.perf_counter()
+    for T_goal in goals:
+        index.query(T_goal)
+    query_time = (time.perf_counter() - start) / len(goals)
+    return results, query_time, len(index)
+
+
+if __name__ == "__main__":
+    results, query_time, size = run()
+    for name, (success, mean_time) in results.items():
+        print(name)
+        print(f"  success:       {100 * success:.1f}%")
+        print(f"  mean time [s]: {mean_time:.4f}")
+    print(f"query time with {size} entries [s]: {query_time:.6f}")
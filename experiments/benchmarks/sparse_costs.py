@@ -0,0 +1,59 @@
+"""
+Compares the dense N x N and the sparse edge list NumPy implementations of the cost,
+gradient and Hessian-vector product on random graphs with a fixed number of
+constrained pairs per point, as in chains of many robots with obstacles.
+
+For every graph size the time of one evaluation of all three functions is reported.
+"""
+import time
+
+import numpy as np
+
+from graphik.solvers.riemannian_solver import RiemannianSolver
+
+
+def random_problem(N, degree, rng):
+    omega = np.triu(rng.random((N, N)) < degree / N, 1).astype(float)
+    omega += omega.T
+    D_goal = np.triu(rng.random((N, N)), 1)
+    D_goal += D_goal.T
+    M = np.triu(rng.random((N, N)) < degree / N, 1).astype(float)
+    M += M.T
+    return D_goal, omega, 0.5 * M * D_goal, 2 * M * D_goal
+
+
+def evaluation_time(fns, Y, Z, duration=0.5):
+    cost, egrad, ehess = fns
+    num = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        cost(Y)
+        egrad(Y)
+        ehess(Y, Z)
+        num += 1
+    return (time.perf_counter() - start) / num
+
+
+def run(sizes=(25, 50, 100, 200, 400, 800), degree=8, seed=0):
+    rng = np.random.default_rng(seed)
+    results = {}
+    for N in sizes:
+        D_goal, omega, psi_L, psi_U = random_problem(N, degree, rng)
+        Y, Z = rng.standard_normal((N, 3)), rng.standard_normal((N, 3))
+        results[N] = [
+            evaluation_time(
+                RiemannianSolver.create_cost_limits(
+                    D_goal, omega, psi_L, psi_U, jit=False, sparse=sparse
+                ),
+                Y,
+                Z,
+            )
+            for sparse in [False, True]
+        ]
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'N':>6} {'dense [ms]':>12} {'sparse [ms]':>12}")
+    for N, (dense, sparse) in run().items():
+        print(f"{N:6d} {1e3 * dense:12.3f} {1e3 * sparse:12.3f}")
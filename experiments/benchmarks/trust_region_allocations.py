@@ -0,0 +1,85 @@
+"""
+Reports the memory allocated by the trust-region solver on random UR10 IK problems.
+
+tracemalloc is sampled at every Hessian-vector product and inner product, i.e. between
+the vector updates of the inner (tCG) iterations. The memory allocated and released
+again between two samples is reported in units of N x dim arrays per inner iteration,
+so a regression that brings back temporary tangent vectors shows up as a larger count.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from graphik.solvers.riemannian_solver import RiemannianSession
+from graphik.utils.dgp import adjacency_matrix_from_graph, distance_matrix_from_graph
+from graphik.utils.roboturdf import load_ur10
+
+
+class TracedSession(RiemannianSession):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transient = 0
+        self.inner_iterations = 0
+        inner = self.manifold.inner
+
+        def traced_inner(Y, U, V):
+            self.sample()
+            return inner(Y, U, V)
+
+        self.manifold.inner = traced_inner
+
+    def sample(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.transient += peak - current
+        tracemalloc.reset_peak()
+
+    def _hess(self, Y, Z):
+        self.sample()
+        self.inner_iterations += 1
+        return super()._hess(Y, Z)
+
+
+def run(num_problems=50, jit=True):
+    robot, graph = load_ur10()
+    ee = f"p{robot.n}"
+    session = TracedSession(graph, jit=jit)
+    array_bytes = session.N * session.dim * np.dtype(float).itemsize
+
+    rows = []
+    for _ in range(num_problems):
+        T_goal = robot.pose(robot.random_configuration(), ee)
+        G = graph.from_pose(T_goal)
+        session.update_goal(distance_matrix_from_graph(G), adjacency_matrix_from_graph(G))
+        bounds = graph.bound_smoothing_cache.bounds(graph._pose_goal({ee: T_goal}))
+
+        session.transient = 0
+        session.inner_iterations = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        sol = session.solve(bounds=bounds)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rows.append(
+            [
+                elapsed,
+                sol["iterations"],
+                session.inner_iterations,
+                peak / 1024,
+                session.transient / array_bytes / max(session.inner_iterations, 1),
+            ]
+        )
+    return np.array(rows)
+
+
+if __name__ == "__main__":
+    for jit in [True, False]:
+        rows = run(jit=jit)
+        print(f"jit={jit}, mean over {len(rows)} solves")
+        print(f"  time [ms]:                   {1000 * rows[:, 0].mean():.2f}")
+        print(f"  outer iterations:            {rows[:, 1].mean():.1f}")
+        print(f"  inner iterations:            {rows[:, 2].mean():.1f}")
+        print(f"  peak traced memory [KiB]:    {rows[:, 3].mean():.1f}")
+        print(f"  N x dim arrays per inner it: {rows[:, 4].mean():.2f}")
@@ -11,8 +11,10 @@ from graphik.robots.robot_base import Robot, SEMatrix
 from graphik.utils.constants import *
 from graphik.utils import (
     distance_matrix_from_graph,
+    distance_matrix_from_pos,
     adjacency_matrix_from_graph,
     graph_complete_edges,
+    BoundSmoothingCache,
 )
 
 
@@ -109,6 +111,78 @@ class ProblemGraph(nx.DiGraph):
         """
         return list(self.nodes())
 
+    @property
+    def revision(self) -> int:
+        """
+        Counter incremented every time anchors or obstacles change the graph.
+        """
+        return self.graph.get("revision", 0)
+
+    @property
+    def layout(self) -> Dict[str, Any]:
+        """
+        Array layout of the graph used by the numerical routines, built once and
+        cached until the graph is modified through this class.
+
+        :returns: dictionary with the node order and index, edge index arrays,
+        distance and bound arrays, and the indices and positions of anchor nodes
+        """
+        try:
+            return self._layout
+        except AttributeError:
+            self._layout = self._build_layout()
+            return self._layout
+
+    def _build_layout(self) -> Dict[str, Any]:
+        node_ids = self.node_ids
+        node_index = {node: idx for idx, node in enumerate(node_ids)}
+        edges = list(self.edges(data=True))
+
+        layout = {"node_ids": node_ids, "node_index": node_index}
+        layout["edges"] = np.array(
+            [[node_index[u], node_index[v]] for u, v, _ in edges], dtype=int
+        ).reshape(-1, 2)
+        for key, label in [("dist", DIST), ("lower", LOWER), ("upper", UPPER)]:
+            layout[key] = np.array(
+                [data.get(label, np.nan) for _, _, data in edges], dtype=float
+            )
+        layout["below"] = np.array(
+            [BELOW in data.get(BOUNDED, []) for _, _, data in edges], dtype=bool
+        )
+        layout["above"] = np.array(
+            [ABOVE in data.get(BOUNDED, []) for _, _, data in edges], dtype=bool
+        )
+
+        anchors = [node for node, pos in self.nodes(data=POS) if pos is not None]
+        layout["anchors"] = np.array([node_index[node] for node in anchors], dtype=int)
+        layout["anchor_pos"] = np.array(
+            [self.nodes[node][POS] for node in anchors], dtype=float
+        ).reshape(-1, self.dim)
+        return layout
+
+    @property
+    def bound_smoothing_cache(self) -> BoundSmoothingCache:
+        """
+        :returns: Goal-independent bound smoothing data of this graph, used to get the
+        smoothed distance bounds of an IK problem with only the goal nodes recomputed.
+        """
+        try:
+            return self._bound_smoothing_cache
+        except AttributeError:
+            self._bound_smoothing_cache = BoundSmoothingCache(
+                self, self.layout["node_ids"]
+            )
+            return self._bound_smoothing_cache
+
+    def _clear_cache(self):
+        # Drop cached arrays after the graph has been modified
+        self.graph["revision"] = self.revision + 1
+        for attr in ["_layout", "_bound_smoothing_cache"]:
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                pass
+
     def realization(self, joint_angles: Dict[str, float]) -> nx.DiGraph:
         """
         Given a set of joint angles, return a graph realization in R^dim.
@@ -126,6 +200,23 @@ class ProblemGraph(nx.DiGraph):
         """
         return distance_matrix_from_graph(self.to_undirected(as_view=True))
 
+    def realization_array(self, joint_angles: Dict[str, float]) -> ArrayLike:
+        """
+        Given a set of joint angles, return the node positions of the graph
+        realization as an array, without building a graph.
+        :param joint_angles: joint variables node names as keys mapping to values
+        :returns: N x dim matrix of node positions ordered as node_ids
+        """
+        layout = self.layout
+        node_index = layout["node_index"]
+        Y = np.zeros((len(node_index), self.dim))
+        Y[layout["anchors"]] = layout["anchor_pos"]
+        T_all = self.robot.get_all_poses(joint_angles)
+        for node, pos in self._pose_goal(T_all).items():
+            if node in node_index:
+                Y[node_index[node]] = pos
+        return Y
+
     def distance_matrix_from_joints(self, joint_angles: ArrayLike) -> ArrayLike:
         """
         Given a set of joint angles, return a matrix whose element
@@ -133,7 +224,7 @@ class ProblemGraph(nx.DiGraph):
         :param x: Decision variables (revolute joints, prismatic joints)
         :returns: Matrix of squared distances
         """
-        return distance_matrix_from_graph(self.realization(joint_angles))
+        return distance_matrix_from_pos(self.realization_array(joint_angles))
 
     def adjacency_matrix(self) -> ArrayLike:
         """
@@ -197,10 +288,11 @@ class ProblemGraph(nx.DiGraph):
                 self[nname][name][LOWER] = la.norm(ndata[POS] - data[POS])
                 self[nname][name][UPPER] = la.norm(ndata[POS] - data[POS])
                 self[nname][name][BOUNDED] = []
+        self._clear_cache()
 
     def add_spherical_obstacle(self, name: str, position: ArrayLike, radius: float):
         # Add a fixed node representing the obstacle to the graph
-        self.add_anchor_node(name, {POS: position, TYPE: OBSTACLE})
+        self.add_anchor_node(name, {POS: position, TYPE: OBSTACLE, RADIUS: radius})
 
         # Set lower (and upper) distance limits to robot nodes
         for node, node_type in self.nodes(data=TYPE):
@@ -209,12 +301,14 @@ class ProblemGraph(nx.DiGraph):
                 self[node][name][BOUNDED] = [BELOW]
                 self[node][name][LOWER] = radius
                 self[node][name][UPPER] = 100
+        self._clear_cache()
 
     def clear_obstacles(self):
         # Clears all obstacles from the graph
         node_types = nx.get_node_attributes(self, TYPE)
         obstacles = [node for node, typ in node_types.items() if typ == OBSTACLE]
         self.remove_nodes_from(obstacles)
+        self._clear_cache()
 
     def check_distance_limits(
         self, G: nx.DiGraph, tol=1e-10
@@ -263,17 +357,15 @@ class ProblemGraph(nx.DiGraph):
         """
         Generates a matrices of distance bounds induced by joint variables.
         """
-        n_nodes = self.number_of_nodes()
+        layout = self.layout
+        n_nodes = len(layout["node_ids"])
         L = np.zeros([n_nodes, n_nodes])  # fake distance matrix
         U = np.zeros([n_nodes, n_nodes])  # fake distance matrix
-        for e1, e2, data in self.edges(data=True):
-            if BOUNDED in data:
-                udx = self.node_ids.index(e1)
-                vdx = self.node_ids.index(e2)
-                if BELOW in data[BOUNDED]:
-                    L[udx, vdx] = data[LOWER] ** 2
-                    L[vdx, udx] = L[udx, vdx]
-                if ABOVE in data[BOUNDED]:
-                    U[udx, vdx] = data[UPPER] ** 2
-                    U[vdx, udx] = U[udx, vdx]
+        for M, bounded, bound in [
+            (L, layout["below"], layout["lower"]),
+            (U, layout["above"], layout["upper"]),
+        ]:
+            udx, vdx = layout["edges"][bounded].T
+            M[udx, vdx] = bound[bounded] ** 2
+            M[vdx, udx] = M[udx, vdx]
         return L, U
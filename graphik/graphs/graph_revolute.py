@@ -1,6 +1,9 @@
 from typing import Dict, List, Any, Optional
+import multiprocessing as mp
+import pickle
 import numpy as np
 import numpy.linalg as la
+from concurrent.futures import ProcessPoolExecutor
 from graphik.robots import RobotRevolute
 from graphik.graphs.graph_base import ProblemGraph
 from graphik.utils import *
@@ -326,29 +329,121 @@ class ProblemGraphRevolute(ProblemGraph):
 
         return T
 
-    def distance_bounds_from_sampling(self):
+    def realization_batch(self, Q: ArrayLike) -> ArrayLike:
+        """
+        Given N joint configurations, return the node positions of all graph
+        realizations at once.
+        :param Q: N x n array of joint variables ordered as robot joint_ids without ROOT
+        :returns: N x n_nodes x 3 array of node positions ordered as node_ids
+        """
+        layout = self.layout
+        node_index = layout["node_index"]
+        T = self.robot.pose_batch(Q)
+
+        Y = np.zeros((T.shape[0], len(node_index), self.dim))
+        Y[:, layout["anchors"]] = layout["anchor_pos"]
+        for idx, node in enumerate(self.robot.joint_ids):
+            pos = T[:, idx, :3, 3]
+            Y[:, node_index[node]] = pos
+            Y[:, node_index[AUX_PREFIX + node[1:]]] = (
+                pos + self.axis_length * T[:, idx, :3, 2]
+            )
+        return Y
+
+    def distance_bounds_from_sampling(
+        self,
+        num_samples: int = 2000,
+        seed: int = None,
+        batch_size: int = 500,
+        num_workers: int = 0,
+        start_method: str = None,
+    ):
+        """
+        Bounds the distances between all pairs of nodes by sampling random
+        configurations within the joint limits. Existing bounds are only tightened
+        and distances that do not change over the samples are marked as known.
+        :param num_samples: number of sampled configurations
+        :param seed: seed of the random number generator
+        :param batch_size: number of configurations evaluated at once
+        :param num_workers: number of processes evaluating batches in parallel, the
+        batches are evaluated in this process if 0
+        :param start_method: multiprocessing start method of the workers
+        """
         robot = self.robot
-        ids = self.node_ids
-        q_rand = robot.random_configuration()
-        D_min = self.distance_matrix_from_joints(q_rand)
-        D_max = self.distance_matrix_from_joints(q_rand)
-
-        for _ in range(2000):
-            q_rand = robot.random_configuration()
-            D_rand = self.distance_matrix_from_joints(q_rand)
-            D_max[D_rand > D_max] = D_rand[D_rand > D_max]
-            D_min[D_rand < D_min] = D_rand[D_rand < D_min]
-
-        for idx in range(len(D_max)):
-            for jdx in range(len(D_max)):
-                e1 = ids[idx]
-                e2 = ids[jdx]
-                self.add_edge(e1, e2)
-                self[e1][e2][LOWER] = sqrt(D_min[idx, jdx])
-                self[e1][e2][UPPER] = sqrt(D_max[idx, jdx])
-                if abs(D_max[idx, jdx] - D_min[idx, jdx]) < 1e-5:
-                    self[e1][e2][DIST] = abs(D_max[idx, jdx] - D_min[idx, jdx])
-
+        layout = self.layout
+        ids = layout["node_ids"]
+        joints = [node for node in robot.joint_ids if node != ROOT]
+        lb = np.array([robot.lb[node] for node in joints])
+        ub = np.array([robot.ub[node] for node in joints])
+
+        rng = np.random.default_rng(seed)
+        Q = rng.uniform(lb, ub, size=(num_samples, len(joints)))
+        batches = [Q[idx : idx + batch_size] for idx in range(0, num_samples, batch_size)]
+
+        D_min = np.full((len(ids), len(ids)), np.inf)
+        D_max = np.zeros((len(ids), len(ids)))
+        if num_workers == 0:
+            extrema = (_distance_extrema(Q_batch, self) for Q_batch in batches)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=mp.get_context(start_method),
+                initializer=_init_worker,
+                initargs=(pickle.dumps(self),),
+            ) as pool:
+                extrema = list(pool.map(_distance_extrema, batches))
+        for D_min_batch, D_max_batch in extrema:
+            np.minimum(D_min, D_min_batch, out=D_min)
+            np.maximum(D_max, D_max_batch, out=D_max)
+
+        # Intersect with the bounds that are already in the graph
+        L = np.sqrt(np.maximum(D_min, 0))
+        U = np.sqrt(D_max)
+        udx, vdx = layout["edges"].T
+        known = np.zeros(L.shape, dtype=bool)
+        lower = np.zeros(L.shape)
+        upper = np.full(U.shape, np.inf)
+        exact = ~np.isnan(layout["dist"])
+        for ij in [(udx, vdx), (vdx, udx)]:
+            known[ij[0][exact], ij[1][exact]] = True
+            np.maximum.at(lower, ij, np.nan_to_num(layout["lower"], nan=0))
+            np.minimum.at(upper, ij, np.nan_to_num(layout["upper"], nan=np.inf))
+        np.maximum(L, lower, out=L)
+        np.minimum(U, upper, out=U)
+
+        edges = []
+        for idx, jdx in zip(*np.triu_indices(len(ids), k=1)):
+            if known[idx, jdx]:
+                continue
+            u, v = ids[idx], ids[jdx]
+            if self.has_edge(v, u):
+                u, v = v, u  # keep the direction of the existing edge
+            data = {LOWER: L[idx, jdx], UPPER: U[idx, jdx]}
+            if abs(D_max[idx, jdx] - D_min[idx, jdx]) < 1e-5:
+                data[DIST] = U[idx, jdx]
+            edges += [(u, v, data)]
+        self.add_edges_from(edges)
+        self._clear_cache()
+
+
+# Graph of a distance_bounds_from_sampling worker process
+_graph = None
+
+
+def _init_worker(graph_bytes):
+    # The graph is unpickled once per worker process
+    global _graph
+    _graph = pickle.loads(graph_bytes)
+
+
+def _distance_extrema(Q: ArrayLike, graph: ProblemGraphRevolute = None):
+    # Elementwise min and max of squared distance matrices over a batch of configurations
+    graph = _graph if graph is None else graph
+    Y = graph.realization_batch(Q)
+    G = Y @ Y.transpose(0, 2, 1)
+    g = np.diagonal(G, axis1=1, axis2=2)
+    D = g[:, :, np.newaxis] + g[:, np.newaxis, :] - 2 * G
+    return D.min(0), D.max(0)
 
 if __name__ == "__main__":
     import graphik
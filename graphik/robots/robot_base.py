@@ -187,9 +187,13 @@ class Robot(nx.DiGraph):
         Convenient method for getting all poses of coordinate systems attached to each point in the robot's graph description.
         """
         T = {ROOT: self.T_base}
-        for ee in self.end_effectors:
-            for node in self.kinematic_map[ROOT][ee][1:]:
-                T[node] = self.pose(joint_angles, node)
+
+        # product of exponentials up to each node, computed once and shared by its children
+        exp = type(self.nodes[ROOT]["T0"]).exp
+        P = {ROOT: self.nodes[ROOT]["T0"]}
+        for pred, cur in nx.bfs_edges(self, ROOT):
+            P[cur] = P[pred].dot(exp(self.nodes[pred]["S"] * joint_angles[cur]))
+            T[cur] = P[cur].dot(self.nodes[cur]["T0"])
         return T
 
     def end_effector_pos(self, q: Dict[str, float]) -> Dict[str, ArrayLike]:
@@ -4,7 +4,13 @@ from numpy.typing import ArrayLike
 import networkx as nx
 import numpy as np
 from graphik.robots.robot_base import Robot, SEMatrix
-from graphik.utils import list_to_variable_dict, flatten, fk_3d, modified_fk_3d
+from graphik.utils import (
+    list_to_variable_dict,
+    flatten,
+    fk_3d,
+    modified_fk_3d,
+    se3_exp_batch,
+)
 from graphik.utils.constants import ROOT, TRANSFORM, MAIN_PREFIX
 # from graphik.utils import *
 
@@ -102,6 +108,30 @@ class RobotRevolute(Robot):
 
         return T
 
+    def pose_batch(self, Q: ArrayLike) -> ArrayLike:
+        """
+        Given N joint configurations, calculate the poses of all nodes at once.
+        Exponentials are computed for the whole batch and accumulated along each
+        chain, so every joint is visited once per call.
+
+        :param Q: N x n array of joint variables ordered as joint_ids without ROOT
+        :returns: N x n_nodes x 4 x 4 array of poses ordered as joint_ids
+        """
+        Q = np.atleast_2d(Q)
+        joints = [node for node in self.joint_ids if node != ROOT]
+        col = {node: idx for idx, node in enumerate(joints)}
+        node_idx = {node: idx for idx, node in enumerate(self.joint_ids)}
+
+        T = np.zeros((Q.shape[0], len(self.joint_ids), 4, 4))
+        T[:, node_idx[ROOT]] = self.T_base.as_matrix()
+
+        # product of exponentials up to each node, shared by all its children
+        P = {ROOT: np.broadcast_to(self.nodes[ROOT]["T0"].as_matrix(), T.shape[:1] + (4, 4))}
+        for pred, cur in nx.bfs_edges(self, ROOT):
+            P[cur] = P[pred] @ se3_exp_batch(self.nodes[pred]["S"], Q[:, col[cur]])
+            T[:, node_idx[cur]] = P[cur] @ self.nodes[cur]["T0"].as_matrix()
+        return T
+
     def jacobian(
         self,
         joint_angles: Dict[str, float],
@@ -181,6 +211,35 @@ class RobotRevolute(Robot):
                 J[node][3:, idx] = z_hat_i
         return J
 
+    def jacobian_batch(
+        self, Q: ArrayLike, node: str = None, T: ArrayLike = None
+    ) -> ArrayLike:
+        """
+        Given N joint configurations, calculate the geometric Jacobians of a node at once,
+        with the same rows as jacobian_geometric.
+
+        :param Q: N x n array of joint variables ordered as joint_ids without ROOT
+        :param node: node the Jacobian is computed for, defaults to the first end-effector
+        :param T: poses returned by pose_batch(Q), computed if not given
+        :returns: N x 6 x n array of Jacobians, columns ordered as the rows of Q
+        """
+        if node is None:
+            node = self.end_effectors[0]
+        if T is None:
+            T = self.pose_batch(Q)
+        joints = [joint for joint in self.joint_ids if joint != ROOT]
+        col = {joint: idx for idx, joint in enumerate(joints)}
+        node_idx = {joint: idx for idx, joint in enumerate(self.joint_ids)}
+
+        p_node = T[:, node_idx[node], :3, 3]
+        J = np.zeros((T.shape[0], 6, len(joints)))
+        for joint in self.kinematic_map[ROOT][node][1:]:
+            T_pred = T[:, node_idx[list(self.predecessors(joint))[0]]]
+            z = T_pred[:, :3, 2]
+            J[:, :3, col[joint]] = np.cross(z, p_node - T_pred[:, :3, 3])
+            J[:, 3:, col[joint]] = z
+        return J
+
 if __name__ == "__main__":
     from graphik.utils.roboturdf import load_ur10, load_kuka, load_schunk_lwa4d
 
@@ -2,6 +2,7 @@
 Rank constraints via convex iteration (Dattorro's Convex Optimization and Euclidean Distance Geometry textbook).
 
 """
+import time
 import numpy as np
 import cvxpy as cp
 import networkx as nx
@@ -19,6 +20,7 @@ from graphik.solvers.sdp_snl import (
     chordal_sparsity_overlap_constraints
 )
 from graphik.solvers.constraints import get_full_revolute_nearest_point
+from graphik.solvers.prescreen import prescreen
 from graphik.utils.roboturdf import load_ur10
 from graphik.utils.constants import *
 from graphik.graphs.graph_base import ProblemGraph
@@ -169,8 +171,24 @@ def convex_iterate_sdp_snl_graph(
     abs_eig_sum_tol=1e-6,
     rel_eig_sum_tol=1e-3,
     floor_mode=False,
-    scs=False
+    scs=False,
+    deadline=None,
+    callback=None,
+    return_info=False,
 ):
+    """
+    Convex iteration on the SDP relaxation of the distance geometry problem of graph.
+    The SDP variables and the cost matrix C of the last iterate are returned. If the
+    iteration is stopped by the deadline or the callback, those of the iterate with the
+    smallest sum of the eigenvalues outside of the top d (i.e. the closest to rank d)
+    are returned instead.
+
+    :param deadline: time.time() after which no new iteration is started
+    :param callback: function of (iteration, C, cost) called after every iteration,
+    returning True stops the iteration
+    :param return_info: also return a dictionary with the cost, eig_value_sum (sum of
+    the eigenvalues outside of the top d), iterations and converged of the returned iterate
+    """
     # get a copy of the current robot + environment graph
     G = nx.DiGraph(graph)
     # G = graph.directed.copy()
@@ -215,6 +233,11 @@ def convex_iterate_sdp_snl_graph(
     C = np.eye(N) if W_init is None else W_init  # Identity satisfies any sparsity pattern by default
     prob = None
     sdp_variable_map = None
+    converged = False
+    stopped = False  # by the deadline or the callback
+    anytime = deadline is not None or callback is not None
+    best = None  # (eigenvalue sum, cost, C, values of the SDP variables, iteration)
+    iter = -1  # no iterations if max_iters is 0
     for iter in range(max_iters):
         solution, prob, sdp_variable_map, _ = solve_linear_cost_sdp(
             robot,
@@ -255,14 +278,51 @@ def convex_iterate_sdp_snl_graph(
             eig_value_sum_vs_iterations.append(sparse_eigenvalue_sum(sdp_variable_map, d))
         fantope_solver_runtime += t_fantope
 
+        # Keep the iterate closest to rank d in case the iteration is stopped early
+        if anytime and (best is None or eig_value_sum_vs_iterations[-1] < best[0]):
+            values = {clique: var.value.copy() for clique, var in sdp_variable_map.items()}
+            best = (eig_value_sum_vs_iterations[-1], prob.value, C, values, iter)
+
         # Check for convergence
         eigval_sum_change = last_cost - prob.value
         rel_change = np.abs(eigval_sum_change)/np.abs(last_cost)
         if np.abs(eigval_sum_change) <= abs_eig_sum_tol or prob.value <= abs_eig_sum_tol or rel_change < rel_eig_sum_tol:
+            converged = True
             break
         else:
             last_cost = prob.value
 
+        if deadline is not None and time.time() >= deadline:
+            stopped = True
+            break
+        if callback is not None and callback(iter, C, prob.value):
+            stopped = True
+            break
+
+    info = {"cost": None, "eig_value_sum": None, "iterations": iter + 1, "converged": False}
+    if feasible is FEASIBLE and eig_value_sum_vs_iterations:
+        eig_value_sum, cost = eig_value_sum_vs_iterations[-1], prob.value
+        if stopped and best[4] != iter:
+            eig_value_sum, cost, C, values, _ = best
+            for clique, var in sdp_variable_map.items():
+                var.save_value(values[clique])  # skips the PSD check of the setter
+            prob._value = cost  # the problem reports the value of the restored iterate
+        info.update(cost=cost, eig_value_sum=eig_value_sum, converged=converged)
+
+    if return_info:
+        return (
+            C,
+            constraint_clique_dict,
+            sdp_variable_map,
+            canonical_point_order,
+            eig_value_sum_vs_iterations,
+            prob,
+            primal_sdp_runtime,
+            fantope_solver_runtime,
+            feasible,
+            info,
+        )
+
     return (
         C,
         constraint_clique_dict,
@@ -276,7 +336,36 @@ def convex_iterate_sdp_snl_graph(
     )
 
 
-def solve_with_cidgik(graph: ProblemGraphRevolute, T_goal: SE3) -> (dict, dict):
+def solve_with_cidgik(
+    graph: ProblemGraphRevolute,
+    T_goal: SE3,
+    deadline=None,
+    callback=None,
+    screen=False,
+    return_info=False,
+) -> (dict, dict):
+    """
+    Solves the IK problem with convex iteration (CIDGIK). The solution is extracted from
+    the last iterate, or from the iterate closest to rank d if the iteration is stopped
+    by the deadline or the callback.
+
+    :param deadline: time.time() after which no new convex iteration is started
+    :param callback: called after every convex iteration, see convex_iterate_sdp_snl_graph
+    :param screen: return no solution without solving if the goal fails prescreen
+    :param return_info: also return a dictionary with the cost, eig_value_sum, iterations
+    and converged of the returned iterate, and the largest distance limit violation of
+    the solution
+    """
+    info = {
+        "cost": None,
+        "eig_value_sum": None,
+        "violation": None,
+        "iterations": 0,
+        "converged": False,
+    }
+    if screen and prescreen(graph, T_goal) is not None:
+        return (None, None, info) if return_info else (None, None)
+
     robot = graph.robot
     n = robot.n
 
@@ -289,18 +378,23 @@ def solve_with_cidgik(graph: ProblemGraphRevolute, T_goal: SE3) -> (dict, dict):
     }
 
     # Solve with CIDGIK
-    _, constraint_clique_dict, sdp_variable_map, _, _, _, _, _, feasible = \
+    _, constraint_clique_dict, sdp_variable_map, _, _, _, _, _, feasible, iterate_info = \
         convex_iterate_sdp_snl_graph(
             graph,
             anchors,
             ranges=True,
             sparse=False,
             closed_form=True,
-            scs=False
+            scs=False,
+            deadline=deadline,
+            callback=callback,
+            return_info=True,
         )
+    info.update(iterate_info)
 
     # Extract the angular configuration
-    if feasible is FEASIBLE:
+    q_sol, solution = None, None
+    if feasible is FEASIBLE and iterate_info["cost"] is not None:
         solution = extract_solution(constraint_clique_dict, sdp_variable_map, robot.dim)
 
         # Add the end-effector goal points to the solution
@@ -314,9 +408,12 @@ def solve_with_cidgik(graph: ProblemGraphRevolute, T_goal: SE3) -> (dict, dict):
         G_sol = graph.from_pos(solution)
         q_sol = graph.joint_variables(G_sol, {f"p{n}": T_goal})
 
-        return q_sol, solution
-    else:
-        return None, None
+        broken = graph.check_distance_limits(graph.realization(q_sol), tol=0)
+        info["violation"] = max([abs(limit["value"]) for limit in broken], default=0.0)
+
+    if return_info:
+        return q_sol, solution, info
+    return q_sol, solution
 
 
 if __name__ == "__main__":
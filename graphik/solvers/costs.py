@@ -1,10 +1,20 @@
 import numpy as np
-from numba import jit
-from numba.pycc import CC
 
-cc = CC("costgrd")
+# Kernels are plain Python functions that are either compiled ahead of time into the
+# costgrd module by running this file, or compiled on first use by solvers/kernels.py
+try:
+    from numba.pycc import CC
 
-@cc.export("jcost", "f8(f8[:,:],f8[:,:],UniTuple(u8[:],2))")
+    cc = CC("costgrd")
+    export = cc.export
+except ImportError:  # numba.pycc was removed in recent numba releases
+    cc = None
+
+    def export(name, sig):
+        return lambda fn: fn
+
+
+@export("jcost", "f8(f8[:,:],f8[:,:],UniTuple(u8[:],2))")
 def jcost(Y, D_goal, inds):
     cost = 0
     dim = Y.shape[1]
@@ -16,7 +26,7 @@ def jcost(Y, D_goal, inds):
     return 0.5 * cost
 
 
-@cc.export("jgrad", "f8[:,:](f8[:,:],f8[:,:],UniTuple(u8[:],2))")
+@export("jgrad", "f8[:,:](f8[:,:],f8[:,:],UniTuple(u8[:],2))")
 def jgrad(Y, D_goal, inds):
     num_el = Y.shape[0]
     dim = Y.shape[1]
@@ -35,7 +45,7 @@ def jgrad(Y, D_goal, inds):
     return 0.5 * grad
 
 
-@cc.export("jhess", "f8[:,:](f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))")
+@export("jhess", "f8[:,:](f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))")
 def jhess(Y, w, D_goal, inds):
     num_el = Y.shape[0]
     dim = Y.shape[1]
@@ -57,7 +67,7 @@ def jhess(Y, w, D_goal, inds):
             )
     return 0.5 * hess
 
-@cc.export("jcost_and_grad", "Tuple((f8, f8[:,:]))(f8[:,:],f8[:,:],UniTuple(u8[:],2))")
+@export("jcost_and_grad", "Tuple((f8, f8[:,:]))(f8[:,:],f8[:,:],UniTuple(u8[:],2))")
 def jcost_and_grad(Y, D_goal, inds):
     cost = 0
     dim = Y.shape[1]
@@ -76,7 +86,7 @@ def jcost_and_grad(Y, D_goal, inds):
         cost += 2 * (D_goal[idx, jdx] - nrm) ** 2
     return 0.5*cost, 0.5* grad
 
-@cc.export("lcost", "f8(f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))")
+@export("lcost", "f8(f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))")
 def lcost(Y, D_goal, omega, psi_L, psi_U, inds):
     cost = 0
     dim = Y.shape[1]
@@ -92,7 +102,7 @@ def lcost(Y, D_goal, omega, psi_L, psi_U, inds):
             cost += max((-psi_U[idx, jdx] + nrm), 0) ** 2
     return cost
 
-@cc.export(
+@export(
     "lgrad", "f8[:,:](f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))"
 )
 def lgrad(Y, D_goal, omega, psi_L, psi_U, inds):
@@ -122,7 +132,7 @@ def lgrad(Y, D_goal, omega, psi_L, psi_U, inds):
                     grad[jdx, kdx] += -a
     return 2*grad
 
-@cc.export("lcost_and_grad", "Tuple((f8, f8[:,:]))(f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))")
+@export("lcost_and_grad", "Tuple((f8, f8[:,:]))(f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))")
 def lcost_and_grad(Y, D_goal, omega, psi_L, psi_U, inds):
     cost = 0
     dim = Y.shape[1]
@@ -168,7 +178,7 @@ def lcost_and_grad(Y, D_goal, omega, psi_L, psi_U, inds):
                     )
     return 0.5*cost, 0.5*grad
 
-@cc.export(
+@export(
     "lhess",
     "f8[:,:](f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],f8[:,:],UniTuple(u8[:],2))",
 )
@@ -205,5 +215,123 @@ def lhess(Y, w, D_goal, omega, psi_L, psi_U, inds):
                 hess[jdx, kdx] += -c
 
     return 2 * hess
+
+# Kernels over a precomputed edge list (i, j, target, lower, upper, kind), where
+# the bits of kind mark the active terms: 1 for target distances, 2 for lower
+# and 4 for upper limits. They give the same values as lcost, lgrad and lhess.
+
+@export(
+    "lcost_edges", "f8(f8[:,:],i8[:],i8[:],f8[:],f8[:],f8[:],i8[:])"
+)
+def lcost_edges(Y, i, j, target, lower, upper, kind):
+    cost = 0
+    dim = Y.shape[1]
+    for edx in range(i.shape[0]):
+        idx, jdx = i[edx], j[edx]
+        nrm = 0
+        for kdx in range(dim):
+            nrm += (Y[idx, kdx] - Y[jdx, kdx]) ** 2
+        if kind[edx] & 1:
+            cost += (target[edx] - nrm) ** 2
+        if kind[edx] & 2 and lower[edx] > nrm:
+            cost += (lower[edx] - nrm) ** 2
+        if kind[edx] & 4 and nrm > upper[edx]:
+            cost += (nrm - upper[edx]) ** 2
+    return cost
+
+
+@export(
+    "lgrad_edges", "f8[:,:](f8[:,:],i8[:],i8[:],f8[:],f8[:],f8[:],i8[:])"
+)
+def lgrad_edges(Y, i, j, target, lower, upper, kind):
+    dim = Y.shape[1]
+    grad = np.zeros((Y.shape[0], dim))
+    for edx in range(i.shape[0]):
+        idx, jdx = i[edx], j[edx]
+        nrm = 0
+        for kdx in range(dim):
+            nrm += (Y[idx, kdx] - Y[jdx, kdx]) ** 2
+        c = 0
+        if kind[edx] & 1:
+            c += nrm - target[edx]
+        if kind[edx] & 2 and lower[edx] > nrm:
+            c += nrm - lower[edx]
+        if kind[edx] & 4 and nrm > upper[edx]:
+            c += nrm - upper[edx]
+        if c != 0:
+            for kdx in range(dim):
+                a = c * (Y[idx, kdx] - Y[jdx, kdx])
+                grad[idx, kdx] += a
+                grad[jdx, kdx] -= a
+    return 2 * grad
+
+
+@export(
+    "lcost_and_grad_edges",
+    "Tuple((f8, f8[:,:]))(f8[:,:],i8[:],i8[:],f8[:],f8[:],f8[:],i8[:])",
+)
+def lcost_and_grad_edges(Y, i, j, target, lower, upper, kind):
+    cost = 0
+    dim = Y.shape[1]
+    grad = np.zeros((Y.shape[0], dim))
+    for edx in range(i.shape[0]):
+        idx, jdx = i[edx], j[edx]
+        nrm = 0
+        for kdx in range(dim):
+            nrm += (Y[idx, kdx] - Y[jdx, kdx]) ** 2
+        c = 0
+        if kind[edx] & 1:
+            c += nrm - target[edx]
+            cost += (target[edx] - nrm) ** 2
+        if kind[edx] & 2 and lower[edx] > nrm:
+            c += nrm - lower[edx]
+            cost += (lower[edx] - nrm) ** 2
+        if kind[edx] & 4 and nrm > upper[edx]:
+            c += nrm - upper[edx]
+            cost += (nrm - upper[edx]) ** 2
+        if c != 0:
+            for kdx in range(dim):
+                a = c * (Y[idx, kdx] - Y[jdx, kdx])
+                grad[idx, kdx] += a
+                grad[jdx, kdx] -= a
+    return cost, 2 * grad
+
+
+@export(
+    "lhess_edges",
+    "f8[:,:](f8[:,:],f8[:,:],i8[:],i8[:],f8[:],f8[:],f8[:],i8[:])",
+)
+def lhess_edges(Y, w, i, j, target, lower, upper, kind):
+    dim = Y.shape[1]
+    hess = np.zeros((Y.shape[0], dim))
+    for edx in range(i.shape[0]):
+        idx, jdx = i[edx], j[edx]
+        nrm = 0
+        sc = 0
+        for kdx in range(dim):
+            nrm += (Y[idx, kdx] - Y[jdx, kdx]) ** 2
+            sc += (Y[idx, kdx] - Y[jdx, kdx]) * (w[idx, kdx] - w[jdx, kdx])
+        num = 0  # number of active terms
+        c = 0
+        if kind[edx] & 1:
+            num += 1
+            c += nrm - target[edx]
+        if kind[edx] & 2 and lower[edx] > nrm:
+            num += 1
+            c += nrm - lower[edx]
+        if kind[edx] & 4 and nrm > upper[edx]:
+            num += 1
+            c += nrm - upper[edx]
+        if num > 0:
+            for kdx in range(dim):
+                a = 2 * num * sc * (Y[idx, kdx] - Y[jdx, kdx])
+                b = c * (w[idx, kdx] - w[jdx, kdx])
+                hess[idx, kdx] += a + b
+                hess[jdx, kdx] -= a + b
+    return 2 * hess
+
+
 if __name__ == "__main__":
+    if cc is None:
+        raise ImportError("numba.pycc is not available, kernels will be compiled at runtime.")
     cc.compile()
@@ -0,0 +1,234 @@
+"""
+Gauss-Newton (Levenberg-Marquardt) solver for the distance geometry IK cost.
+
+The cost minimized by RiemannianSolver is a sum of squared residuals of the squared
+distances between pairs of points, so its structure can be exploited directly.
+Each iteration assembles the sparse Gauss-Newton matrix J^T J of the residual
+Jacobian J over the active terms of the edge list (see
+RiemannianSolver.create_edge_list) and solves the damped normal equations
+
+    (J^T J + lambda I) dY = -J^T r,
+
+with the damping lambda adapted from the ratio of the actual and predicted cost
+decrease as in a trust-region method (Nielsen's update).
+
+The solver works on the point coordinates Y directly. The cost is invariant to
+rotations and translations of Y, which only makes J^T J singular along directions
+in which the gradient is zero, and the damping keeps the system definite.
+"""
+import inspect
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import cg, spsolve
+from pymanopt.solvers.solver import Solver
+
+# scipy >= 1.12 renamed the relative tolerance of cg from tol to rtol
+_CG_RTOL = "rtol" if "rtol" in inspect.signature(cg).parameters else "tol"
+
+
+def edge_residuals(Y, i, j, target, lower, upper, kind):
+    """
+    Evaluates the active residuals of the edge list cost.
+    Distance terms are always active, limit terms only when the limit is violated.
+
+    :param Y: N x dim point coordinates
+    :returns: tuple (diff, res, count) of the differences Y[i] - Y[j], the summed
+    residuals of each edge and the number of active terms of each edge
+    """
+    diff = Y[i] - Y[j]
+    nrm = np.einsum("ij,ij->i", diff, diff)
+    eq = (kind & 1) > 0
+    lo = ((kind & 2) > 0) & (lower > nrm)
+    up = ((kind & 4) > 0) & (nrm > upper)
+    res = eq * (nrm - target) + lo * (nrm - lower) + up * (nrm - upper)
+    count = eq.astype(float) + lo + up
+    return diff, res, count
+
+
+def edge_cost(Y, i, j, target, lower, upper, kind):
+    """
+    :returns: the edge list cost, the sum of the squared active residuals
+    """
+    diff = Y[i] - Y[j]
+    nrm = np.einsum("ij,ij->i", diff, diff)
+    eq = (kind & 1) > 0
+    lo = ((kind & 2) > 0) & (lower > nrm)
+    up = ((kind & 4) > 0) & (nrm > upper)
+    return np.sum(
+        eq * (nrm - target) ** 2 + lo * (nrm - lower) ** 2 + up * (nrm - upper) ** 2
+    )
+
+
+class NormalEquations:
+    """
+    Damped Gauss-Newton system of an edge list. Every edge contributes a dim x dim
+    block -w g g^T to J^T J at (i, j) and (j, i) and w g g^T at (i, i) and (j, j),
+    where g = 2 (Y[i] - Y[j]) is the Jacobian row of its residuals and w the number of
+    active terms. The sparsity pattern is computed once, so that assembling the
+    system only updates the values of a sparse matrix.
+
+    :param i: first point of each edge
+    :param j: second point of each edge
+    :param N: number of points
+    :param dim: number of coordinates of each point
+    """
+
+    def __init__(self, i, j, N, dim):
+        self.N, self.dim = N, dim
+        n = N * dim
+        offs = np.arange(dim)
+        ri, rj = i[:, None] * dim + offs, j[:, None] * dim + offs
+        # blocks (i, i), (j, j), (i, j), (j, i) of each edge, then the diagonal
+        rows = np.stack([ri, rj, ri, rj], axis=1)[:, :, :, None]
+        cols = np.stack([ri, rj, rj, ri], axis=1)[:, :, None, :]
+        rows, cols = np.broadcast_arrays(rows, cols)
+        keys = np.concatenate([(rows * n + cols).ravel(), np.arange(n) * (n + 1)])
+        uniq, self._inv = np.unique(keys, return_inverse=True)
+        self._nnz = uniq.shape[0]
+        self._diag = self._inv[-n:]
+        self._sign = np.array([1.0, 1.0, -1.0, -1.0])[None, :, None, None]
+        self._grad_inds = np.concatenate([ri, rj]).ravel()
+        self._data = np.zeros(self._nnz)
+        # J^T J is symmetric, so its CSR arrays are also valid CSC arrays
+        indptr = np.searchsorted(uniq // n, np.arange(n + 1))
+        self.A = sp.csc_matrix((np.zeros(self._nnz), uniq % n, indptr), shape=(n, n))
+
+    def assemble(self, diff, res, count):
+        """
+        Evaluates J^T J and J^T r at the point with the given edge residuals.
+
+        :returns: tuple (diagonal of J^T J, J^T r), half the gradient of the cost
+        """
+        E, dim = diff.shape
+        outer = (4 * count)[:, None, None] * diff[:, :, None] * diff[:, None, :]
+        vals = np.concatenate([(self._sign * outer[:, None]).ravel(), np.zeros(self.N * dim)])
+        self._data = np.bincount(self._inv, weights=vals, minlength=self._nnz)
+        g = (2 * res)[:, None] * diff
+        grad = np.bincount(
+            self._grad_inds,
+            weights=np.concatenate([g, -g]).ravel(),
+            minlength=self.N * dim,
+        )
+        return self._data[self._diag], grad
+
+    def damped(self, lam):
+        """
+        :returns: the sparse matrix J^T J + lam I
+        """
+        self.A.data[:] = self._data
+        self.A.data[self._diag] += lam
+        return self.A
+
+
+class GaussNewton(Solver):
+    """
+    Levenberg-Marquardt solver for problems with an edge list attribute problem.edges,
+    as returned by RiemannianSolver.create_edge_list.
+
+    :param linear_solver: 'direct' to factorize the damped normal equations with
+    SuperLU, 'cg' for conjugate gradients warm started from the previous step
+    :param tau: initial damping relative to the largest diagonal entry of J^T J
+    :param mincost: stop when the cost falls below this value
+    """
+
+    def __init__(self, linear_solver="direct", tau=1e-3, mincost=1e-12, *args, **kwargs):
+        super(GaussNewton, self).__init__(*args, **kwargs)
+        if linear_solver not in ("direct", "cg"):
+            raise ValueError("linear_solver must be one of 'direct', 'cg'")
+        self.linear_solver = linear_solver
+        self.tau = tau
+        self.mincost = mincost
+
+    def solve(self, problem, x=None, deadline=None, callback=None):
+        """
+        :param problem: pymanopt problem with an edge list attribute edges
+        :param x: initial point configuration
+        :param deadline: time.time() at which to stop and return the current iterate
+        :param callback: function of (x, f(x), iteration) called after every outer
+        iteration, returning True stops the solver
+        :returns: the solution, and the optimization log if logverbosity > 0
+        """
+        if x is None:
+            x = problem.manifold.rand()
+        i, j = problem.edges[:2]
+        edges = problem.edges
+        N, dim = x.shape
+        verbosity = problem.verbosity
+
+        x = np.array(x, dtype=float)
+        n = x.size
+
+        system = NormalEquations(i, j, N, dim)
+        fx = edge_cost(x, *edges)
+        diag, grad = system.assemble(*edge_residuals(x, *edges))
+        norm_grad = np.linalg.norm(grad)
+
+        lam = self.tau * (np.max(diag) if diag.size else 1.0)
+        nu = 2.0
+        step = np.zeros(n)
+        stepsize = np.inf
+
+        time0 = time.time()
+        self._start_optlog()
+        k = 0
+        while True:
+            if verbosity >= 2:
+                print(
+                    "k: {:5d}   f: {:+e}   |grad|: {:e}   lambda: {:e}".format(
+                        k, fx, norm_grad, lam
+                    )
+                )
+
+            stop_reason = self._check_stopping_criterion(
+                time0, gradnorm=norm_grad, iter=k, stepsize=stepsize
+            )
+            if not stop_reason and fx <= self.mincost:
+                stop_reason = "Terminated - min cost reached after %d iterations." % k
+            if not stop_reason and deadline is not None and time.time() >= deadline:
+                stop_reason = "Terminated - deadline reached after %d iterations." % k
+            if not stop_reason and callback is not None and callback(x, fx, k):
+                stop_reason = "Terminated - stopped by callback after %d iterations." % k
+            if stop_reason:
+                if verbosity >= 1:
+                    print(stop_reason)
+                    print("")
+                break
+
+            # damped normal equations, grad is half the gradient of the cost
+            A = system.damped(lam)
+            if self.linear_solver == "direct":
+                step = spsolve(A, -grad)
+            else:
+                step, _ = cg(A, -grad, x0=step, atol=0.0, **{_CG_RTOL: 1e-10})
+
+            stepsize = np.linalg.norm(step)
+            x_prop = x + step.reshape(N, dim)
+            fx_prop = edge_cost(x_prop, *edges)
+
+            # predicted decrease of 0.5 * cost by the linear model
+            pred = 0.5 * step.dot(lam * step - grad)
+            rho = 0.5 * (fx - fx_prop) / pred if pred > 0 else -1.0
+
+            if rho > 0:
+                x, fx = x_prop, fx_prop
+                _, grad = system.assemble(*edge_residuals(x, *edges))
+                norm_grad = np.linalg.norm(grad)
+                lam *= max(1.0 / 3.0, 1.0 - (2.0 * rho - 1.0) ** 3)
+                nu = 2.0
+            else:
+                lam *= nu
+                nu *= 2.0
+            k += 1
+
+        if self._logverbosity <= 0:
+            return x
+        else:
+            self._stop_optlog(
+                x, fx, stop_reason, time0, stepsize=stepsize, gradnorm=norm_grad, iter=k
+            )
+            self._optlog["final_values"]["converged"] = (
+                norm_grad < self._mingradnorm or fx <= self.mincost
+            )
+            return x, self._optlog
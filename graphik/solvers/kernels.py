@@ -0,0 +1,134 @@
+"""
+Registry of the compiled cost kernels defined in costs.py.
+
+Kernels come from the ahead-of-time compiled costgrd module if it has been built
+(python costs.py), and are otherwise compiled on first use with numba.njit and kept
+in numba's on-disk cache, so later processes load them without recompiling.
+If numba is unavailable the solvers fall back to their dense NumPy implementation.
+"""
+import os
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+KERNELS = ["lcost_edges", "lgrad_edges", "lhess_edges", "lcost_and_grad_edges"]
+BACKENDS = ["aot", "jit", "numpy"]
+
+_kernels = {}
+_backend = None
+
+
+def configure(backend: str = None, cache_dir: str = None):
+    """
+    Selects the kernel backend and the directory used to cache runtime compiled kernels.
+    Already loaded kernels are dropped.
+
+    :param backend: one of 'aot', 'jit', 'numpy', the fastest available if None
+    :param cache_dir: directory for numba's compilation cache, defaults to numba's
+    choice (next to costs.py or in the user cache directory)
+    """
+    global _backend
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        os.environ["NUMBA_CACHE_DIR"] = cache_dir
+        try:
+            import numba
+
+            numba.config.CACHE_DIR = cache_dir
+        except ImportError:
+            pass
+
+    _kernels.clear()
+    _backend = backend
+
+
+def backend() -> str:
+    """
+    :returns: name of the active backend, 'aot', 'jit' or 'numpy'
+    """
+    global _backend
+    if _backend is None:
+        try:
+            from graphik.solvers import costgrd
+
+            _backend = "aot" if all(hasattr(costgrd, name) for name in KERNELS) else "jit"
+        except ImportError:
+            _backend = "jit"
+        if _backend == "jit":
+            try:
+                import numba
+            except ImportError:
+                _backend = "numpy"
+    return _backend
+
+
+def available() -> bool:
+    """
+    :returns: True if compiled kernels can be used
+    """
+    return backend() != "numpy"
+
+
+def get(name: str) -> Callable:
+    """
+    Returns a compiled kernel, compiling it if it has not been loaded yet.
+
+    :param name: name of a kernel in costs.py
+    """
+    try:
+        return _kernels[name]
+    except KeyError:
+        pass
+
+    if name not in KERNELS:
+        raise KeyError(f"Unknown kernel {name}, must be one of {KERNELS}")
+
+    active = backend()
+    if active == "aot":
+        from graphik.solvers import costgrd
+
+        kernel = getattr(costgrd, name)
+    elif active == "jit":
+        import numba
+        from graphik.solvers import costs
+
+        kernel = numba.njit(cache=True)(getattr(costs, name))
+    else:
+        raise RuntimeError("No compiled kernels available, use jit=False.")
+
+    _kernels[name] = kernel
+    return kernel
+
+
+def warmup() -> Dict[str, float]:
+    """
+    Loads (and if needed compiles) all kernels by evaluating them on a small problem,
+    so the first IK query does not pay for compilation. Meant to be called at startup.
+
+    :returns: time in seconds spent on each kernel
+    """
+    if not available():
+        return {}
+
+    Y = np.random.rand(3, 3)
+    edges = (
+        np.array([0, 1], dtype=np.int64),
+        np.array([1, 2], dtype=np.int64),
+        np.ones(2),
+        np.zeros(2),
+        np.zeros(2),
+        np.ones(2, dtype=np.int64),
+    )
+    times = {}
+    for name in KERNELS:
+        start = time.perf_counter()
+        if name == "lhess_edges":
+            get(name)(Y, Y, *edges)
+        else:
+            get(name)(Y, *edges)
+        times[name] = time.perf_counter() - start
+    return times
@@ -0,0 +1,399 @@
+"""
+Multi-start Riemannian IK, running several diversified attempts concurrently in a
+process pool and returning as soon as one of them is accepted, or collecting the
+distinct solutions found by many attempts.
+
+"""
+import itertools
+import os
+import pickle
+import time
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from graphik.graphs.graph_base import ProblemGraph
+from graphik.solvers.riemannian_solver import RiemannianSolver
+from graphik.solvers.trust_region import TrustRegions
+from graphik.solvers.gauss_newton import GaussNewton
+from graphik.utils.dgp import (
+    adjacency_matrix_from_graph,
+    distance_matrix_from_graph,
+    graph_from_pos,
+)
+from graphik.utils.utils import wraptopi
+from graphik.utils.constants import ROOT
+
+# Per-process state, set once by the pool initializer
+_graph = None
+_solver = None
+_distance_bounds = None
+_cancelled = None
+_params = None
+
+
+def _init_worker(graph_bytes, params, cancelled):
+    global _graph, _solver, _distance_bounds, _cancelled, _params
+    _graph = pickle.loads(graph_bytes)
+    _solver = RiemannianSolver(_graph, params)
+    _distance_bounds = _graph.distance_bound_matrices()
+    _cancelled = cancelled
+    _params = params
+
+
+def attempt(
+    graph: ProblemGraph,
+    solver: RiemannianSolver,
+    T_goal,
+    seed: int = None,
+    tol: float = 1e-5,
+    deadline: float = None,
+    distance_bounds=None,
+    jit: bool = True,
+    callback: Callable = None,
+) -> Tuple[Dict, np.ndarray, Dict]:
+    """
+    Solves the IK problem once, from the default initialization if seed is None and
+    otherwise from distances sampled uniformly within the smoothed bounds.
+
+    :param graph: problem graph
+    :param solver: solver for the graph
+    :param T_goal: end-effector goal pose
+    :param seed: seed of the sampled initialization
+    :param tol: largest accepted distance limit violation and pose error
+    :param deadline: time.time() by which the solver has to stop
+    :param distance_bounds: squared distance limit matrices, taken from the graph if None
+    :param jit: use compiled cost functions
+    :param callback: called after every solver iteration, returning True stops it
+    :returns: joint configuration, point configuration and a dictionary with keys
+    success, f(x), violation, pose_error, iterations, converged, time and seed
+    """
+    start = time.perf_counter()
+    ee = f"p{graph.robot.n}"
+    G = graph.from_pose(T_goal)
+    D_goal = distance_matrix_from_graph(G)
+    omega = adjacency_matrix_from_graph(G)
+    if distance_bounds is None:
+        distance_bounds = graph.distance_bound_matrices()
+    bounds = graph.bound_smoothing_cache.bounds(graph._pose_goal({ee: T_goal}))
+    rng = None if seed is None else np.random.default_rng(seed)
+    Y_init = solver.generate_initialization(bounds, graph.dim, omega, *distance_bounds, rng=rng)
+
+    sol = solver.solve(
+        D_goal,
+        omega,
+        use_limits=True,
+        Y_init=Y_init,
+        jit=jit,
+        distance_bounds=distance_bounds,
+        deadline=deadline,
+        callback=callback,
+    )
+
+    q_sol = graph.joint_variables(graph_from_pos(sol["x"], graph.node_ids), {ee: T_goal})
+    broken = graph.check_distance_limits(graph.realization(q_sol), tol=0)
+    violation = max([abs(limit["value"]) for limit in broken], default=0.0)
+    T = graph.get_pose(q_sol, ee)
+    pose_error = np.linalg.norm(T.as_matrix() - T_goal.as_matrix())
+    stats = {
+        "success": violation <= tol and pose_error <= tol,
+        "f(x)": sol["f(x)"],
+        "violation": violation,
+        "pose_error": pose_error,
+        "iterations": sol["iterations"],
+        "converged": sol["converged"],
+        "time": time.perf_counter() - start,
+        "seed": seed,
+    }
+    return q_sol, sol["x"], stats
+
+
+def _attempt(solve_id, T_goal, seed, tol, deadline):
+    if _cancelled.value >= solve_id:
+        return None
+
+    def cancelled(Y, cost, iteration):
+        return _cancelled.value >= solve_id
+
+    if not isinstance(_solver.solver, (TrustRegions, GaussNewton)):
+        cancelled = None  # running attempts stop at the deadline only
+
+    try:
+        return attempt(
+            _graph,
+            _solver,
+            T_goal,
+            seed,
+            tol,
+            deadline,
+            _distance_bounds,
+            _params.get("jit", True),
+            cancelled,
+        )
+    except Exception as err:
+        return None, None, {"success": False, "seed": seed, "error": repr(err)}
+
+
+class MultiStartSolver:
+    """
+    Runs num_starts Riemannian IK attempts per goal concurrently in a pool of worker
+    processes. The first attempt starts from the default initialization and the others
+    from distances sampled within the smoothed distance bounds. As soon as one attempt
+    passes the distance limit and pose checks, the remaining attempts are cancelled.
+    If none is accepted before the deadline, the attempt with the smallest limit
+    violation is returned with success False.
+
+    The problem graph is pickled and shipped to every worker once, when the pool is
+    started, so only goals and results cross process boundaries.
+
+    :param graph: problem graph
+    :param num_starts: number of attempts per goal
+    :param deadline: time in seconds after which a solve returns, None for no limit
+    :param tol: largest accepted distance limit violation and pose error
+    :param params: parameters passed to RiemannianSolver
+    :param num_workers: number of worker processes, defaults to min(num_starts, cores)
+    :param seed: seed of the sequence of initialization seeds
+    :param start_method: multiprocessing start method, platform default if None
+    """
+
+    def __init__(
+        self,
+        graph: ProblemGraph,
+        num_starts: int = 8,
+        deadline: float = None,
+        tol: float = 1e-5,
+        params: Dict = {},
+        num_workers: int = None,
+        seed: int = None,
+        start_method: str = None,
+    ):
+        self.num_starts = num_starts
+        self.deadline = deadline
+        self.tol = tol
+        self.params = params
+        self.num_workers = (
+            num_workers if num_workers else min(num_starts, os.cpu_count())
+        )
+
+        self._graph_bytes = pickle.dumps(graph)
+        self._ctx = mp.get_context(start_method)
+        self._rng = np.random.default_rng(seed)
+        self._pool = None
+        self._cancelled = None
+        self._solve_id = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+        if self._pool is not None:
+            return
+        self._cancelled = self._ctx.Value("i", 0)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._graph_bytes, self.params, self._cancelled),
+        )
+
+    def close(self):
+        """
+        Stops the worker processes, cancelling queued attempts.
+        """
+        if self._pool is None:
+            return
+        self._cancelled.value = self._solve_id
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    def solve(self, T_goal) -> Tuple[Dict, np.ndarray, Dict]:
+        """
+        Solves the IK problem for an end-effector goal pose.
+
+        :param T_goal: end-effector goal pose
+        :returns: joint configuration and point configuration of the returned attempt
+        (None if no attempt finished) and a dictionary with the stats of that attempt,
+        plus attempts (number of finished attempts) and the total time
+        """
+        self.start()
+        self._solve_id += 1
+        start = time.time()
+        deadline = None if self.deadline is None else start + self.deadline
+
+        seeds = [None] + self._seeds(self.num_starts - 1)
+        pending = {self._submit(T_goal, seed, deadline) for seed in seeds}
+
+        best = (None, None, {"success": False})
+        finished = 0
+        try:
+            while pending:
+                timeout = None if deadline is None else max(deadline - time.time(), 0)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break  # deadline
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        continue
+                    finished += 1
+                    if _better(result[2], best[2]):
+                        best = result
+                if best[2]["success"]:
+                    break
+        finally:
+            # stops queued attempts of this solve, running ones at their next iteration
+            self._cancelled.value = self._solve_id
+            for future in pending:
+                future.cancel()
+
+        stats = dict(best[2], attempts=finished, time=time.time() - start)
+        return best[0], best[1], stats
+
+    def enumerate(
+        self,
+        T_goal,
+        max_solutions: int = 16,
+        budget: int = 64,
+        patience: int = 16,
+        resolution: float = 1e-2,
+        cost: Callable[[Dict[str, float]], float] = None,
+    ) -> List[Tuple[Dict, np.ndarray, Dict]]:
+        """
+        Collects distinct solutions of the IK problem from diversified attempts, for
+        instance the different branches of a 6-DOF arm. Two solutions are the same if
+        all their joint angles are within resolution (wrapped to [-pi, pi)).
+
+        :param T_goal: end-effector goal pose
+        :param max_solutions: number of distinct solutions after which to stop
+        :param budget: maximum number of attempts
+        :param patience: number of consecutive attempts without a new solution after
+        which to stop
+        :param resolution: angular distance under which solutions are duplicates
+        :param cost: function of the joint configuration by which solutions are sorted,
+        e.g. the distance to the current configuration, in order of discovery if None
+        :returns: list of (joint configuration, point configuration, stats) tuples
+        """
+        self.start()
+        self._solve_id += 1
+        start = time.time()
+        deadline = None if self.deadline is None else start + self.deadline
+
+        seeds = itertools.islice(self._seed_stream(), budget)
+        pending = {
+            self._submit(T_goal, seed, deadline)
+            for seed in itertools.islice(seeds, 2 * self.num_workers)
+        }
+
+        found = _SolutionSet(resolution)
+        solutions = []
+        stale = 0
+        try:
+            while pending and len(solutions) < max_solutions and stale < patience:
+                timeout = None if deadline is None else max(deadline - time.time(), 0)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break  # deadline
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        continue
+                    if result[2]["success"] and found.add(result[0]):
+                        solutions += [result]
+                        stale = 0
+                    else:
+                        stale += 1
+                    for seed in itertools.islice(seeds, 1):
+                        pending.add(self._submit(T_goal, seed, deadline))
+        finally:
+            self._cancelled.value = self._solve_id
+            for future in pending:
+                future.cancel()
+
+        solutions = solutions[:max_solutions]
+        if cost is not None:
+            solutions.sort(key=lambda sol: cost(sol[0]))
+        return solutions
+
+    def _seeds(self, num: int) -> List[int]:
+        return [int(seed) for seed in self._rng.integers(2 ** 31, size=num)]
+
+    def _seed_stream(self):
+        yield None
+        while True:
+            yield self._seeds(1)[0]
+
+    def _submit(self, T_goal, seed, deadline):
+        return self._pool.submit(_attempt, self._solve_id, T_goal, seed, self.tol, deadline)
+
+
+def enumerate_solutions(
+    graph: ProblemGraph,
+    T_goal,
+    max_solutions: int = 16,
+    budget: int = 64,
+    patience: int = 16,
+    cost: Callable[[Dict[str, float]], float] = None,
+    **kwargs,
+) -> List[Tuple[Dict, np.ndarray, Dict]]:
+    """
+    Collects distinct solutions of the IK problem using a temporary MultiStartSolver,
+    see MultiStartSolver.enumerate. Remaining keyword arguments are passed to the
+    MultiStartSolver, e.g. deadline, tol or num_workers.
+
+    :param graph: problem graph
+    :param T_goal: end-effector goal pose
+    :returns: list of (joint configuration, point configuration, stats) tuples
+    """
+    resolution = kwargs.pop("resolution", 1e-2)
+    with MultiStartSolver(graph, **kwargs) as solver:
+        return solver.enumerate(T_goal, max_solutions, budget, patience, resolution, cost)
+
+
+class _SolutionSet:
+    """
+    Joint configurations hashed on a grid of the wrapped joint angles with cell size
+    resolution. Duplicates can only be stored in neighbouring cells, which are found
+    among the occupied cells rather than by visiting all 3^n neighbours.
+    """
+
+    def __init__(self, resolution: float):
+        self.resolution = resolution
+        self.num_cells = int(np.ceil(2 * np.pi / resolution))
+        self.cells = {}
+
+    def add(self, q: Dict[str, float]) -> bool:
+        """
+        Adds a joint configuration unless it is within resolution of a stored one.
+
+        :returns: True if the configuration was added
+        """
+        x = wraptopi(np.array([q[node] for node in sorted(q) if node != ROOT]))
+        cell = np.floor((x + np.pi) / self.resolution).astype(int) % self.num_cells
+        for key, stored in self.cells.items():
+            offset = (np.array(key) - cell) % self.num_cells
+            if not np.all((offset <= 1) | (offset >= self.num_cells - 1)):
+                continue
+            for y in stored:
+                if np.all(np.abs(wraptopi(x - y)) < self.resolution):
+                    return False
+        self.cells.setdefault(tuple(cell), []).append(x)
+        return True
+
+
+def _better(stats: Dict, best: Dict) -> bool:
+    # accepted attempts first, then by limit violation and pose error
+    def key(stats):
+        if "violation" not in stats:
+            return (False, -np.inf, -np.inf)
+        return (stats["success"], -stats["violation"], -stats["pose_error"])
+
+    return key(stats) > key(best)
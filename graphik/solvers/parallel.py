@@ -0,0 +1,352 @@
+"""
+Process-based parallel execution of IK solvers over streams of goal poses.
+
+"""
+import os
+import pickle
+import queue
+import time
+import multiprocessing as mp
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from graphik.graphs.graph_base import ProblemGraph
+
+
+class _RiemannianWorker:
+    """
+    Solves chunks of goals with one solve_trajectory_stream that lives as long as the
+    worker, so the RiemannianSession and the goal-independent problem data are only
+    built once per worker. The stream pulls its goals from a queue that is filled one
+    chunk at a time.
+    """
+
+    def __init__(self, graph: ProblemGraph, params: Dict):
+        self.graph = graph
+        self.params = params
+        self._goals = deque()
+        self._stream = None
+
+    def __call__(self, goals: List[Tuple[Any, Any]]):
+        from graphik.solvers.riemannian_solver import solve_trajectory_stream
+
+        if self._stream is None:
+            self._goals.clear()
+            self._stream = solve_trajectory_stream(
+                self.graph,
+                iter(self._goals.popleft, None),
+                self.params.get("jit", True),
+                self.params,
+                warm_start=False,
+            )
+        self._goals.extend(T_goal for _, T_goal in goals)
+        out = []
+        try:
+            for goal_id, _ in goals:
+                q_sol, _, info = next(self._stream)
+                stats = {key: info[key] for key in ["success", "f(x)", "iterations", "time"]}
+                out += [(goal_id, q_sol if stats["success"] else None, stats)]
+        except Exception:
+            self._stream = None  # the generator is closed after raising
+            raise
+        return out
+
+
+class _CIDGIKWorker:
+    """
+    Solves chunks of goals with solve_with_cidgik, which builds its SDP per goal.
+    """
+
+    def __init__(self, graph: ProblemGraph, params: Dict):
+        if params:
+            raise ValueError("the cidgik solver takes no parameters")
+        self.graph = graph
+
+    def __call__(self, goals: List[Tuple[Any, Any]]):
+        from graphik.solvers.convex_iteration import solve_with_cidgik
+
+        out = []
+        for goal_id, T_goal in goals:
+            start = time.perf_counter()
+            q_sol, _ = solve_with_cidgik(self.graph, T_goal)
+            stats = {"success": q_sol is not None, "time": time.perf_counter() - start}
+            out += [(goal_id, q_sol, stats)]
+        return out
+
+
+SOLVERS = {"riemannian": _RiemannianWorker, "cidgik": _CIDGIKWorker}
+
+
+def _worker(graph_bytes, solver, params, tasks, results, current, generation, max_tasks):
+    # The graph is unpickled and the solver state built once, both stay warm for the
+    # lifetime of the worker. The id of the last chunk taken from the queue is kept in
+    # shared memory, where the parent reads it synchronously if the worker dies
+    graph = pickle.loads(graph_bytes)
+    solve = SOLVERS[solver](graph, params)
+    born = generation.value
+    completed = 0
+    while max_tasks is None or completed < max_tasks:
+        if generation.value != born:
+            break  # graceful restart requested
+        item = tasks.get()
+        if item is None:
+            break
+        chunk_id, goals = item
+        current.value = chunk_id
+        try:
+            out = solve(goals)
+        except Exception as err:
+            out = [
+                (goal_id, None, {"success": False, "error": repr(err)})
+                for goal_id, _ in goals
+            ]
+        results.put((chunk_id, out))
+        completed += 1
+
+
+class ParallelIKExecutor:
+    """
+    Runs IK solvers for streams of goals in a pool of worker processes.
+    The problem graph is pickled and shipped to every worker once, so only goals and
+    results cross process boundaries afterwards.
+
+    Goals are submitted as (goal_id, T_goal) pairs in chunks of chunk_size and results
+    are returned as (goal_id, q_sol, stats) triples in order of completion, where q_sol
+    is None if no solution was found. At most max_pending chunks are queued at any time,
+    so submission blocks when the workers fall behind. Workers that die are replaced and
+    the chunk they were working on is resubmitted once, if it kills its worker again its
+    goals are returned as failed. Duplicate results of resubmitted chunks are dropped.
+
+    :param graph: problem graph shared by all goals
+    :param solver: one of 'riemannian', 'cidgik'
+    :param params: parameters passed to the riemannian solver, cidgik takes none
+    :param num_workers: number of worker processes, defaults to the number of cores
+    :param chunk_size: number of goals sent to a worker at once
+    :param max_pending: maximum number of queued chunks, defaults to 2 * num_workers
+    :param max_tasks_per_worker: number of chunks after which a worker is replaced
+    :param start_method: multiprocessing start method, platform default if None
+    """
+
+    def __init__(
+        self,
+        graph: ProblemGraph,
+        solver: str = "riemannian",
+        params: Dict = {},
+        num_workers: int = None,
+        chunk_size: int = 8,
+        max_pending: int = None,
+        max_tasks_per_worker: int = None,
+        start_method: str = None,
+    ):
+        if solver not in SOLVERS:
+            raise ValueError(f"solver must be one of {list(SOLVERS.keys())}")
+        if solver == "cidgik" and params:
+            raise ValueError("the cidgik solver takes no parameters")
+
+        self.solver = solver
+        self.params = params
+        self.num_workers = num_workers if num_workers else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending if max_pending else 2 * self.num_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+
+        self._graph_bytes = pickle.dumps(graph)
+        self._ctx = mp.get_context(start_method)
+        self._tasks = None
+        self._results = None
+        self._generation = None
+        self._workers = {}
+        self._current = {}  # worker id -> shared id of the last chunk it took
+        self._pending = {}  # chunk id -> goals
+        self._retried = set()
+        self._requeue = deque()  # chunks of crashed workers to submit again
+        self._done = deque()
+        self._next_chunk = 0
+        self._next_worker = 0
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+        if self._running:
+            return
+        self._tasks = self._ctx.Queue(maxsize=self.max_pending)
+        self._results = self._ctx.Queue()
+        self._generation = self._ctx.Value("i", 0)
+        self._running = True
+        for _ in range(self.num_workers):
+            self._spawn()
+
+    def close(self, timeout: float = 5.0):
+        """
+        Stops all workers once the chunks already in the queue are processed.
+        Results that have not been collected are discarded.
+        """
+        if not self._running:
+            return
+        self._running = False
+        for _ in self._workers:
+            try:
+                self._tasks.put(None, timeout=timeout)
+            except queue.Full:
+                break
+        for proc in self._workers.values():
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._workers = {}
+        self._current = {}
+        self._requeue.clear()
+
+    def restart_workers(self):
+        """
+        Replaces all workers with fresh processes. Old workers finish their current
+        chunk before exiting, no submitted goals are lost.
+        """
+        with self._generation.get_lock():
+            self._generation.value += 1
+
+    @property
+    def num_pending(self) -> int:
+        """
+        Number of submitted chunks whose results have not been collected.
+        """
+        return len(self._pending)
+
+    def submit(self, goals: Iterable[Tuple[Any, Any]]):
+        """
+        Submits (goal_id, T_goal) pairs in chunks, blocking while the task queue is full.
+        """
+        self.start()
+        chunk = []
+        for goal in goals:
+            chunk += [goal]
+            if len(chunk) == self.chunk_size:
+                self._submit_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._submit_chunk(chunk)
+        self._drain_requeue()
+
+    def results(self, timeout: float = None) -> Iterator[Tuple[Any, Any, Dict]]:
+        """
+        Yields (goal_id, q_sol, stats) for all submitted goals in order of completion.
+
+        :param timeout: maximum time in seconds to wait for the next result
+        """
+        while self._done or self._pending:
+            while self._done:
+                yield self._done.popleft()
+            self._drain_requeue()
+            if self._pending:
+                self._collect(timeout)
+
+    def map(self, goals: Iterable[Tuple[Any, Any]]) -> Iterator[Tuple[Any, Any, Dict]]:
+        """
+        Streams (goal_id, T_goal) pairs through the workers and yields
+        (goal_id, q_sol, stats) as results become available.
+        """
+        self.start()
+        chunk = []
+        for goal in goals:
+            chunk += [goal]
+            if len(chunk) == self.chunk_size:
+                self._submit_chunk(chunk)
+                chunk = []
+                self._drain_requeue()
+                while self._done:
+                    yield self._done.popleft()
+        if chunk:
+            self._submit_chunk(chunk)
+        yield from self.results()
+
+    def _spawn(self):
+        wid = self._next_worker
+        self._next_worker += 1
+        self._current[wid] = self._ctx.Value("q", -1, lock=False)
+        proc = self._ctx.Process(
+            target=_worker,
+            args=(
+                self._graph_bytes,
+                self.solver,
+                self.params,
+                self._tasks,
+                self._results,
+                self._current[wid],
+                self._generation,
+                self.max_tasks_per_worker,
+            ),
+            daemon=True,
+        )
+        proc.start()
+        self._workers[wid] = proc
+
+    def _submit_chunk(self, goals: List[Tuple[Any, Any]], chunk_id: int = None):
+        if chunk_id is None:
+            chunk_id = self._next_chunk
+            self._next_chunk += 1
+        self._pending[chunk_id] = goals
+        while True:
+            try:
+                self._tasks.put((chunk_id, goals), timeout=0.1)
+                return
+            except queue.Full:
+                self._collect(timeout=0)
+
+    def _drain_requeue(self):
+        # Submits the chunks of crashed workers, more can be added while submitting
+        while self._requeue:
+            chunk_id = self._requeue.popleft()
+            if chunk_id in self._pending:
+                self._submit_chunk(self._pending[chunk_id], chunk_id)
+
+    def _collect(self, timeout: float = None):
+        # Read one message from the workers, checking on their health while waiting
+        start = time.perf_counter()
+        while True:
+            try:
+                chunk_id, out = self._results.get(timeout=0.1)
+                break
+            except queue.Empty:
+                self._check_workers()
+                if self._requeue or self._done:
+                    return  # chunks of crashed workers were resubmitted or failed
+                if timeout is not None and time.perf_counter() - start >= timeout:
+                    if timeout > 0:
+                        raise TimeoutError("No IK results received within timeout.")
+                    return
+        # results of resubmitted chunks may arrive twice, keep the first
+        if self._pending.pop(chunk_id, None) is not None:
+            self._done.extend(out)
+
+    def _check_workers(self):
+        for wid, proc in list(self._workers.items()):
+            if proc.is_alive():
+                continue
+            proc.join()
+            del self._workers[wid]
+            chunk_id = self._current.pop(wid).value
+            # workers only exit cleanly between chunks, after posting their results
+            if proc.exitcode != 0 and chunk_id in self._pending:
+                self._recover(chunk_id, proc.exitcode)
+            if self._running:
+                self._spawn()
+
+    def _recover(self, chunk_id: int, exitcode: int):
+        if chunk_id not in self._retried:
+            self._retried.add(chunk_id)
+            self._requeue.append(chunk_id)
+        else:
+            goals = self._pending.pop(chunk_id)
+            self._done.extend(
+                (goal_id, None, {"success": False, "error": f"worker exited with {exitcode}"})
+                for goal_id, _ in goals
+            )
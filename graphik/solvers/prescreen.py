@@ -0,0 +1,60 @@
+"""
+Cheap necessary conditions for the reachability of an end-effector goal, used to
+reject infeasible goals before running a solver.
+
+The goal fixes the positions of the end-effector nodes. A goal is infeasible if one of
+these nodes lies inside a spherical obstacle, or if a distance from them to another
+node with a known position (base and obstacles) is outside the goal-independent
+smoothed distance bounds of the problem graph (see ProblemGraph.bound_smoothing_cache),
+which hold in every realization that satisfies the constraints of the graph. Passing
+the pre-screen does not prove that the goal is feasible.
+"""
+from typing import Optional
+
+import numpy as np
+
+from graphik.utils.constants import MAIN_PREFIX, ROOT
+
+# reason codes
+GOAL_IN_OBSTACLE = "goal_in_obstacle"
+OUT_OF_REACH = "out_of_reach"
+TOO_CLOSE_TO_BASE = "too_close_to_base"
+DISTANCE_BOUNDS = "distance_bounds"
+
+
+def prescreen(graph, T_goal, tol: float = 1e-6) -> Optional[str]:
+    """
+    Checks the distances from the end-effector goal nodes to the base and obstacle
+    nodes against the goal-independent distance bounds of the graph.
+
+    :param graph: problem graph
+    :param T_goal: end-effector goal pose
+    :param tol: distances may violate the bounds by this much
+    :returns: None if the goal passes, else GOAL_IN_OBSTACLE if it is inside an
+    obstacle, OUT_OF_REACH or TOO_CLOSE_TO_BASE if its distance to the base is out of
+    bounds, and DISTANCE_BOUNDS for any other violation
+    """
+    cache = graph.bound_smoothing_cache
+    anchors = cache.anchors
+    P = graph._pose_goal({graph.robot.end_effectors[0]: T_goal})
+    K = np.array([cache.node_index[node] for node in P])[:, np.newaxis]
+
+    diff = cache.anchor_pos[np.newaxis, :, :] - np.array(list(P.values()))[:, np.newaxis, :]
+    d = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+
+    # only the main nodes of the robot have to stay clear of the obstacles
+    main = np.array([node[0] == MAIN_PREFIX for node in P])
+    if (d[main][:, cache.obstacles] < cache.obstacle_radius - tol).any():
+        return GOAL_IN_OBSTACLE
+
+    lower = -cache.B[K, anchors]
+    upper = cache.upper_bounds[K, anchors]
+    violated = (d < lower - tol) | (d > upper + tol)
+    if not violated.any():
+        return None
+
+    root = anchors == cache.node_index[ROOT]
+    if violated[:, root].any():
+        too_far = (d > upper + tol)[:, root].any()
+        return OUT_OF_REACH if too_far else TOO_CLOSE_TO_BASE
+    return DISTANCE_BOUNDS
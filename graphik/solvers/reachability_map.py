@@ -0,0 +1,362 @@
+"""
+Precomputed workspace reachability map of a RobotRevolute.
+
+The workspace around the base is divided into cubic voxels, and the approach
+direction (z axis) of the end-effector into equal-area bins on the sphere. Sampled
+configurations are mapped to a cell (voxel, direction bin) by batched forward
+kinematics, and each cell stores the number of samples that reached it and their
+largest manipulability. Each voxel also stores the configuration with the largest
+manipulability among its samples, as an initialization for the solvers.
+
+The map is a single file, a small JSON header followed by the arrays, which are
+memory mapped so that lookups take constant time and the pages are shared by all
+processes that open the same map.
+"""
+import json
+import multiprocessing as mp
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import numpy.linalg as la
+
+from graphik.utils.constants import ROOT
+
+MAGIC = b"GIKREACH"
+VERSION = 1
+HEADER_SIZE = 4096
+
+# dtype and shape of the stored arrays, in file order
+_ARRAYS = [
+    ("done", np.uint8, lambda h: (h["num_chunks"],)),
+    ("count", np.uint32, lambda h: (h["num_voxels"], h["num_directions"])),
+    ("manipulability", np.float32, lambda h: (h["num_voxels"], h["num_directions"])),
+    ("seed", np.float32, lambda h: (h["num_voxels"], len(h["joints"]))),
+    ("seed_manipulability", np.float32, lambda h: (h["num_voxels"],)),
+]
+
+# parameters that a resumed build must share with the existing map
+_BUILD_PARAMS = [
+    "joints", "node", "resolution", "num_polar", "num_azimuth", "num_samples",
+    "chunk_size", "seed",
+]
+
+
+def direction_bin(z: np.ndarray, num_polar: int, num_azimuth: int) -> np.ndarray:
+    """
+    Bins unit vectors into num_polar x num_azimuth cells of equal area, uniform in the
+    cosine of the polar angle and in the azimuth.
+
+    :param z: ... x 3 array of unit vectors
+    :returns: array of bin indices
+    """
+    u = np.clip((z[..., 2] + 1) / 2 * num_polar, 0, num_polar - 1).astype(np.int64)
+    az = (np.arctan2(z[..., 1], z[..., 0]) + np.pi) / (2 * np.pi) * num_azimuth
+    return u * num_azimuth + np.clip(az, 0, num_azimuth - 1).astype(np.int64)
+
+
+def manipulability(J: np.ndarray) -> np.ndarray:
+    """
+    Yoshikawa manipulability, the product of the singular values of the Jacobian,
+    i.e. sqrt(det(J J^T)) for robots with at least six joints.
+
+    :param J: N x 6 x n array of Jacobians
+    :returns: array of N manipulabilities
+    """
+    return np.prod(la.svd(J, compute_uv=False), axis=-1)
+
+
+def _grid(robot, node: str, resolution: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Cube around the base containing every position the node can reach, bounded by
+    # the summed distances between consecutive frames along its chain
+    path = robot.kinematic_map[ROOT][node]
+    pos = [robot.nodes[joint]["T0"].trans for joint in path]
+    reach = sum(la.norm(b - a) for a, b in zip(pos[:-1], pos[1:])) + resolution
+    origin = pos[0] - reach
+    shape = np.ceil(2 * reach / resolution).astype(np.int64) * np.ones(3, dtype=np.int64)
+    return origin, shape
+
+
+class ReachabilityMap:
+    """
+    Memory mapped reachability map written by build_reachability_map.
+
+    :param path: map file
+    :param mode: 'r' to read, 'r+' to also write the arrays
+    """
+
+    def __init__(self, path: str, mode: str = "r"):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if header[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a reachability map")
+        self.header = json.loads(header[len(MAGIC) :].rstrip(b"\0"))
+        if self.header["version"] != VERSION:
+            raise ValueError(f"unsupported reachability map version {self.header['version']}")
+
+        self.joints = self.header["joints"]
+        self.origin = np.array(self.header["origin"])
+        self.shape = np.array(self.header["shape"], dtype=np.int64)
+        self.resolution = self.header["resolution"]
+        self.num_polar = self.header["num_polar"]
+        self.num_azimuth = self.header["num_azimuth"]
+        self._strides = np.array([self.shape[1] * self.shape[2], self.shape[2], 1])
+        for name, dtype, shape in _ARRAYS:
+            arr = np.memmap(
+                path, dtype, mode, self.header["offsets"][name], shape(self.header)
+            )
+            setattr(self, name, arr)
+
+    @property
+    def complete(self) -> bool:
+        """
+        True if every chunk of samples has been added to the map.
+        """
+        return bool(np.all(self.done))
+
+    def cells(self, T) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param T: end-effector pose, SE3 or 4 x 4 matrix, or N x 4 x 4 array of poses
+        :returns: arrays of voxel and direction bin indices, voxel -1 outside the grid
+        """
+        T = T.as_matrix() if hasattr(T, "as_matrix") else np.asarray(T)
+        idx = np.floor((T[..., :3, 3] - self.origin) / self.resolution).astype(np.int64)
+        inside = np.all((idx >= 0) & (idx < self.shape), axis=-1)
+        voxel = np.where(inside, idx @ self._strides, -1)
+        return voxel, direction_bin(T[..., :3, 2], self.num_polar, self.num_azimuth)
+
+    def lookup(self, T) -> Tuple[Any, Any]:
+        """
+        :param T: end-effector pose, SE3 or 4 x 4 matrix, or N x 4 x 4 array of poses
+        :returns: number of samples that reached the cell of the pose and their
+        largest manipulability, zero outside the grid
+        """
+        voxel, direction = self.cells(T)
+        if voxel.ndim == 0:
+            if voxel < 0:
+                return 0, 0.0
+            cell = (int(voxel), int(direction))
+            return int(self.count[cell]), float(self.manipulability[cell])
+        inside = voxel >= 0
+        v = np.where(inside, voxel, 0)
+        count = np.where(inside, self.count[v, direction], 0)
+        manip = np.where(inside, self.manipulability[v, direction], 0.0)
+        return count, manip
+
+    def reachable(self, T, min_count: int = 1):
+        """
+        :returns: True where at least min_count samples reached the cell of the pose
+        """
+        return self.lookup(T)[0] >= min_count
+
+    def q0(self, T) -> Dict[str, float]:
+        """
+        :param T: end-effector pose, SE3 or 4 x 4 matrix
+        :returns: dictionary of joint variables of the seed of the voxel of the pose, to
+        be passed as q0 to LocalSolver.solve, or None if no sample reached the voxel
+        """
+        voxel, _ = self.cells(T)
+        if voxel < 0 or not np.any(self.count[voxel]):
+            return None
+        return dict(zip(self.joints, self.seed[voxel].astype(float)))
+
+    def Y_init(self, graph, T) -> np.ndarray:
+        """
+        :param graph: problem graph of the robot
+        :param T: end-effector pose, SE3 or 4 x 4 matrix
+        :returns: point configuration of the seed of the voxel of the pose, to be passed
+        as Y_init to RiemannianSolver.solve, or None if no sample reached the voxel
+        """
+        q = self.q0(T)
+        return None if q is None else graph.realization_array(q)
+
+
+def _create(path: str, header: Dict[str, Any]):
+    offset = HEADER_SIZE
+    header["offsets"] = {}
+    for name, dtype, shape in _ARRAYS:
+        header["offsets"][name] = offset
+        size = int(np.prod(shape(header))) * np.dtype(dtype).itemsize
+        offset += -(-size // 64) * 64  # 64 byte aligned
+    data = MAGIC + json.dumps(header).encode()
+    if len(data) > HEADER_SIZE:
+        raise ValueError("reachability map header is too large")
+    with open(path, "wb") as f:
+        f.write(data.ljust(HEADER_SIZE, b"\0"))
+        f.truncate(offset)
+
+
+_robot = None
+
+
+def _init_worker(robot_bytes):
+    # The robot is unpickled once per worker process
+    global _robot
+    _robot = pickle.loads(robot_bytes)
+
+
+def _sample_chunk(chunk: int, header: Dict[str, Any], robot=None):
+    # Samples the configurations of a chunk and reduces them to the cells they reach
+    robot = _robot if robot is None else robot
+    rng = np.random.default_rng([header["seed"], chunk])
+    lb = np.array([robot.lb[joint] for joint in header["joints"]])
+    ub = np.array([robot.ub[joint] for joint in header["joints"]])
+    start = chunk * header["chunk_size"]
+    num = min(header["chunk_size"], header["num_samples"] - start)
+    Q = lb + (ub - lb) * rng.random((num, len(lb)))
+
+    T = robot.pose_batch(Q)
+    m = manipulability(robot.jacobian_batch(Q, header["node"], T))
+    T_node = T[:, robot.joint_ids.index(header["node"])]
+    idx = np.floor((T_node[:, :3, 3] - header["origin"]) / header["resolution"])
+    voxel = np.ravel_multi_index(tuple(idx.astype(np.int64).T), header["shape"])
+    cell = voxel * header["num_directions"] + direction_bin(
+        T_node[:, :3, 2], header["num_polar"], header["num_azimuth"]
+    )
+
+    # count and largest manipulability of every cell, best sample of every voxel
+    cells, counts = np.unique(cell, return_counts=True)
+    order = np.lexsort((m, cell))
+    last = np.r_[cell[order][1:] != cell[order][:-1], True]
+    cell_manip = m[order][last]
+    order = np.lexsort((m, voxel))
+    last = np.r_[voxel[order][1:] != voxel[order][:-1], True]
+    best = order[last]
+    return chunk, cells, counts, cell_manip, voxel[best], Q[best], m[best]
+
+
+def _journal(path: str) -> str:
+    return path + ".journal"
+
+
+def _merge(rmap: ReachabilityMap, result):
+    # The new values of the cells and voxels reached by the chunk are staged in a
+    # journal before they are written to the map. A build interrupted while writing
+    # them replays the journal when resumed, which only sets values again, so the
+    # counts of the chunk are never added twice
+    chunk, cells, counts, cell_manip, voxels, Q, m = result
+    count = rmap.count.reshape(-1)
+    manip = rmap.manipulability.reshape(-1)
+    better = m >= rmap.seed_manipulability[voxels]
+    update = {
+        "chunk": np.array(chunk),
+        "cells": cells,
+        "count": count[cells] + counts.astype(np.uint32),
+        "manipulability": np.maximum(manip[cells], cell_manip),
+        "voxels": voxels[better],
+        "seed": Q[better],
+        "seed_manipulability": m[better],
+    }
+    journal = _journal(rmap.path)
+    with open(journal + ".tmp", "wb") as f:
+        np.savez(f, **update)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(journal + ".tmp", journal)
+    _apply(rmap, update)
+    os.remove(journal)
+
+
+def _apply(rmap: ReachabilityMap, update):
+    # Writes the staged values of a chunk and then marks it as done
+    rmap.count.reshape(-1)[update["cells"]] = update["count"]
+    rmap.manipulability.reshape(-1)[update["cells"]] = update["manipulability"]
+    rmap.seed[update["voxels"]] = update["seed"]
+    rmap.seed_manipulability[update["voxels"]] = update["seed_manipulability"]
+    for name in ["count", "manipulability", "seed", "seed_manipulability"]:
+        getattr(rmap, name).flush()
+    rmap.done[int(update["chunk"])] = 1
+    rmap.done.flush()
+
+
+def build_reachability_map(
+    robot,
+    path: str,
+    resolution: float = 0.05,
+    num_polar: int = 4,
+    num_azimuth: int = 8,
+    num_samples: int = 1000000,
+    chunk_size: int = 10000,
+    seed: int = 0,
+    node: str = None,
+    num_workers: int = None,
+    start_method: str = None,
+) -> ReachabilityMap:
+    """
+    Builds the reachability map of a robot from uniformly sampled configurations within
+    its joint limits. Samples are processed in chunks by a pool of worker processes.
+    Every chunk is seeded by its index and marked as done in the file once added. The
+    values a chunk writes are first staged in a journal file next to the map, so calling
+    this again with the same arguments on an interrupted build completes the chunk that
+    was being written, only processes the remaining chunks, and gives the same map.
+
+    :param robot: RobotRevolute
+    :param path: map file, resumed if it exists
+    :param resolution: edge length of the voxels in metres
+    :param num_polar: number of bins of the cosine of the polar angle of the approach direction
+    :param num_azimuth: number of bins of the azimuth of the approach direction
+    :param num_samples: number of sampled configurations
+    :param chunk_size: number of configurations per chunk
+    :param seed: seed of the sampled configurations
+    :param node: node whose poses are mapped, defaults to the first end-effector
+    :param num_workers: number of worker processes, os.cpu_count() if None, the chunks
+    are processed in this process if 0
+    :param start_method: multiprocessing start method of the workers
+    :returns: the map, opened for reading
+    """
+    if node is None:
+        node = robot.end_effectors[0]
+    origin, shape = _grid(robot, node, resolution)
+    header = {
+        "version": VERSION,
+        "joints": [joint for joint in robot.joint_ids if joint != ROOT],
+        "node": node,
+        "resolution": resolution,
+        "origin": origin.tolist(),
+        "shape": shape.tolist(),
+        "num_voxels": int(np.prod(shape)),
+        "num_polar": num_polar,
+        "num_azimuth": num_azimuth,
+        "num_directions": num_polar * num_azimuth,
+        "num_samples": num_samples,
+        "chunk_size": chunk_size,
+        "num_chunks": -(-num_samples // chunk_size),
+        "seed": seed,
+    }
+
+    journal = _journal(path)
+    if not os.path.exists(path):
+        if os.path.exists(journal):
+            os.remove(journal)
+        _create(path, header)
+    rmap = ReachabilityMap(path, "r+")
+    for key in _BUILD_PARAMS:
+        if rmap.header[key] != header[key]:
+            raise ValueError(f"{path} was built with a different {key}")
+    if os.path.exists(journal):
+        # complete the chunk that was being written when the build was interrupted
+        with np.load(journal) as update:
+            _apply(rmap, dict(update))
+        os.remove(journal)
+
+    chunks = np.flatnonzero(rmap.done == 0).tolist()
+    if num_workers is None:
+        num_workers = os.cpu_count()
+    if num_workers == 0:
+        for chunk in chunks:
+            _merge(rmap, _sample_chunk(chunk, rmap.header, robot))
+    elif chunks:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=mp.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(pickle.dumps(robot),),
+        ) as pool:
+            futures = [pool.submit(_sample_chunk, chunk, rmap.header) for chunk in chunks]
+            for future in as_completed(futures):
+                _merge(rmap, future.result())
+    del rmap
+    return ReachabilityMap(path)
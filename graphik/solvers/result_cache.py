@@ -0,0 +1,174 @@
+"""
+Memoizing cache of IK solutions for repeated queries of (almost) the same goal, e.g.
+retries, replanning of the same grasp or previews, in front of solve_with_riemannian.
+
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from graphik.utils.constants import BELOW, BOUNDED, LOWER, OBSTACLE, POS, TYPE
+
+
+def _as_matrix(T_goal) -> np.ndarray:
+    return T_goal.as_matrix() if hasattr(T_goal, "as_matrix") else np.asarray(T_goal)
+
+
+def joint_limits_hash(robot) -> bytes:
+    """
+    :returns: digest of the joint limits of the robot
+    """
+    joints = sorted(robot.ub)
+    limits = np.array(
+        [[robot.lb[joint], robot.ub[joint]] for joint in joints], dtype=float
+    )
+    return hashlib.sha1(repr(joints).encode() + limits.tobytes()).digest()
+
+
+def obstacle_fingerprint(graph) -> bytes:
+    """
+    :returns: digest of the names, positions and radii of the obstacles of the graph
+    """
+    h = hashlib.sha1()
+    obstacles = sorted(node for node, typ in graph.nodes(data=TYPE) if typ == OBSTACLE)
+    for name in obstacles:
+        radii = [
+            data[LOWER]
+            for _, _, data in graph.in_edges(name, data=True)
+            if BELOW in data.get(BOUNDED, [])
+        ]
+        h.update(name.encode())
+        h.update(np.asarray(graph.nodes[name][POS], dtype=float).tobytes())
+        h.update(np.array(radii[:1], dtype=float).tobytes())
+    return h.digest()
+
+
+class IKResultCache:
+    """
+    LRU cache of IK solutions of a problem graph. Goals are keyed on their pose
+    quantized to a grid with spacing tolerance, together with a hash of the joint
+    limits of the robot and a fingerprint of the obstacles of the graph. The cache is
+    cleared whenever the revision of the graph changes, i.e. after
+    add_spherical_obstacle, clear_obstacles or add_anchor_node.
+
+    Poses on opposite sides of a grid cell boundary can miss each other even if they
+    are closer than tolerance, so the tolerance bounds how far a hit can be from the
+    goal rather than guaranteeing a hit.
+
+    :param graph: problem graph the solutions are computed on
+    :param tolerance: grid spacing of the positions in metres
+    :param rotation_scale: length in metres equivalent to a rotation of one radian,
+    the grid spacing of the rotations is tolerance / rotation_scale
+    :param capacity: largest number of stored solutions
+    :param ttl: time in seconds after which a stored solution expires, None to keep
+    solutions until they are evicted
+    """
+
+    def __init__(
+        self,
+        graph,
+        tolerance: float = 1e-6,
+        rotation_scale: float = 0.5,
+        capacity: int = 1024,
+        ttl: Optional[float] = None,
+    ):
+        self.graph = graph
+        self.tolerance = tolerance
+        self.rotation_scale = rotation_scale
+        self.capacity = capacity
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._revision = None
+        self._fingerprint = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, T_goal) -> Tuple[bytes, bytes, bytes]:
+        """
+        :param T_goal: end-effector goal pose, SE3 or homogeneous matrix
+        :returns: cache key of the goal on the current graph
+        """
+        if self._revision != self.graph.revision:
+            self._invalidate()
+        T = _as_matrix(T_goal)
+        x = np.concatenate([T[:-1, -1], self.rotation_scale * T[:-1, :-1].ravel()])
+        cell = np.round(x / self.tolerance).astype(np.int64)
+        return cell.tobytes(), joint_limits_hash(self.graph.robot), self._fingerprint
+
+    def get(self, T_goal) -> Optional[Tuple[Dict[str, float], np.ndarray]]:
+        """
+        :param T_goal: end-effector goal pose, SE3 or homogeneous matrix
+        :returns: copies of the stored joint variables and point configuration, or None
+        """
+        with self._lock:
+            key = self.key(T_goal)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None:
+                if time.monotonic() - entry[0] > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1]), entry[2].copy()
+
+    def put(self, T_goal, q_sol: Dict[str, float], Y_sol: np.ndarray):
+        """
+        Stores a solution, evicting the least recently used one if full.
+
+        :param T_goal: end-effector goal pose, SE3 or homogeneous matrix
+        :param q_sol: dictionary of joint variables
+        :param Y_sol: point configuration
+        """
+        with self._lock:
+            key = self.key(T_goal)
+            self._entries[key] = (time.monotonic(), dict(q_sol), np.array(Y_sol))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all stored solutions, keeping the metrics.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :returns: dictionary of the hit and miss counts and the current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+        }
+
+    def _invalidate(self):
+        if self._revision is not None and self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._revision = self.graph.revision
+        self._fingerprint = obstacle_fingerprint(self.graph)
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
-from graphik.utils.dgp import adjacency_matrix_from_graph, bound_smoothing, distance_matrix_from_graph, graph_from_pos
+from graphik.utils.dgp import adjacency_matrix_from_graph, distance_matrix_from_graph, graph_from_pos
 import pymanopt
 
+import itertools
+import time
 import numpy as np
+import numpy.linalg as la
+import networkx as nx
 from pymanopt import tools
 from pymanopt.solvers import ConjugateGradient
 from graphik.utils import (
@@ -14,12 +18,12 @@ from graphik.utils import (
 )
 from graphik.utils.manifolds.fixed_rank_psd_sym import PSDFixedRank
 from graphik.solvers.trust_region import TrustRegions
+from graphik.solvers.gauss_newton import GaussNewton
 from graphik.graphs.graph_base import ProblemGraph
-try:
-    from graphik.solvers.costgrd import jcost, jgrad, jhess, lcost, lgrad, lhess
-except ModuleNotFoundError as err:
-    pass
-    # print("AOT compiled functions not found. To improve performance please run solvers/costs.py.")
+from graphik.utils.constants import *
+from graphik.solvers import kernels
+from graphik.solvers.sparse_costs import create_cost_sparse, use_sparse
+from graphik.solvers.prescreen import prescreen
 
 BetaTypes = tools.make_enum(
     "BetaTypes", "FletcherReeves PolakRibiere HestenesStiefel HagerZhang".split()
@@ -57,40 +61,105 @@ class RiemannianSolver:
                 orth_value=params.get("orth_value", 10e10),
                 beta_type=params.get("beta_type", BetaTypes[3]),
             )
+        elif solver_type == "GaussNewton":
+            self.solver = GaussNewton(
+                mingradnorm=params.get("mingradnorm", 0.5*1e-9),
+                logverbosity=params.get("logverbosity", 0),
+                maxiter=params.get("maxiter", 500),
+                minstepsize=params.get("minstepsize", 1e-12),
+                linear_solver=params.get("linear_solver", "direct"),
+                tau=params.get("tau", 1e-3),
+                mincost=params.get("mincost", 1e-18),
+            )
         else:
-            raise (
-                ValueError,
-                "params[\"solver\"] must be one of 'ConjugateGradient', 'TrustRegions'",
+            raise ValueError(
+                "params[\"solver\"] must be one of 'ConjugateGradient', 'TrustRegions', "
+                "'GaussNewton'"
             )
 
 
     @staticmethod
-    def generate_initialization(bounds, dim, omega, psi_L, psi_U):
+    def generate_initialization(bounds, dim, omega, psi_L, psi_U, rng=None):
         # Generates a random EDM within the set bounds
         lb = bounds[0]
         ub = bounds[1]
-        D_rand = (lb + 0.9 * (ub - lb)) ** 2
-        X_rand = MDS(gram_from_distance_matrix(D_rand), eps=1e-8)
+        if rng is None:
+            D_rand = (lb + 0.9 * (ub - lb)) ** 2
+        else:
+            # distances sampled uniformly within the bounds, for diversified starts
+            S = np.triu(rng.random(lb.shape), 1)
+            D_rand = (lb + (S + S.T) * (ub - lb)) ** 2
+        # a few more dimensions than needed are kept for the projection onto the
+        # subspace that best preserves the known distances
+        X_rand = MDS(gram_from_distance_matrix(D_rand), eps=1e-8, k=2 * dim)
         Y_rand = linear_projection(X_rand, omega, dim)
         return Y_rand
 
     @staticmethod
-    def create_cost(D_goal, omega, jit=True):
-        inds = np.nonzero(np.triu(omega))
+    def create_edge_list(D_goal, omega, psi_L, psi_U):
+        """
+        Collects the active terms of the cost into arrays, so the compiled cost
+        functions only visit the pairs of points that contribute to it.
+
+        :returns: tuple of arrays (i, j, target, lower, upper, kind), where the bits of
+        kind mark the distance (1), lower limit (2) and upper limit (4) terms of a pair
+        """
+        diff = psi_L != psi_U
+        inds = np.nonzero(
+            np.triu(omega) + np.triu(diff * (psi_L > 0)) + np.triu(diff * (psi_U > 0))
+        )
+        i, j = inds[0].astype(np.int64), inds[1].astype(np.int64)
+        kind = 1 * (omega[inds] > 0) + 2 * (psi_L[inds] > 0) + 4 * (psi_U[inds] > 0)
+        return (
+            i,
+            j,
+            D_goal[inds].astype(float),
+            psi_L[inds].astype(float),
+            psi_U[inds].astype(float),
+            kind.astype(np.int64),
+        )
+
+    @staticmethod
+    def create_cost_edges(edges):
+        """
+        Creates the compiled cost, gradient, Hessian-vector product and fused cost
+        and gradient for an edge list generated by create_edge_list.
+        """
         K = 1
+        lcost_edges = kernels.get("lcost_edges")
+        lgrad_edges = kernels.get("lgrad_edges")
+        lhess_edges = kernels.get("lhess_edges")
+        lcost_and_grad_edges = kernels.get("lcost_and_grad_edges")
 
-        if jit:
+        def cost(Y):
+            return K * lcost_edges(Y, *edges)
 
-            def cost(Y):
-                return K * jcost(Y, D_goal, inds)
+        def egrad(Y):
+            return K * lgrad_edges(Y, *edges)
 
-            def egrad(Y):
-                return K * jgrad(Y, D_goal, inds)
+        def ehess(Y, v):
+            return K * lhess_edges(Y, v, *edges)
 
-            def ehess(Y, v):
-                return K * jhess(Y, v, D_goal, inds)
+        def cost_and_egrad(Y):
+            f, g = lcost_and_grad_edges(Y, *edges)
+            return K * f, K * g
 
-            return cost, egrad, ehess
+        return cost, egrad, ehess, cost_and_egrad
+
+    @staticmethod
+    def create_cost(D_goal, omega, jit=True, sparse=None):
+        """
+        :param sparse: evaluate the NumPy cost functions over the edge list with sparse
+        matrices, chosen from the density of omega if None
+        """
+        K = 1
+
+        edges = RiemannianSolver.create_edge_list(D_goal, omega, 0 * omega, 0 * omega)
+        if jit and kernels.available():
+            return RiemannianSolver.create_cost_edges(edges)[:3]
+
+        elif sparse or sparse is None and use_sparse(edges[0].shape[0], D_goal.shape[0]):
+            return create_cost_sparse(edges, D_goal.shape[0], K)[:3]
 
         else:
 
@@ -119,7 +188,11 @@ class RiemannianSolver:
             return cost, egrad, ehess
 
     @staticmethod
-    def create_cost_limits(D_goal, omega, psi_L, psi_U, jit=True):
+    def create_cost_limits(D_goal, omega, psi_L, psi_U, jit=True, sparse=None):
+        """
+        :param sparse: evaluate the NumPy cost functions over the edge list with sparse
+        matrices, chosen from the number of cost terms if None
+        """
         diff = psi_L!=psi_U
         # inds = np.nonzero(np.triu(omega) + np.triu(psi_L>0) + np.triu(psi_U>0))
         inds = np.nonzero(np.triu(omega) + np.triu( diff * (psi_L>0)) + np.triu(diff * (psi_U>0)) )
@@ -127,15 +200,12 @@ class RiemannianSolver:
         UU = diff*(psi_U>0)
         K = 1
 
-        if jit:
-            def cost(Y):
-                return K * lcost(Y, D_goal, omega, psi_L, psi_U, inds)
-
-            def egrad(Y):
-                return K * lgrad(Y, D_goal, omega, psi_L, psi_U, inds)
-
-            def ehess(Y, v):
-                return K * lhess(Y, v, D_goal, omega, psi_L, psi_U, inds)
+        if jit and kernels.available():
+            edges = RiemannianSolver.create_edge_list(D_goal, omega, psi_L, psi_U)
+            cost, egrad, ehess, _ = RiemannianSolver.create_cost_edges(edges)
+        elif sparse or sparse is None and use_sparse(inds[0].shape[0], D_goal.shape[0], True):
+            edges = RiemannianSolver.create_edge_list(D_goal, omega, psi_L, psi_U)
+            cost, egrad, ehess, _ = create_cost_sparse(edges, D_goal.shape[0], K)
         else:
             # NOTE not tested
             def cost(Y):
@@ -184,13 +254,37 @@ class RiemannianSolver:
         Y_init=None,
         jit = True,
         output_log=True,
+        distance_bounds=None,
+        deadline=None,
+        callback=None,
     ):
+        """
+        Solves the problem with squared goal distances D_goal on the edges in omega.
+
+        :param deadline: time.time() at which to stop and return the best iterate so far
+        :param callback: function of (Y, f(Y), iteration) called after every outer
+        iteration, returning True stops the solver, not supported by ConjugateGradient
+        :returns: dictionary with the solution x, cost f(x), time, gradnorm, iterations,
+        the largest squared distance limit violation and whether the solver converged,
+        or only the solution if output_log is False
+        """
         # Generate cost, gradient and hessian-vector product
+        cost_and_egrad = None
         if not use_limits:
             [psi_L, psi_U] = [0 * omega, 0 * omega]
+        else:
+            if distance_bounds is None:
+                distance_bounds = self.graph.distance_bound_matrices()
+            psi_L, psi_U = distance_bounds
+
+        edges = self.create_edge_list(D_goal, omega, psi_L, psi_U)
+        if jit and kernels.available():
+            cost, egrad, ehess, cost_and_egrad = self.create_cost_edges(edges)
+        elif use_sparse(edges[0].shape[0], self.N, use_limits):
+            cost, egrad, ehess, cost_and_egrad = create_cost_sparse(edges, self.N)
+        elif not use_limits:
             cost, egrad, ehess = self.create_cost(D_goal, omega, jit=jit)
         else:
-            psi_L, psi_U = self.graph.distance_bound_matrices()
             cost, egrad, ehess = self.create_cost_limits(D_goal, omega, psi_L, psi_U, jit=jit)
 
         # Generate initialization
@@ -199,36 +293,549 @@ class RiemannianSolver:
         elif Y_init is None:
             raise Exception("If not using bounds, provide an initialization!")
 
-        # Define manifold
-        manifold = PSDFixedRank(self.N, self.dim)  # define manifold
+        # Define manifold, of higher rank than dim for lifted initializations
+        manifold = PSDFixedRank(self.N, Y_init.shape[1])  # define manifold
         # manifold = Euclidean(self.N, self.dim)
 
         # Define problem
+        def hess(Y, Z):
+            # ehess returns a new array, so it is projected in place
+            HZ = ehess(Y, Z)
+            return manifold.proj_inplace(Y, HZ, HZ)
+
         problem = pymanopt.Problem(
-            manifold, cost=cost, egrad=egrad, ehess=ehess, verbosity=0
+            manifold, cost=cost, egrad=egrad, ehess=ehess, hess=hess, verbosity=0
         )
+        if cost_and_egrad is not None:
+            # fused evaluation used by TrustRegions at proposed iterates
+
+            def costgrad(Y):
+                f, g = cost_and_egrad(Y)
+                return f, manifold.egrad2rgrad(Y, g)
+
+            problem.costgrad = costgrad
+        # least-squares structure used by GaussNewton
+        problem.edges = edges
 
         # Solve problem
         if output_log:
             self.solver._logverbosity = 2
-            Y_sol, optlog = self.solver.solve(problem, x=Y_init)
-            return optlog["final_values"]
+            Y_sol, optlog = _run_solver(self.solver, problem, Y_init, deadline, callback)
+            return _final_values(self.solver, optlog, psi_L, psi_U)
         else:
-            Y_sol = self.solver.solve(problem, x=Y_init)
+            Y_sol = _run_solver(self.solver, problem, Y_init, deadline, callback)
             return Y_sol
 
-def solve_with_riemannian(graph, T_goal, use_jit=True):
+    def solve_lifted(
+        self,
+        D_goal,
+        omega,
+        rank=None,
+        use_limits=False,
+        bounds=None,
+        Y_init=None,
+        jit=True,
+        distance_bounds=None,
+        lifted_mingradnorm=1e-3,
+        lifted_maxiter=100,
+        deadline=None,
+        callback=None,
+    ):
+        """
+        Solves the problem on the manifold of PSD matrices of rank higher than dim,
+        where the cost has fewer spurious local minima, then reduces the solution to
+        rank dim with a truncated eigendecomposition and refines it with a second solve.
+
+        :param rank: rank of the lifted problem, defaults to dim + 1
+        :param Y_init: initial point configuration, padded with small random
+        coordinates up to the lifted rank
+        :param lifted_mingradnorm: gradient norm at which the lifted solve stops, it
+        only needs to reach the basin of a solution since the refinement converges fast
+        :param lifted_maxiter: maximum number of iterations of the lifted solve
+        :param deadline: time.time() at which to stop, see solve
+        :param callback: called after every outer iteration of both solves, see solve
+        :returns: final values of the refinement, with time the total time of all
+        stages, the lifted cost in "f(x) lifted" and the time of each stage in
+        "stage_times"
+        """
+        rank = self.dim + 1 if rank is None else rank
+        if not use_limits:
+            distance_bounds = [0 * omega, 0 * omega]
+        elif distance_bounds is None:
+            distance_bounds = self.graph.distance_bound_matrices()
+        times = {}
+
+        start = time.perf_counter()
+        if bounds is not None:
+            Y_init = self.generate_initialization(bounds, rank, omega, *distance_bounds)
+        elif Y_init is None:
+            raise Exception("If not using bounds, provide an initialization!")
+        Y_init = self.lift(Y_init, rank)
+        stopping = (self.solver._mingradnorm, self.solver._maxiter)
+        self.solver._mingradnorm = lifted_mingradnorm
+        self.solver._maxiter = lifted_maxiter
+        try:
+            lifted = self.solve(
+                D_goal,
+                omega,
+                use_limits=use_limits,
+                Y_init=Y_init,
+                jit=jit,
+                distance_bounds=distance_bounds,
+                deadline=deadline,
+                callback=callback,
+            )
+        finally:
+            self.solver._mingradnorm, self.solver._maxiter = stopping
+        times["lifted"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Y_trunc = self.truncate(lifted["x"], self.dim)
+        times["truncation"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sol = self.solve(
+            D_goal,
+            omega,
+            use_limits=use_limits,
+            Y_init=Y_trunc,
+            jit=jit,
+            distance_bounds=distance_bounds,
+            deadline=deadline,
+            callback=callback,
+        )
+        times["refinement"] = time.perf_counter() - start
+
+        sol["f(x) lifted"] = lifted["f(x)"]
+        sol["iterations"] = lifted["iterations"] + sol["iterations"]
+        sol["stage_times"] = times
+        sol["time"] = sum(times.values())
+        return sol
+
+    @staticmethod
+    def limit_violation(Y, psi_L, psi_U):
+        """
+        Largest violation of the squared distance limits by the point configuration Y,
+        where only nonzero and unequal bounds are limits, as in the cost.
+        """
+        D = distance_matrix_from_pos(Y)
+        diff = psi_L != psi_U
+        lower = np.where(diff & (psi_L > 0), psi_L - D, 0)
+        upper = np.where(diff & (psi_U > 0), D - psi_U, 0)
+        return max(lower.max(), upper.max(), 0.0)
+
+    @staticmethod
+    def lift(Y, rank, scale=1e-3):
+        """
+        Pads a point configuration with small random coordinates up to the given rank,
+        so the lifted point is full rank.
+        """
+        if Y.shape[1] >= rank:
+            return Y
+        pad = scale * np.random.randn(Y.shape[0], rank - Y.shape[1])
+        return np.hstack([Y, pad])
+
+    @staticmethod
+    def truncate(Y, dim):
+        """
+        Closest point configuration of dimension dim, in the sense of the Gram matrix,
+        to the centered configuration Y, from the eigendecomposition of Y^T Y.
+        """
+        Y = Y - Y.mean(axis=0)
+        if Y.shape[1] <= dim:
+            return Y
+        _, V = la.eigh(Y.T.dot(Y))
+        return Y.dot(V[:, ::-1][:, :dim])
+
+
+class RiemannianSession:
+    """
+    Solver state bound to a single problem graph, for solving many IK problems that only
+    differ in their goal distances. The manifold, the cost functions and the pymanopt
+    problem are created once, and the buffers of the cost terms are updated in place
+    when the goal changes.
+
+    :param graph: problem graph
+    :param params: parameters passed to RiemannianSolver
+    :param use_limits: include the distance limits of the graph in the cost
+    :param jit: use compiled cost functions
+    :param distance_bounds: squared distance limit matrices, taken from the graph if None
+    """
+
+    def __init__(
+        self,
+        graph: ProblemGraph,
+        params={},
+        use_limits=True,
+        jit=True,
+        distance_bounds=None,
+    ):
+        self.graph = graph
+        self.N = graph.number_of_nodes()
+        self.dim = graph.dim
+        self.jit = jit and kernels.available()
+
+        self.solver = RiemannianSolver(graph, params).solver
+        self.solver._logverbosity = 2
+
+        if not use_limits:
+            self.psi_L = np.zeros([self.N, self.N])
+            self.psi_U = np.zeros([self.N, self.N])
+        else:
+            if distance_bounds is None:
+                distance_bounds = graph.distance_bound_matrices()
+            self.psi_L, self.psi_U = distance_bounds
+        self.use_limits = use_limits
+
+        self.manifold = PSDFixedRank(self.N, self.dim)
+        self.problem = pymanopt.Problem(
+            self.manifold,
+            cost=self._cost,
+            egrad=self._egrad,
+            ehess=self._ehess,
+            grad=self._egrad,  # egrad2rgrad is the identity on PSDFixedRank
+            hess=self._hess,
+            verbosity=0,
+        )
+
+        self.omega = None
+        self._fns = None
+        self._flat = None
+        self._target = None
+        self._dense = False
+
+    def update_goal(self, D_goal, omega=None):
+        """
+        Sets the squared goal distances. If the sparsity pattern omega is unchanged
+        (or None), only the goal distances of the existing terms are updated.
+
+        :param D_goal: matrix of squared goal distances
+        :param omega: adjacency matrix of the known goal distances
+        """
+        if omega is not None and (self.omega is None or not np.array_equal(omega, self.omega)):
+            self.omega = omega
+            edges = RiemannianSolver.create_edge_list(D_goal, omega, self.psi_L, self.psi_U)
+            self._flat = edges[0] * self.N + edges[1]
+            self._target = edges[2]
+            self.problem.edges = edges
+            # edge list cost functions read the goal distances from self._target
+            self._dense = False
+            if self.jit:
+                self._fns = RiemannianSolver.create_cost_edges(edges)
+            elif use_sparse(edges[0].shape[0], self.N, self.use_limits):
+                self._fns = create_cost_sparse(edges, self.N)
+            else:
+                self._dense = True
+            self.problem.costgrad = None if self._dense else self._costgrad
+            if not self._dense:
+                return
+        elif self.omega is None:
+            raise ValueError("omega is required for the first goal.")
+        else:
+            np.take(D_goal, self._flat, out=self._target)
+            if not self._dense:
+                return
+
+        if self.use_limits:
+            self._fns = RiemannianSolver.create_cost_limits(
+                D_goal, self.omega, self.psi_L, self.psi_U, jit=False, sparse=False
+            ) + (None,)
+        else:
+            self._fns = RiemannianSolver.create_cost(
+                D_goal, self.omega, jit=False, sparse=False
+            ) + (None,)
+
+    def solve(self, Y_init=None, bounds=None, deadline=None, callback=None):
+        """
+        Solves the problem for the current goal.
+
+        :param Y_init: initial point configuration
+        :param bounds: lower and upper distance bounds used to generate an initialization
+        if Y_init is not given
+        :param deadline: time.time() at which to stop, see RiemannianSolver.solve
+        :param callback: called after every outer iteration, see RiemannianSolver.solve
+        :returns: dictionary with the solution x, cost f(x), time, gradnorm, iterations,
+        violation and converged
+        """
+        if self._fns is None:
+            raise RuntimeError("Call update_goal before solving.")
+        if Y_init is None:
+            if bounds is None:
+                raise Exception("If not using bounds, provide an initialization!")
+            Y_init = RiemannianSolver.generate_initialization(
+                bounds, self.dim, self.omega, self.psi_L, self.psi_U
+            )
+        Y_sol, optlog = _run_solver(self.solver, self.problem, Y_init, deadline, callback)
+        return _final_values(self.solver, optlog, self.psi_L, self.psi_U)
+
+    def _cost(self, Y):
+        return self._fns[0](Y)
+
+    def _egrad(self, Y):
+        return self._fns[1](Y)
+
+    def _ehess(self, Y, Z):
+        return self._fns[2](Y, Z)
+
+    def _hess(self, Y, Z):
+        HZ = self._fns[2](Y, Z)
+        return self.manifold.proj_inplace(Y, HZ, HZ)
+
+    def _costgrad(self, Y):
+        return self._fns[3](Y)
+
+
+def _run_solver(solver, problem, x, deadline=None, callback=None):
+    if isinstance(solver, (TrustRegions, GaussNewton)):
+        return solver.solve(problem, x=x, deadline=deadline, callback=callback)
+    if callback is not None:
+        raise ValueError("callback is only supported by TrustRegions and GaussNewton")
+    if deadline is None:
+        return solver.solve(problem, x=x)
+    maxtime = solver._maxtime
+    solver._maxtime = min(maxtime, max(deadline - time.time(), 0))
+    try:
+        return solver.solve(problem, x=x)
+    finally:
+        solver._maxtime = maxtime
+
+
+def _final_values(solver, optlog, psi_L, psi_U):
+    final = optlog["final_values"]
+    if "converged" not in final:
+        final["converged"] = final.get("gradnorm", np.inf) < solver._mingradnorm
+    final["violation"] = RiemannianSolver.limit_violation(final["x"], psi_L, psi_U)
+    return final
+
+
+def solve_with_riemannian(
+    graph,
+    T_goal,
+    use_jit=True,
+    rank=None,
+    params={},
+    seed_index=None,
+    result_cache=None,
+    screen=False,
+):
+    """
+    Solves the IK problem for a single end-effector goal pose.
+
+    :param rank: if larger than the graph dimension, the problem is first solved at
+    this rank and the solution truncated and refined, see RiemannianSolver.solve_lifted
+    :param params: parameters passed to RiemannianSolver, e.g. {"solver": "GaussNewton"}
+    :param seed_index: IKSeedIndex, if given the solve is first initialized with the
+    solution of the closest stored goal, and solutions are added to it
+    :param result_cache: IKResultCache, if given a stored solution of the same goal is
+    returned without solving, and solutions are added to it
+    :param screen: return no solution without solving if the goal fails prescreen
+    """
+    if result_cache is not None:
+        cached = result_cache.get(T_goal)
+        if cached is not None:
+            return cached
+    if screen and prescreen(graph, T_goal) is not None:
+        return None, None
+
     G = graph.from_pose(T_goal)
-    solver = RiemannianSolver(graph)
+    solver = RiemannianSolver(graph, params)
     D_goal = distance_matrix_from_graph(G)
     omega = adjacency_matrix_from_graph(G)
-    lb, ub = bound_smoothing(G)
-    sol_info = solver.solve(D_goal, omega, use_limits=True, bounds=(lb, ub), jit=use_jit)
-    G_sol = graph_from_pos(sol_info["x"], graph.node_ids)
-    q_sol = graph.joint_variables(G_sol, {f"p{graph.robot.n}": T_goal})
 
-    broken_limits = graph.check_distance_limits(graph.realization(q_sol), tol=1e-6)
-    if len(broken_limits) > 0:
+    def solve(Y_init=None):
+        bounds = None
+        if Y_init is None:
+            bounds = graph.bound_smoothing_cache.bounds(
+                graph._pose_goal({f"p{graph.robot.n}": T_goal})
+            )
+        if rank is not None and rank > graph.dim:
+            sol_info = solver.solve_lifted(
+                D_goal, omega, rank, use_limits=True, bounds=bounds, Y_init=Y_init,
+                jit=use_jit,
+            )
+        else:
+            sol_info = solver.solve(
+                D_goal, omega, use_limits=True, bounds=bounds, Y_init=Y_init, jit=use_jit
+            )
+        G_sol = graph_from_pos(sol_info["x"], graph.node_ids)
+        q_sol = graph.joint_variables(G_sol, {f"p{graph.robot.n}": T_goal})
+
+        broken_limits = graph.check_distance_limits(graph.realization(q_sol), tol=1e-6)
+        return sol_info, q_sol, len(broken_limits) == 0
+
+    success = False
+    if seed_index is not None:
+        Y_init = seed_index.Y_init(T_goal)
+        if Y_init is not None:
+            sol_info, q_sol, success = solve(Y_init)
+    if not success:
+        sol_info, q_sol, success = solve()
+
+    if not success:
         return None, None
-    else:
-        return q_sol, sol_info["x"]
+    if seed_index is not None:
+        seed_index.insert(T_goal, q_sol, sol_info["x"])
+    if result_cache is not None:
+        result_cache.put(T_goal, q_sol, sol_info["x"])
+    return q_sol, sol_info["x"]
+
+
+def solve_batch(graph, T_goals, use_jit=True, params={}):
+    """
+    Solves the IK problem for many end-effector goal poses, computing everything
+    that does not depend on the goal (solver, adjacency matrix, distance bound matrices,
+    the problem graph itself) only once. For each goal only the distances between the
+    end-effector anchors and the other nodes with known positions are updated.
+
+    :param graph: problem graph
+    :param T_goals: sequence of end-effector goal poses
+    :param use_jit: use compiled cost functions
+    :param params: parameters passed to RiemannianSolver
+    :returns: array of joint configurations (one row per goal, columns ordered as robot.joint_ids),
+    array of point configurations and a dictionary of per-goal status arrays, the rows
+    of goals without a solution are NaN
+    """
+    stream = solve_trajectory_stream(graph, T_goals, use_jit, params, warm_start=False)
+    Q, Y, status = _stack_results(graph, stream)
+    return Q, Y, {key: status[key] for key in ["success", "f(x)", "iterations", "time"]}
+
+
+def solve_trajectory(graph, T_goals, use_jit=True, params={}):
+    """
+    Solves the IK problem along a path of end-effector goal poses. Each solve is
+    initialized with the solution of the previous waypoint, moved to the new goal,
+    and only falls back to a random initialization within the distance bounds
+    if the warm-started solve fails.
+
+    :param graph: problem graph
+    :param T_goals: sequence of end-effector goal poses along the path
+    :param use_jit: use compiled cost functions
+    :param params: parameters passed to RiemannianSolver, cost_tol sets the largest
+    cost accepted from a warm-started solve
+    :returns: array of joint configurations (one row per goal, columns ordered as robot.joint_ids),
+    array of point configurations, both NaN for goals without a solution, and a
+    dictionary of per-goal status arrays, including the wall-clock latency of each waypoint, whether a warm-started solve was attempted
+    and whether its solution was used. Iterations and time include both solves.
+    """
+    stream = solve_trajectory_stream(graph, T_goals, use_jit, params)
+    return _stack_results(graph, stream)
+
+
+def solve_trajectory_stream(graph, T_goals, use_jit=True, params={}, warm_start=True):
+    """
+    Generator version of solve_trajectory that accepts goals as they arrive.
+
+    :param graph: problem graph
+    :param T_goals: iterable of end-effector goal poses
+    :param use_jit: use compiled cost functions
+    :param params: parameters passed to RiemannianSolver
+    :param warm_start: initialize each solve with the previous solution
+    :returns: generator of (q_sol, Y_sol, stats) for every goal, where stats contains
+    success, f(x), iterations, time, latency, warm_attempted and warm_success
+    """
+    T_goals = iter(T_goals)
+    try:
+        T_first = next(T_goals)
+    except StopIteration:
+        return
+
+    robot = graph.robot
+    ee = f"p{robot.n}"
+    ids = graph.node_ids
+    index = {node: idx for idx, node in enumerate(ids)}
+    cost_tol = params.get("cost_tol", 1e-6)
+
+    # Goal-independent problem data
+    session = RiemannianSession(graph, params, jit=use_jit)
+    G = graph.from_pose({ee: T_first})
+    D_goal = distance_matrix_from_graph(G)
+    omega = adjacency_matrix_from_graph(G)
+
+    # Edges between anchors and other known positions, these change with the goal
+    anchors = graph._pose_goal({ee: T_first})
+    anchor_ids = [index[node] for node in anchors]
+    pos = nx.get_node_attributes(G, POS)
+    known = nx.get_edge_attributes(graph, DIST)
+    patched = [
+        (u, v, index[u], index[v])
+        for u, v in G.edges()
+        if (u in anchors or v in anchors)
+        and (u in pos and v in pos)
+        and not ((u, v) in known or (v, u) in known)
+    ]
+
+    def solve(T_goal, **kwargs):
+        sol_info = session.solve(**kwargs)
+        G_sol = graph_from_pos(sol_info["x"], ids)
+        q_sol = graph.joint_variables(G_sol, {ee: T_goal})
+        broken_limits = graph.check_distance_limits(graph.realization(q_sol), tol=1e-6)
+        return sol_info, q_sol, len(broken_limits) == 0
+
+    Y_prev = None
+    for T_goal in itertools.chain([T_first], T_goals):
+        start = time.perf_counter()
+        goal_pos = graph._pose_goal({ee: T_goal})
+        pos.update(goal_pos)
+        for u, v, udx, vdx in patched:
+            d = la.norm(pos[u] - pos[v])
+            D_goal[udx, vdx] = d ** 2
+            D_goal[vdx, udx] = d ** 2
+        session.update_goal(D_goal, omega)
+
+        iterations, elapsed = 0, 0
+        warm_attempted = warm_start and Y_prev is not None
+        warm_success = False
+        if warm_attempted:
+            Y_init = Y_prev.copy()
+            Y_init[anchor_ids] = [goal_pos[node] for node in anchors]
+            sol_info, q_sol, success = solve(T_goal, Y_init=Y_init)
+            iterations += sol_info["iterations"]
+            elapsed += sol_info["time"]
+            warm_success = success and sol_info["f(x)"] < cost_tol
+        if not warm_success:
+            bounds = graph.bound_smoothing_cache.bounds(goal_pos)
+            sol_info, q_sol, success = solve(T_goal, bounds=bounds)
+            iterations += sol_info["iterations"]
+            elapsed += sol_info["time"]
+
+        # Next solve starts from the realization of this solution, in the world frame
+        Y_prev = graph.realization_array(q_sol) if success else None
+
+        stats = {
+            "success": success,
+            "f(x)": sol_info["f(x)"],
+            "iterations": iterations,
+            "time": elapsed,
+            "latency": time.perf_counter() - start,
+            "warm_attempted": warm_attempted,
+            "warm_success": warm_success,
+        }
+        yield q_sol, sol_info["x"], stats
+
+
+def _stack_results(graph, stream):
+    # Collects the results of solve_trajectory_stream into arrays, with NaN rows for
+    # goals without a solution
+    joints = [node for node in graph.robot.joint_ids if node != ROOT]
+    Q, Y, stats = [], [], []
+    for q_sol, Y_sol, info in stream:
+        if info["success"]:
+            Q += [[q_sol[node] for node in joints]]
+            Y += [Y_sol]
+        else:
+            Q += [np.full(len(joints), np.nan)]
+            Y += [np.full(Y_sol.shape, np.nan)]
+        stats += [info]
+
+    Q = np.array(Q).reshape(-1, len(joints))
+    Y = np.array(Y).reshape(-1, graph.number_of_nodes(), graph.dim)
+    status = {
+        "success": np.array([info["success"] for info in stats], dtype=bool),
+        "f(x)": np.array([info["f(x)"] for info in stats], dtype=float),
+        "iterations": np.array([info["iterations"] for info in stats], dtype=int),
+        "time": np.array([info["time"] for info in stats], dtype=float),
+        "latency": np.array([info["latency"] for info in stats], dtype=float),
+        "warm_attempted": np.array([info["warm_attempted"] for info in stats], dtype=bool),
+        "warm_success": np.array([info["warm_success"] for info in stats], dtype=bool),
+    }
+    return Q, Y, status
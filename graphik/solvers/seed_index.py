@@ -0,0 +1,248 @@
+"""
+Database of solved IK problems answering nearest-pose queries, used to warm start
+the solvers on goals close to ones that have been solved before.
+
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from graphik.utils.constants import ROOT
+
+_ARRAYS = ["embedding", "T", "Q", "Y", "last_used"]
+
+
+def pose_embedding(T: np.ndarray, rotation_scale: float = 0.5) -> np.ndarray:
+    """
+    Embeds poses in R^12 so that Euclidean distances approximate an SE(3) metric.
+    The rotation part is the rotation matrix scaled by rotation_scale / sqrt(2), since
+    ||R_1 - R_2||_F = 2 sqrt(2) sin(theta / 2) ~ sqrt(2) theta for a relative rotation
+    by a small angle theta.
+
+    :param T: 4 x 4 pose or n x 4 x 4 array of poses
+    :param rotation_scale: length in metres equivalent to a rotation of one radian
+    :returns: embedding of the pose or n x 12 array of embeddings
+    """
+    T = np.asarray(T, dtype=float)
+    rot = T[..., :3, :3].reshape(T.shape[:-2] + (9,)) * (rotation_scale / np.sqrt(2))
+    return np.concatenate([T[..., :3, 3], rot], axis=-1)
+
+
+def _as_matrix(T_goal) -> np.ndarray:
+    return T_goal.as_matrix() if hasattr(T_goal, "as_matrix") else np.asarray(T_goal)
+
+
+class IKSeedIndex:
+    """
+    Fixed-capacity store of solved (T_goal, q_sol, Y_sol) triples, queried by
+    end-effector pose with a KD-tree over pose_embedding. Entries inserted or replaced
+    since the tree was last built are searched linearly until there are enough of them
+    to rebuild it. When full, an insert replaces the least recently used entry.
+
+    :param joints: names of the joint variables, in the order of the stored q_sol
+    :param num_points: number of points in the stored point configurations
+    :param dim: dimension of the point configurations
+    :param capacity: largest number of stored entries
+    :param rotation_scale: length in metres equivalent to a rotation of one radian
+    """
+
+    def __init__(
+        self,
+        joints: List[str],
+        num_points: int,
+        dim: int = 3,
+        capacity: int = 10000,
+        rotation_scale: float = 0.5,
+    ):
+        self.joints = list(joints)
+        self.capacity = capacity
+        self.rotation_scale = rotation_scale
+        self.size = 0
+        self._clock = 0
+
+        self.embedding = np.zeros((capacity, 12))
+        self.T = np.zeros((capacity, 4, 4))
+        self.Q = np.zeros((capacity, len(self.joints)))
+        self.Y = np.zeros((capacity, num_points, dim))
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+
+        self._tree = None
+        self._indexed = 0  # entries before this one are in the tree
+        self._replaced = set()  # entries in the tree replaced since it was built
+        self._replaced_inds = np.zeros(capacity, dtype=int)
+
+    @classmethod
+    def for_graph(cls, graph, **kwargs) -> "IKSeedIndex":
+        """
+        :param graph: problem graph of the solved problems
+        :param kwargs: passed to IKSeedIndex
+        """
+        joints = [node for node in graph.robot.joint_ids if node != ROOT]
+        return cls(joints, graph.number_of_nodes(), graph.dim, **kwargs)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def insert(self, T_goal, q_sol: Dict[str, float], Y_sol: np.ndarray) -> int:
+        """
+        Stores a solved problem, replacing the least recently used one if full.
+
+        :param T_goal: end-effector goal pose, SE3 or 4 x 4 matrix
+        :param q_sol: dictionary of joint variables
+        :param Y_sol: point configuration
+        :returns: index of the entry, or None if the capacity is zero, as for a memory
+        mapped index loaded from an empty save
+        """
+        if self.capacity == 0:
+            return None
+        if self.size < self.capacity:
+            idx = self.size
+            self.size += 1
+        else:
+            idx = int(np.argmin(self.last_used))
+
+        self.T[idx] = _as_matrix(T_goal)
+        self.embedding[idx] = pose_embedding(self.T[idx], self.rotation_scale)
+        self.Q[idx] = [q_sol[node] for node in self.joints]
+        self.Y[idx] = Y_sol
+        self._touch(idx)
+
+        if idx < self._indexed and idx not in self._replaced:
+            self._replaced_inds[len(self._replaced)] = idx
+            self._replaced.add(idx)
+        if self.size - self._indexed + len(self._replaced) > max(256, self.size // 32):
+            self._build()
+        return idx
+
+    def query(self, T_goal, k: int = 1, max_distance: float = np.inf) -> Tuple:
+        """
+        Finds the stored entries with the closest end-effector poses.
+
+        :param T_goal: end-effector goal pose, SE3 or 4 x 4 matrix
+        :param k: number of entries
+        :param max_distance: largest distance in the embedding
+        :returns: arrays of at most k entry indices and their distances, closest first
+        """
+        if self.size == 0:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        x = pose_embedding(_as_matrix(T_goal), self.rotation_scale)
+
+        inds, dists = [], []
+        kt = k
+        while self._tree is not None:
+            # more neighbours are needed if some of them have been replaced
+            kt = min(kt, self._tree.n)
+            d, i = self._tree.query(x, k=kt, distance_upper_bound=max_distance)
+            d, i = np.atleast_1d(d), np.atleast_1d(i)
+            keep = np.isfinite(d)
+            if self._replaced:
+                keep[keep] = [idx not in self._replaced for idx in i[keep]]
+            if np.sum(keep) >= k or not np.all(np.isfinite(d)) or kt == self._tree.n:
+                inds += [i[keep]]
+                dists += [d[keep]]
+                break
+            kt *= 2
+
+        # entries that are not (correctly) in the tree
+        p = np.arange(self._indexed, self.size)
+        if self._replaced:
+            p = np.concatenate([p, self._replaced_inds[: len(self._replaced)]])
+        diff = self.embedding[p] - x
+        d = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        if d.shape[0] > k:
+            sel = np.argpartition(d, k)[:k]
+            p, d = p[sel], d[sel]
+        inds += [p[d <= max_distance]]
+        dists += [d[d <= max_distance]]
+
+        inds, dists = np.concatenate(inds), np.concatenate(dists)
+        order = np.argsort(dists, kind="stable")[:k]
+        for idx in inds[order]:
+            self._touch(idx)
+        return inds[order], dists[order]
+
+    def Y_init(self, T_goal, max_distance: float = np.inf) -> np.ndarray:
+        """
+        :returns: point configuration of the closest stored entry, to be passed as
+        Y_init to RiemannianSolver.solve, or None if there is none within max_distance
+        """
+        inds, _ = self.query(T_goal, 1, max_distance)
+        return self.Y[inds[0]].copy() if len(inds) else None
+
+    def q0(self, T_goal, max_distance: float = np.inf) -> Dict[str, float]:
+        """
+        :returns: dictionary of joint variables of the closest stored entry, to be
+        passed as q0 to LocalSolver.solve, or None if there is none within max_distance
+        """
+        inds, _ = self.query(T_goal, 1, max_distance)
+        return dict(zip(self.joints, self.Q[inds[0]])) if len(inds) else None
+
+    def save(self, path: str):
+        """
+        Writes the index to a directory of .npy files, which load maps into memory.
+
+        :param path: directory, created if needed
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, name + ".npy"), getattr(self, name)[: self.size])
+        meta = {
+            "joints": self.joints,
+            "capacity": self.capacity,
+            "rotation_scale": self.rotation_scale,
+            "size": self.size,
+            "clock": self._clock,
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = "c") -> "IKSeedIndex":
+        """
+        Reads an index written by save. With the default copy-on-write mapping the
+        pages are shared by all processes that load the same index, and inserts stay
+        private to the process. A memory mapped index holds only the saved entries, so
+        its capacity is the number of saved entries.
+
+        :param path: directory written by save
+        :param mmap_mode: passed to numpy.load, None reads the arrays into memory with
+        the saved capacity
+        """
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+            for name in _ARRAYS
+        }
+        size = meta["size"]
+        num_points, dim = arrays["Y"].shape[1:]
+        capacity = meta["capacity"] if mmap_mode is None else size
+
+        index = cls(meta["joints"], num_points, dim, 0, meta["rotation_scale"])
+        index.capacity = capacity
+        index._replaced_inds = np.zeros(capacity, dtype=int)
+        if mmap_mode is None:
+            for name, arr in arrays.items():
+                full = np.zeros((capacity,) + arr.shape[1:], dtype=arr.dtype)
+                full[:size] = arr
+                setattr(index, name, full)
+        else:
+            for name, arr in arrays.items():
+                setattr(index, name, arr)
+        index.size = size
+        index._clock = meta["clock"]
+        if size:
+            index._build()
+        return index
+
+    def _touch(self, idx: int):
+        self._clock += 1
+        self.last_used[idx] = self._clock
+
+    def _build(self):
+        self._tree = cKDTree(self.embedding[: self.size])
+        self._indexed = self.size
+        self._replaced.clear()
@@ -119,7 +119,17 @@ class TrustRegions(Solver):
         Delta_bar=None,
         Delta0=None,
         mincost=1e-12,
+        deadline=None,
+        callback=None,
     ):
+        """
+        Solves the problem starting from x, or a random point if x is None.
+
+        :param deadline: time.time() at which to stop and return the current iterate,
+        the accepted iterate with the lowest cost so far
+        :param callback: function of (x, f(x), iteration) called after every outer
+        iteration with a copy of the iterate, returning True stops the solver
+        """
         man = problem.manifold
         verbosity = problem.verbosity
 
@@ -140,14 +150,25 @@ class TrustRegions(Solver):
         cost = problem.cost
         grad = problem.grad
         hess = problem.hess
+        # Fused cost and gradient, if the problem provides one
+        costgrad = getattr(problem, "costgrad", None)
         norm = man.norm
         inner = man.inner
         retr = man.retr
+        # In-place retraction, if the manifold provides one
+        retr_inplace = getattr(man, "retr_inplace", None)
 
         # If no starting point is specified, generate one at random.
         if x is None:
             x = man.rand()
 
+        # Work arrays reused by every iteration. With an in-place retraction the
+        # iterate and the proposal swap buffers, starting from a copy of x.
+        work = self._allocate_work(x)
+        if retr_inplace is not None:
+            x = np.array(x, dtype=float)
+            x_prop = np.empty_like(x)
+
         # Initializations
         time0 = time.time()
 
@@ -156,8 +177,11 @@ class TrustRegions(Solver):
         k = 0
 
         # Initialize solution and companion measures: f(x), fgrad(x)
-        fx = cost(x)
-        fgradx = grad(x)
+        if costgrad is None:
+            fx = cost(x)
+            fgradx = grad(x)
+        else:
+            fx, fgradx = costgrad(x)
         norm_grad = man.norm(x, fgradx)
 
         # Initialize the trust region radius
@@ -184,7 +208,8 @@ class TrustRegions(Solver):
             # Determine eta0
             if not self.use_rand:
                 # Pick the zero vector
-                eta = man.zerovec(x)
+                eta = work["eta"]
+                eta.fill(0)
             else:
                 # Random vector in T_x M (this has to be very small)
                 eta = 1e-6 * man.randvec(x)
@@ -203,6 +228,8 @@ class TrustRegions(Solver):
                 self.kappa,
                 mininner,
                 maxinner,
+                work,
+                deadline,
             )
 
             srstr = self.TCG_STOP_REASONS[stop_inner]
@@ -245,10 +272,17 @@ class TrustRegions(Solver):
             # norm_eta = man.norm(x, eta)
 
             # Compute the tentative next iterate (the proposal)
-            x_prop = retr(x, eta)
+            if retr_inplace is None:
+                x_prop = retr(x, eta)
+            else:
+                retr_inplace(x, eta, x_prop)
 
-            # Compute the function value of the proposal
-            fx_prop = cost(x_prop)
+            # Compute the function value of the proposal, along with the gradient
+            # if both can be evaluated at once
+            if costgrad is None:
+                fx_prop = cost(x_prop)
+            else:
+                fx_prop, fgrad_prop = costgrad(x_prop)
 
             # Will we accept the proposal or not? Check the performance of the
             # quadratic model against the actual cost.
@@ -382,9 +416,9 @@ class TrustRegions(Solver):
             if model_decreased and rho > self.rho_prime:
                 # accept = True
                 accstr = "acc"
-                x = x_prop
+                x, x_prop = x_prop, x
                 fx = fx_prop
-                fgradx = grad(x)
+                fgradx = grad(x) if costgrad is None else fgrad_prop
                 norm_grad = norm(x, fgradx)
             else:
                 # accept = False
@@ -414,6 +448,11 @@ class TrustRegions(Solver):
             stop_reason = self._check_stopping_criterion(
                 time0, gradnorm=norm_grad, iter=k
             )
+            if not stop_reason and deadline is not None and time.time() >= deadline:
+                stop_reason = "Terminated - deadline reached after %d iterations." % k
+            # x is a reused buffer, the callback gets a copy it can keep
+            if not stop_reason and callback is not None and callback(x.copy(), fx, k):
+                stop_reason = "Terminated - stopped by callback after %d iterations." % k
 
             if stop_reason:
                 if verbosity >= 1:
@@ -431,24 +470,57 @@ class TrustRegions(Solver):
             return x
         else:
             self._stop_optlog(x, fx, stop_reason, time0, gradnorm=norm_grad, iter=k)
+            self._optlog["final_values"]["converged"] = norm_grad < self._mingradnorm
             return x, self._optlog
 
+    @staticmethod
+    def _allocate_work(x):
+        """
+        Allocates the tangent vectors used by the tCG inner loop.
+
+        :param x: point on the manifold, tangent vectors are arrays of the same shape
+        :returns: dictionary of work arrays
+        """
+        names = ["eta", "Heta", "new_eta", "new_Heta", "r", "delta", "tmp"]
+        return {name: np.empty(np.shape(x)) for name in names}
+
     def _truncated_conjugate_gradient(
-        self, problem, x, fgradx, eta, Delta, theta, kappa, mininner, maxinner
+        self,
+        problem,
+        x,
+        fgradx,
+        eta,
+        Delta,
+        theta,
+        kappa,
+        mininner,
+        maxinner,
+        work=None,
+        deadline=None,
     ):
         man = problem.manifold
         inner = man.inner
         hess = problem.hess
         precon = problem.precon
 
+        # All updates are written into the work arrays, eta and Heta swap buffers
+        # with new_eta and new_Heta when a step is accepted.
+        if work is None:
+            work = self._allocate_work(x)
+        if eta is not work["eta"]:
+            np.copyto(work["eta"], eta)
+        eta, Heta = work["eta"], work["Heta"]
+        new_eta, new_Heta = work["new_eta"], work["new_Heta"]
+        r, delta, tmp = work["r"], work["delta"], work["tmp"]
+
         if not self.use_rand:  # and therefore, eta == 0
-            Heta = man.zerovec(x)
-            r = fgradx
+            Heta.fill(0)
+            np.copyto(r, fgradx)
             e_Pe = 0
         else:  # and therefore, no preconditioner
             # eta (presumably) ~= 0 was provided by the caller.
-            Heta = hess(x, eta)
-            r = fgradx + Heta
+            np.copyto(Heta, hess(x, eta))
+            np.add(fgradx, Heta, out=r)
             e_Pe = inner(x, eta, eta)
 
         r_r = inner(x, r, r)
@@ -466,7 +538,7 @@ class TrustRegions(Solver):
         d_Pd = z_r
 
         # Initial search direction
-        delta = -z
+        np.negative(z, out=delta)
         if not self.use_rand:
             e_Pd = 0
         else:
@@ -493,6 +565,9 @@ class TrustRegions(Solver):
         # Begin inner/tCG loop.
         # for j in xrange(0, int(maxinner)):
         for j in range(int(maxinner)):
+            if deadline is not None and time.time() >= deadline:
+                break  # eta is the best step so far
+
             # This call is the computationally intensive step
             Hdelta = hess(x, delta)
 
@@ -513,12 +588,12 @@ class TrustRegions(Solver):
                 #  dd = <delta,delta>_prec,x
                 tau = (-e_Pd + np.sqrt(e_Pd * e_Pd + d_Pd * (Delta ** 2 - e_Pe))) / d_Pd
 
-                eta = eta + tau * delta
+                np.add(eta, np.multiply(tau, delta, out=tmp), out=eta)
 
                 # If only a nonlinear Hessian approximation is available, this
                 # is only approximately correct, but saves an additional
                 # Hessian call.
-                Heta = Heta + tau * Hdelta
+                np.add(Heta, np.multiply(tau, Hdelta, out=tmp), out=Heta)
 
                 # Technically, we may want to verify that this new eta is
                 # indeed better than the previous eta before returning it (this
@@ -535,11 +610,11 @@ class TrustRegions(Solver):
                 break
             # No negative curvature and eta_prop inside TR: accept it.
             e_Pe = e_Pe_new
-            new_eta = eta + alpha * delta
+            np.add(eta, np.multiply(alpha, delta, out=tmp), out=new_eta)
 
             # If only a nonlinear Hessian approximation is available, this is
             # only approximately correct, but saves an additional Hessian call.
-            new_Heta = Heta + alpha * Hdelta
+            np.add(Heta, np.multiply(alpha, Hdelta, out=tmp), out=new_Heta)
 
             # Verify that the model cost decreased in going from eta to
             # new_eta. If it did not (which can only occur if the Hessian
@@ -553,12 +628,12 @@ class TrustRegions(Solver):
                 stop_tCG = self.MODEL_INCREASED
                 break
 
-            eta = new_eta
-            Heta = new_Heta
+            eta, new_eta = new_eta, eta
+            Heta, new_Heta = new_Heta, Heta
             model_value = new_model_value
 
             # Update the residual.
-            r = r + alpha * Hdelta
+            np.add(r, np.multiply(alpha, Hdelta, out=tmp), out=r)
 
             # Compute new norm of r.
             r_r = inner(x, r, r)
@@ -590,7 +665,8 @@ class TrustRegions(Solver):
 
             # Compute new search direction
             beta = z_r / zold_rold
-            delta = -z + beta * delta
+            # -z + beta * delta
+            np.subtract(np.multiply(beta, delta, out=delta), z, out=delta)
 
             # Update new P-norms and P-dots [CGT2000, eq. 7.5.6 & 7.5.7].
             e_Pd = beta * (e_Pd + alpha * d_Pd)
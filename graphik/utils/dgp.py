@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 from typing import List
 import numpy as np
+import numpy.linalg as la
 import networkx as nx
-import math
+import scipy.linalg as sla
+from scipy.sparse.csgraph import csgraph_from_dense, dijkstra, shortest_path
 from numpy.typing import ArrayLike
 from graphik.utils.constants import *
 from graphik.utils.geometry import best_fit_transform
 
+# below this size a full eigendecomposition is as fast as computing a few eigenpairs
+PARTIAL_EIGH_MIN_SIZE = 64
+
 
 def orthogonal_procrustes(G1: nx.DiGraph, G2: nx.DiGraph) -> nx.DiGraph:
     """
@@ -26,9 +31,9 @@ def orthogonal_procrustes(G1: nx.DiGraph, G2: nx.DiGraph) -> nx.DiGraph:
 
 
 def gram_from_distance_matrix(D: ArrayLike) -> ArrayLike:
-    J = np.identity(D.shape[0]) - (1 / (D.shape[0])) * np.ones(D.shape)
-    G = -0.5 * J @ D @ J  # Gram matrix
-    return G
+    # double centering -0.5 * J @ D @ J with J = I - 1/n, without the matrix products
+    G = -0.5 * (D - D.mean(axis=0) - D.mean(axis=1)[:, np.newaxis] + D.mean())
+    return G  # Gram matrix
 
 
 def distance_matrix_from_gram(X: ArrayLike) -> ArrayLike:
@@ -147,37 +152,47 @@ def graph_complete_edges(G: nx.DiGraph, overwrite=False) -> nx.DiGraph:
     return G
 
 
-def factor(A: ArrayLike):
+def factor(A: ArrayLike, k: int = None) -> ArrayLike:
+    """
+    Factors the closest positive semidefinite matrix to A as X X^T.
+
+    :param A: symmetric n x n matrix
+    :param k: number of leading eigenpairs to compute, all if None
+    :returns: n x k matrix X with columns ordered by decreasing eigenvalue
+    """
     n = A.shape[0]
-    (evals, evecs) = np.linalg.eigh(A)
-    evals[evals < 0] = 0  # closest SDP matrix
-    X = evecs  # np.transpose(evecs)
-    sqrootdiag = np.eye(n)
-    for i in range(n):
-        sqrootdiag[i, i] = math.sqrt(evals[i])
-    X = X.dot(sqrootdiag)
+    k = n if k is None else min(k, n)
+    if k < n and n > PARTIAL_EIGH_MIN_SIZE:
+        evals, evecs = sla.eigh(A, subset_by_index=[n - k, n - 1])
+    else:
+        evals, evecs = la.eigh(A)
+        evals, evecs = evals[n - k :], evecs[:, n - k :]
+    X = evecs * np.sqrt(np.maximum(evals, 0))  # closest SDP matrix
     return np.fliplr(X)
 
 
 ## perform classic Multidimensional scaling
-def MDS(B: ArrayLike, eps: float = 1e-5):
-    n = B.shape[0]
-    x = factor(B)
-    (evals, evecs) = np.linalg.eigh(x)
-    K = len(evals[evals > eps])
-    if K < n:
-        # only first K columns
-        x = x[:, 0:K]
-    return x
+def MDS(B: ArrayLike, eps: float = 1e-5, k: int = None) -> ArrayLike:
+    """
+    :param B: Gram matrix
+    :param eps: eigenvalues of B below eps are dropped
+    :param k: largest number of dimensions of the embedding, all if None
+    :returns: points with Gram matrix closest to B, one per row
+    """
+    x = factor(B, k)
+    # squared column norms are the eigenvalues of B
+    K = np.count_nonzero(np.einsum("ij,ij->j", x, x) > eps)
+    return x[:, :K]
 
 
 def linear_projection(P: ArrayLike, F: ArrayLike, dim):
-    S = 0
+    """
+    Projects the points P onto the dim-dimensional subspace that best preserves the
+    differences of the pairs of points in the sparsity pattern F.
+    """
     I = np.nonzero(F)
-    for kdx in range(len(I[0])):
-        idx = I[0][kdx]
-        jdx = I[1][kdx]
-        S += np.outer(P[idx, :] - P[jdx, :], P[idx, :] - P[jdx, :])
+    diff = P[I[0]] - P[I[1]]
+    S = diff.T @ diff  # scatter matrix of the differences
 
     eigval, eigvec = np.linalg.eigh(S)
     return P @ np.fliplr(eigvec)[:, :dim]
@@ -189,47 +204,154 @@ def sample_matrix(lower_limit, upper_limit):
     return lower_limit + np.random.rand(m, n) * (upper_limit - lower_limit)
 
 
-def bound_smoothing(G: nx.DiGraph) -> tuple:
+def bound_smoothing(G: nx.DiGraph, node_ids: List = None) -> tuple:
     """
     Given a graph with some edges containing upper and lower bounds on distance,
     calculates approximation on lower and upper bounds on all distance matrix elements.
     Distances known exactly correspond to equal lower and upper limits.
 
     "Distance Geometry Theory, Algorithms and Chemical Applications", Havel, 2002.
+
+    :param G: graph with LOWER and UPPER attributes on edges
+    :param node_ids: order of nodes in the returned matrices, defaults to list(G)
+    :returns: matrices of lower and upper distance bounds
     """
+    if node_ids is None:
+        node_ids = list(G)
+    node_index = {node: idx for idx, node in enumerate(node_ids)}
+
+    U, L = _bound_matrices(G, node_index)
+
+    # Upper bounds are shortest paths with edge weights given by the upper limits
+    upper_bounds = shortest_path(csgraph_from_dense(U, null_value=np.inf), directed=False)
 
-    # Generate bipartite graph from two copies of G
-    H = nx.DiGraph()
-
-    for u, v, d in G.edges(data=True):
-        H.add_edge(u, f"{u}s", weight=0)
-        H.add_edge(v, f"{v}s", weight=0)
-        H.add_edge(u, f"{v}s", weight=-G[u][v][LOWER])
-        H.add_edge(v, f"{u}s", weight=-G[u][v][LOWER])
-        H.add_edge(u, v, weight=G[u][v][UPPER])
-        H.add_edge(v, u, weight=G[u][v][UPPER])
-        H.add_edge(f"{u}s", f"{v}s", weight=G[u][v][UPPER])
-        H.add_edge(f"{v}s", f"{u}s", weight=G[u][v][UPPER])
-
-    # Find all shortest paths in bipirtatie graph
-    bounds = dict(nx.all_pairs_bellman_ford_path_length(H, weight=DIST))
-
-    N = len(G)
-    lower_bounds = np.zeros([N, N])
-    upper_bounds = np.zeros([N, N])
-
-    ids = list(G.nodes())
-    for u in G:
-        for v in G:
-            if bounds[u][v + "s"] < 0:
-                lower_bounds[ids.index(u), ids.index(v)] = -bounds[u][v + "s"]
-            else:
-                lower_bounds[ids.index(u), ids.index(v)] = 0
-                # lower_bounds[ids.index(u), ids.index(v)] = bounds[u][f"{v}s"]
-            upper_bounds[ids.index(u), ids.index(v)] = bounds[u][v]
+    # Lower bounds are the largest L[w,x] - U[u,w] - U[x,v] over all edges (w,x),
+    # evaluated as two min-plus products with the negated lower limits
+    B = min_plus(min_plus(upper_bounds, L), upper_bounds)
+    lower_bounds = np.maximum(-B, 0)
 
     return lower_bounds, upper_bounds
 
+
+def min_plus(A: ArrayLike, B: ArrayLike) -> ArrayLike:
+    """
+    Min-plus (tropical) matrix product, C[i,j] = min_k A[i,k] + B[k,j].
+    """
+    C = np.full((A.shape[0], B.shape[1]), np.inf)
+    for k in range(A.shape[1]):
+        np.minimum(C, A[:, k, np.newaxis] + B[np.newaxis, k, :], out=C)
+    return C
+
+
+def _bound_matrices(G: nx.DiGraph, node_index: dict) -> tuple:
+    # Edge weight matrices of upper limits and negated lower limits, inf for non-edges
+    N = len(node_index)
+    edges = list(G.edges(data=True))
+    udx = np.array([node_index[u] for u, _, _ in edges], dtype=int)
+    vdx = np.array([node_index[v] for _, v, _ in edges], dtype=int)
+    lower = np.array([d[LOWER] for _, _, d in edges], dtype=float)
+    upper = np.array([d[UPPER] for _, _, d in edges], dtype=float)
+
+    U = np.full((N, N), np.inf)
+    np.fill_diagonal(U, 0)
+    L = np.full((N, N), np.inf)
+    for ij in [(udx, vdx), (vdx, udx)]:
+        np.minimum.at(U, ij, upper)
+        np.minimum.at(L, ij, -lower)
+    return U, L
+
+
+class BoundSmoothingCache:
+    """
+    Bound smoothing for a fixed problem graph whose only changes between queries are
+    new nodes with known positions (e.g., end-effector goals). The shortest paths of
+    the graph are computed once, and each query only propagates the exact distances
+    between the new nodes and the other nodes with known positions.
+    Gives the same bounds as bound_smoothing on the graph returned by from_pos.
+
+    :param G: graph with LOWER and UPPER attributes on edges
+    :param node_ids: order of nodes in the returned matrices, defaults to list(G)
+    """
+
+    def __init__(self, G: nx.DiGraph, node_ids: List = None):
+        if node_ids is None:
+            node_ids = list(G)
+        self.node_ids = node_ids
+        self.node_index = {node: idx for idx, node in enumerate(node_ids)}
+
+        N = len(node_ids)
+        self.U, self.L = _bound_matrices(G, self.node_index)
+        self.known = np.eye(N, dtype=bool)
+        for u, v in nx.get_edge_attributes(G, DIST):
+            self.known[self.node_index[u], self.node_index[v]] = True
+            self.known[self.node_index[v], self.node_index[u]] = True
+
+        pos = nx.get_node_attributes(G, POS)
+        self.anchors = np.array([self.node_index[node] for node in pos], dtype=int)
+        self.anchor_pos = np.array(list(pos.values()), dtype=float)
+        # positions in anchors of the spherical obstacles, and their radii
+        obstacle = [G.nodes[node].get(TYPE) == OBSTACLE for node in pos]
+        self.obstacles = np.flatnonzero(obstacle)
+        self.obstacle_radius = np.array(
+            [G.nodes[node][RADIUS] for node, obs in zip(pos, obstacle) if obs], dtype=float
+        )
+
+        self.upper_bounds = shortest_path(
+            csgraph_from_dense(self.U, null_value=np.inf), directed=False
+        )
+        self.B = min_plus(min_plus(self.upper_bounds, self.L), self.upper_bounds)
+
+    def bounds(self, P: dict) -> tuple:
+        """
+        :param P: dictionary of node name and position pairs for the new anchors
+        :returns: matrices of lower and upper distance bounds
+        """
+        K = [self.node_index[node] for node in P if node in self.node_index]
+        K = [k for k in K if k not in self.anchors]
+        if not K:
+            return np.maximum(-self.B, 0), self.upper_bounds.copy()
+        pos = np.vstack([self.anchor_pos] + [P[self.node_ids[k]] for k in K])
+        nodes = np.concatenate([self.anchors, K]).astype(int)
+
+        # New exact distances from each new anchor to all other known positions
+        new_edges = []
+        U = self.U.copy()
+        for idx, k in enumerate(K):
+            others = np.delete(np.arange(len(nodes)), len(self.anchors) + idx)
+            t = nodes[others]
+            d = la.norm(pos[others] - pos[len(self.anchors) + idx], axis=1)
+            t, d = t[~self.known[k, t]], d[~self.known[k, t]]
+            U[k, t] = np.minimum(U[k, t], d)
+            U[t, k] = U[k, t]
+            new_edges += [(k, t, d)]
+
+        # Every shortest path that got shorter passes through one of the new anchors
+        R = dijkstra(csgraph_from_dense(U, null_value=np.inf), directed=False, indices=K)
+        upper_bounds = self.upper_bounds.copy()
+        for r in R:
+            np.minimum(upper_bounds, r[:, np.newaxis] + r[np.newaxis, :], out=upper_bounds)
+
+        # Lower bounds through old edges, with paths that are shorter through the
+        # new anchors on either side of the edge
+        RL = min_plus(R, self.L)
+        RLU = min_plus(RL, self.upper_bounds)
+        RLR = min_plus(RL, R.T)
+        B = self.B.copy()
+        for idx, r in enumerate(R):
+            E = r[:, np.newaxis] + RLU[idx, np.newaxis, :]
+            np.minimum(B, np.minimum(E, E.T), out=B)
+            for jdx, s in enumerate(R):
+                np.minimum(B, r[:, np.newaxis] + RLR[idx, jdx] + s[np.newaxis, :], out=B)
+
+        # Lower bounds through the new edges
+        for k, t, d in new_edges:
+            M = np.min(upper_bounds[t] - d[:, np.newaxis], axis=0, initial=np.inf)
+            E = upper_bounds[:, k, np.newaxis] + M[np.newaxis, :]
+            np.minimum(B, np.minimum(E, E.T), out=B)
+
+        return np.maximum(-B, 0), upper_bounds
+
+
 def normalize_positions(Y: ArrayLike, scale=False):
     Y_c = Y - Y.mean(0)
     C = Y_c.T.dot(Y_c)
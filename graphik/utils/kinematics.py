@@ -128,3 +128,28 @@ def modified_fk_3d(a: list, alpha: list, d: list, theta: list) -> SE3:
             modified_fk_3d(a[1:], alpha[1:], d[1:], theta[1:])
         )
     return modified_dh_to_se3(a[0], alpha[0], d[0], theta[0])
+
+
+def se3_exp_batch(S: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    """Exponential map of a unit-axis twist for a batch of joint angles
+    :param S: twist [v, omega] with unit rotation axis omega
+    :param theta: array of N joint angles
+    :returns: N x 4 x 4 array of homogeneous transforms
+    """
+    theta = np.asarray(theta, dtype=float)
+    v, w = S[:3], S[3:]
+    W = np.array([[0, -w[2], w[1]], [w[2], 0, -w[0]], [-w[1], w[0], 0]])
+    W2 = W @ W
+    s, c = np.sin(theta), np.cos(theta)
+
+    T = np.zeros(theta.shape + (4, 4))
+    T[..., :3, :3] = (
+        np.eye(3) + s[..., None, None] * W + (1 - c)[..., None, None] * W2
+    )
+    T[..., :3, 3] = (
+        theta[..., None] * v
+        + (1 - c)[..., None] * (W @ v)
+        + (theta - s)[..., None] * (W2 @ v)
+    )
+    T[..., 3, 3] = 1
+    return T
@@ -5,7 +5,12 @@ import time
 import numpy as np
 import numpy.linalg as la
 import numpy.random as rnd
-from numba import njit
+
+try:
+    from numba import njit
+except ImportError:  # the helpers below are plain NumPy code and run uncompiled
+    def njit(*args, **kwargs):
+        return lambda fun: fun
 
 from scipy.linalg import solve_continuous_lyapunov as lyap
 # Workaround for SciPy bug: https://github.com/scipy/scipy/pull/8082
@@ -19,6 +24,43 @@ from pymanopt.manifolds.manifold import Manifold
 
 sfunction = lambda x: None
 
+# eigenvalues of Y^T Y below this fraction of the largest are treated as zero
+_NULL_TOL = 1e-12
+
+
+@njit(cache=True)
+def _gram_eig(Y):
+    # Eigendecomposition of Y^T Y
+    return np.linalg.eigh(np.dot(Y.T, Y))
+
+
+@njit(cache=True)
+def _proj_into(Y, Z, out, lam, V, work):
+    # Omega solves the Lyapunov equation (Y^T Y) Omega + Omega (Y^T Y) = Y^T Z - Z^T Y,
+    # which is diagonal in the eigenbasis of Y^T Y. If Y is rank deficient, the entries
+    # between null directions are undetermined and set to zero, as Y Omega ignores them
+    C = np.dot(Y.T, Z)
+    W = np.dot(V.T, np.dot(C - C.T, V))
+    tol = _NULL_TOL * np.abs(lam).max()
+    for idx in range(lam.shape[0]):
+        for jdx in range(lam.shape[0]):
+            denom = lam[idx] + lam[jdx]
+            W[idx, jdx] = W[idx, jdx] / denom if denom > tol else 0.0
+    Omega = np.dot(V, np.dot(W, V.T))
+    np.dot(Y, Omega, work)
+    for idx in range(Z.shape[0]):
+        for jdx in range(Z.shape[1]):
+            out[idx, jdx] = Z[idx, jdx] - work[idx, jdx]
+
+
+@njit(cache=True)
+def _equal(A, B):
+    for idx in range(A.shape[0]):
+        for jdx in range(A.shape[1]):
+            if A[idx, jdx] != B[idx, jdx]:
+                return False
+    return True
+
 
 class PSDFixedRank(Manifold):
     """
@@ -56,6 +98,9 @@ class PSDFixedRank(Manifold):
     def __init__(self, n, k):
         self._n = n
         self._k = k
+        self._buffer = None  # scratch space for the in-place operations
+        self._eig_point = None  # point of the cached eigendecomposition of Y^T Y
+        self._eig = None
 
     def __str__(self):
         return "YY' quotient manifold of {:d}x{:d} psd matrices of " "rank {:d}".format(
@@ -88,30 +133,38 @@ class PSDFixedRank(Manifold):
     def dist(self, U, V):
         raise NotImplementedError
 
+    def proj(self, Y, Z):
+        out = np.empty(Z.shape)
+        return self.proj_inplace(Y, Z, out)
+
+    def proj_inplace(self, Y, Z, out):
+        """
+        Projection onto the horizontal space written into out, which may be Z.
+
+        :returns: out
+        """
+        lam, V = self._gram_eig(Y)
+        _proj_into(Y, Z, out, lam, V, self._work(Y))
+        return out
+
     @staticmethod
-    @njit(cache=True)
-    def proj(Y, Z):
-        dim = Y.shape[1]
-        X = Y.T.dot(Y)
-        if dim == 3:
-            A = np.asarray([[X[0,0] + X[0,0], X[0,1] , X[0,2], X[1,0], 0, 0, X[2,0], 0, 0],
-                            [X[1,0], X[1,1] + X[0,0], X[1,2], 0, X[1,0], 0, 0, X[2,0], 0],
-                            [X[2,0], X[2,1], X[2,2] + X[0,0], 0, 0, X[1,0], 0, 0, X[2,0]],
-                            [X[0,1], 0, 0, X[0,0] + X[1,1], X[0,1] , X[0,2], X[2,1], 0, 0],
-                            [0, X[0,1], 0, X[1,0], X[1,1] + X[1,1], X[1,2], 0, X[2,1], 0],
-                            [0, 0, X[0,1], X[2,0], X[2,1], X[2,2] + X[1,1], 0, 0, X[2,1]],
-                            [X[0,2], 0, 0, X[1,2], 0, 0, X[0,0] + X[2,2], X[0,1] , X[0,2]],
-                            [0, X[0,2], 0, 0, X[1,2], 0, X[1,0], X[1,1] + X[2,2], X[1,2]],
-                            [0, 0, X[0,2], 0, 0, X[1,2], X[2,0], X[2,1], X[2,2] + X[2,2]]])
-        if dim == 2:
-            A = np.asarray([[X[0,0] + X[0,0], X[0,1], X[0,1], 0],
-                            [X[1,0], X[0,1] + X[0,0], 0, X[0,1]],
-                            [X[0,1], 0, X[0,0] + X[1,1], X[0,1]],
-                            [0, X[0,1], X[1,0], X[1,1]+ X[1,1]]])
-        C = np.dot(Y.T,Z)- np.dot(Z.T,Y)
-        Omega = np.linalg.solve(A,C.ravel()).reshape(dim,dim)
-        return Z - Y.dot(Omega)
-        # return Z
+    def proj_batch(Y, Z):
+        """
+        Projects many tangent vectors onto the horizontal spaces of many points at once.
+
+        :param Y: points, array of shape (..., n, k)
+        :param Z: tangent vectors, array of shape (..., n, k) broadcastable against Y
+        :returns: array of projected vectors
+        """
+        Yt = np.swapaxes(Y, -1, -2)
+        lam, V = la.eigh(Yt @ Y)
+        Vt = np.swapaxes(V, -1, -2)
+        C = Yt @ Z
+        W = Vt @ (C - np.swapaxes(C, -1, -2)) @ V
+        denom = lam[..., :, None] + lam[..., None, :]
+        null = denom <= _NULL_TOL * np.abs(lam).max(axis=-1)[..., None, None]
+        W = np.where(null, 0.0, W / np.where(null, 1.0, denom))
+        return Z - Y @ (V @ W @ Vt)
 
     # def proj(self, Y, H):
         # Projection onto the horizontal space
@@ -137,6 +190,14 @@ class PSDFixedRank(Manifold):
     def retr(self, Y, U):
         return Y + U
 
+    def retr_inplace(self, Y, U, out):
+        """
+        Retraction written into out, which may be Y or U.
+
+        :returns: out
+        """
+        return np.add(Y, U, out=out)
+
     def log(self, Y, U):
         raise NotImplementedError
 
@@ -151,8 +212,33 @@ class PSDFixedRank(Manifold):
     def transp(self, Y, Z, U):
         return self.proj(Z, U)
 
+    def transp_inplace(self, Y, Z, U, out):
+        """
+        Vector transport of U from Y to Z written into out, which may be U.
+
+        :returns: out
+        """
+        return self.proj_inplace(Z, U, out)
+
     def pairmean(self, X, Y):
         raise NotImplementedError
 
+    def _gram_eig(self, Y):
+        # tCG projects many vectors at the same iterate, so the decomposition is
+        # cached for the last point it was computed at
+        if (
+            self._eig_point is None
+            or self._eig_point.shape != Y.shape
+            or not _equal(Y, self._eig_point)
+        ):
+            self._eig_point = np.array(Y, dtype=float)
+            self._eig = _gram_eig(Y)
+        return self._eig
+
+    def _work(self, Y):
+        if self._buffer is None or self._buffer.shape != Y.shape:
+            self._buffer = np.empty(Y.shape)
+        return self._buffer
+
     def _normalize(self, Y):
         return Y / self.norm(None, Y)
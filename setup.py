@@ -12,7 +12,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         "numpy >= 1.16",
-        "scipy >= 1.3.0",
+        "scipy >= 1.5.0",
         "sympy >= 1.5",
         "matplotlib >= 3.1",
         "cvxpy >= 1.1.0a1",
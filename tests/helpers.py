@@ -0,0 +1,30 @@
+"""
+Problem graphs and random problems shared by the tests.
+"""
+import numpy as np
+from graphik.graphs import ProblemGraphPlanar
+from graphik.robots import RobotPlanar
+from graphik.utils.utils import list_to_variable_dict
+
+
+def planar_graph(n=4):
+    params = {
+        "link_lengths": list_to_variable_dict(np.ones(n)),
+        "theta": list_to_variable_dict(np.zeros(n)),
+        "joint_limits_upper": np.pi * np.ones(n),
+        "joint_limits_lower": -np.pi * np.ones(n),
+        "num_joints": n,
+    }
+    return ProblemGraphPlanar(RobotPlanar(params))
+
+
+def random_problem(N, rng):
+    # squared goal distances, adjacency and squared distance limit matrices
+    omega = np.triu(rng.random((N, N)) < 0.3, 1).astype(float)
+    omega += omega.T
+    D_goal = np.triu(3 * rng.random((N, N)), 1)
+    D_goal += D_goal.T
+    M = np.triu(rng.random((N, N)) < 0.4, 1).astype(float)
+    psi_L = 2 * M * rng.random((N, N))
+    psi_U = M * (psi_L + rng.random((N, N)))
+    return D_goal, omega, psi_L + psi_L.T, psi_U + psi_U.T
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import numpy as np
 from numpy import pi
-from numpy.testing import assert_array_less
+from numpy.testing import assert_array_less, assert_allclose
 import unittest
 import networkx as nx
 from graphik.graphs import (
@@ -9,8 +9,9 @@ from graphik.graphs import (
     ProblemGraphRevolute,
 )
 from graphik.robots import RobotRevolute, RobotPlanar
+from graphik.utils.constants import DIST, LOWER, UPPER
 from graphik.utils.dgp import pos_from_graph, graph_from_pos, bound_smoothing
-from graphik.utils.utils import list_to_variable_dict
+from graphik.utils.utils import list_to_variable_dict, table_environment
 from graphik.utils.geometry import trans_axis
 from graphik.utils.roboturdf import load_ur10
 
@@ -18,6 +19,32 @@ from graphik.utils.roboturdf import load_ur10
 TOL = 1e-6
 
 
+def bellman_ford_bounds(G):
+    # Previous implementation of bound_smoothing, used as the reference
+    H = nx.DiGraph()
+    for u, v, d in G.edges(data=True):
+        H.add_edge(u, f"{u}s", weight=0)
+        H.add_edge(v, f"{v}s", weight=0)
+        H.add_edge(u, f"{v}s", weight=-G[u][v][LOWER])
+        H.add_edge(v, f"{u}s", weight=-G[u][v][LOWER])
+        H.add_edge(u, v, weight=G[u][v][UPPER])
+        H.add_edge(v, u, weight=G[u][v][UPPER])
+        H.add_edge(f"{u}s", f"{v}s", weight=G[u][v][UPPER])
+        H.add_edge(f"{v}s", f"{u}s", weight=G[u][v][UPPER])
+    bounds = dict(nx.all_pairs_bellman_ford_path_length(H, weight=DIST))
+
+    N = len(G)
+    lower_bounds = np.zeros([N, N])
+    upper_bounds = np.zeros([N, N])
+    ids = list(G.nodes())
+    for u in G:
+        for v in G:
+            if bounds[u][v + "s"] < 0:
+                lower_bounds[ids.index(u), ids.index(v)] = -bounds[u][v + "s"]
+            upper_bounds[ids.index(u), ids.index(v)] = bounds[u][v]
+    return lower_bounds, upper_bounds
+
+
 class TestBoundSmoothing(unittest.TestCase):
     def test_random_params_2d_chain(self):
         n = 5
@@ -117,6 +144,40 @@ class TestBoundSmoothing(unittest.TestCase):
             )
 
 
+    def test_matches_bellman_ford(self):
+        robot, graph = load_ur10()
+        for idx, obs in enumerate(table_environment()[:10]):
+            graph.add_spherical_obstacle(f"o{idx}", obs[0], obs[1])
+
+        for _ in range(3):
+            q_goal = graph.robot.random_configuration()
+            T_goal = robot.pose(q_goal, "p" + str(robot.n))
+            G = graph.from_pos(
+                {f"p{robot.n}": T_goal.trans, f"q{robot.n}": T_goal.dot(trans_axis(1, "z")).trans}
+            )
+            lb, ub = bound_smoothing(G)
+            lb_ref, ub_ref = bellman_ford_bounds(G)
+            self.assertIsNone(assert_allclose(ub, ub_ref, atol=TOL))
+            self.assertIsNone(assert_allclose(lb, lb_ref, atol=TOL))
+
+    def test_bound_smoothing_cache(self):
+        robot, graph = load_ur10()
+        graph.add_spherical_obstacle("o0", np.array([2.0, 2.0, 2.0]), 0.2)
+
+        for _ in range(20):
+            q_goal = graph.robot.random_configuration()
+            T_goal = robot.pose(q_goal, "p" + str(robot.n))
+            goals = {
+                f"p{robot.n}": T_goal.trans,
+                f"q{robot.n}": T_goal.dot(trans_axis(1, "z")).trans,
+            }
+
+            lb, ub = bound_smoothing(graph.from_pos(goals))
+            lb_c, ub_c = graph.bound_smoothing_cache.bounds(goals)
+            self.assertIsNone(assert_allclose(ub_c, ub, atol=TOL))
+            self.assertIsNone(assert_allclose(lb_c, lb, atol=TOL))
+
+
 if __name__ == "__main__":
     np.random.seed(22)
     test = TestBoundSmoothing()
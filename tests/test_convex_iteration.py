@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import time
+import numpy as np
+import unittest
+from graphik.solvers.convex_iteration import convex_iterate_sdp_snl_graph, solve_with_cidgik
+from graphik.utils.constants import POS
+from graphik.utils.roboturdf import load_ur10
+
+
+def goal_anchors(graph, T_goal):
+    n = graph.robot.n
+    return {
+        "p0": graph.nodes["p0"][POS],
+        "q0": graph.nodes["q0"][POS],
+        f"p{n}": T_goal.trans,
+        f"q{n}": T_goal.trans + T_goal.rot.as_matrix()[:, 2],
+    }
+
+
+class TestConvexIteration(unittest.TestCase):
+    def setUp(self):
+        self.robot, self.graph = load_ur10()
+        q = self.robot.random_configuration()
+        self.T_goal = self.robot.pose(q, f"p{self.robot.n}")
+
+    def iterate(self, **kwargs):
+        return convex_iterate_sdp_snl_graph(
+            self.graph,
+            goal_anchors(self.graph, self.T_goal),
+            ranges=True,
+            return_info=True,
+            **kwargs,
+        )
+
+    def test_last_iterate(self):
+        # without a deadline or callback the last iterate is returned
+        _, _, _, _, eig_value_sums, prob, _, _, _, info = self.iterate()
+        self.assertEqual(info["iterations"], len(eig_value_sums))
+        self.assertEqual(info["eig_value_sum"], eig_value_sums[-1])
+        self.assertEqual(info["cost"], prob.value)
+
+    def test_callback(self):
+        calls = []
+
+        def callback(iteration, C, cost):
+            calls.append((iteration, cost))
+            return iteration == 1
+
+        _, _, _, _, eig_value_sums, prob, _, _, _, info = self.iterate(callback=callback)
+        self.assertEqual([iteration for iteration, _ in calls], list(range(len(calls))))
+        self.assertEqual(info["iterations"], len(eig_value_sums))
+        self.assertEqual(info["cost"], prob.value)
+        if len(calls) == 2:
+            # stopped by the callback, the iterate closest to rank d is returned
+            self.assertFalse(info["converged"])
+            self.assertEqual(info["eig_value_sum"], min(eig_value_sums))
+        else:
+            self.assertEqual(info["eig_value_sum"], eig_value_sums[-1])
+
+    def test_deadline(self):
+        start = time.time()
+        out = self.iterate(deadline=start)
+        eig_value_sums, prob, info = out[4], out[5], out[9]
+        self.assertEqual(info["iterations"], 1)
+        self.assertEqual(len(eig_value_sums), 1)
+        self.assertEqual(info["cost"], prob.value)
+
+    def test_solve_with_cidgik(self):
+        q_sol, solution, info = solve_with_cidgik(self.graph, self.T_goal, return_info=True)
+        self.assertEqual(
+            set(info), {"cost", "eig_value_sum", "violation", "iterations", "converged"}
+        )
+        self.assertGreaterEqual(info["iterations"], 1)
+        if q_sol is not None:
+            self.assertIsNotNone(info["cost"])
+            self.assertGreaterEqual(info["violation"], 0)
+            self.assertIsNone(
+                np.testing.assert_allclose(solution[f"p{self.robot.n}"], self.T_goal.trans)
+            )
+
+        q_sol, _, info = solve_with_cidgik(
+            self.graph, self.T_goal, deadline=time.time(), return_info=True
+        )
+        self.assertEqual(info["iterations"], 1)
+
+        calls = []
+        solve_with_cidgik(
+            self.graph, self.T_goal, callback=lambda *args: calls.append(args) or True
+        )
+        self.assertLessEqual(len(calls), 1)  # none if the first iteration converges
+        self.assertEqual(len(solve_with_cidgik(self.graph, self.T_goal)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
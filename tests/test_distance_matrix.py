@@ -9,7 +9,8 @@ from graphik.graphs import (
 )
 
 from graphik.robots import RobotRevolute, RobotPlanar
-from graphik.utils import best_fit_transform, list_to_variable_dict, MDS, gram_from_distance_matrix, pos_from_graph
+from graphik.utils.constants import LOWER, UPPER
+from graphik.utils import best_fit_transform, list_to_variable_dict, MDS, gram_from_distance_matrix, pos_from_graph, distance_matrix_from_graph
 
 class TestDistanceMatrix(unittest.TestCase):
     def test_special_case_3d_tree(self):
@@ -197,3 +198,74 @@ class TestDistanceMatrix(unittest.TestCase):
 
             self.assertIsNone(assert_allclose(P_e, Y, atol=1e-8))
 
+    def test_realization_array(self):
+        for idx in range(30):
+            n = np.random.randint(3, high=10)
+            params = {
+                "a": np.random.rand(n),
+                "alpha": np.random.rand(n) * pi / 2,
+                "d": np.random.rand(n),
+                "theta": np.zeros(n),
+                "modified_dh": False,
+                "num_joints": n,
+            }
+            robot = RobotRevolute(params)
+            graph = ProblemGraphRevolute(robot)
+            graph.add_spherical_obstacle("o0", np.random.rand(3), 0.1)
+
+            q = robot.random_configuration()
+            G = graph.realization(q)
+            Y = graph.realization_array(q)
+            D = graph.distance_matrix_from_joints(q)
+            self.assertIsNone(assert_allclose(Y, pos_from_graph(G), atol=1e-10))
+            self.assertIsNone(
+                assert_allclose(D, distance_matrix_from_graph(G), atol=1e-8)
+            )
+
+    def test_realization_batch(self):
+        for idx in range(10):
+            n = np.random.randint(3, high=10)
+            params = {
+                "a": np.random.rand(n),
+                "alpha": np.random.rand(n) * pi / 2,
+                "d": np.random.rand(n),
+                "theta": np.zeros(n),
+                "modified_dh": False,
+                "num_joints": n,
+            }
+            robot = RobotRevolute(params)
+            graph = ProblemGraphRevolute(robot)
+            joints = [node for node in robot.joint_ids if node != "p0"]
+
+            Q = np.random.uniform(-pi, pi, size=(20, n))
+            Y = graph.realization_batch(Q)
+            for kdx in range(Q.shape[0]):
+                q = dict(zip(joints, Q[kdx]))
+                self.assertIsNone(
+                    assert_allclose(Y[kdx], graph.realization_array(q), atol=1e-10)
+                )
+
+            graph.distance_bounds_from_sampling(num_samples=200, seed=idx)
+            for u, v, data in graph.edges(data=True):
+                self.assertLessEqual(data[LOWER], data[UPPER] + 1e-9)
+
+    def test_distance_bounds_from_sampling_workers(self):
+        n = 6
+        params = {
+            "a": np.random.rand(n),
+            "alpha": np.random.rand(n) * pi / 2,
+            "d": np.random.rand(n),
+            "theta": np.zeros(n),
+            "modified_dh": False,
+            "num_joints": n,
+        }
+        graphs = [ProblemGraphRevolute(RobotRevolute(params)) for _ in range(2)]
+        graphs[0].distance_bounds_from_sampling(num_samples=400, seed=0, batch_size=50)
+        graphs[1].distance_bounds_from_sampling(
+            num_samples=400, seed=0, batch_size=50, num_workers=2
+        )
+        self.assertEqual(set(graphs[0].edges), set(graphs[1].edges))
+        for u, v, data in graphs[0].edges(data=True):
+            for key in [LOWER, UPPER]:
+                self.assertAlmostEqual(data.get(key), graphs[1][u][v].get(key))
+
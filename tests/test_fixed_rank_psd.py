@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from numpy.random import randn
+from graphik.utils.manifolds.fixed_rank_psd_sym import PSDFixedRank
+
+
+class TestPSDFixedRank(unittest.TestCase):
+    def test_inplace_operations(self):
+        for dim in [2, 3]:
+            for _ in range(20):
+                n = np.random.randint(dim + 1, 30)
+                man = PSDFixedRank(n, dim)
+                Y, Z, U = randn(n, dim), randn(n, dim), randn(n, dim)
+
+                out = np.empty((n, dim))
+                self.assertIs(man.proj_inplace(Y, U, out), out)
+                self.assertTrue(np.array_equal(out, man.proj(Y, U)))
+
+                V = U.copy()
+                man.proj_inplace(Y, V, V)
+                self.assertTrue(np.array_equal(V, man.proj(Y, U)))
+
+                man.transp_inplace(Y, Z, U, out)
+                self.assertTrue(np.array_equal(out, man.transp(Y, Z, U)))
+
+                man.retr_inplace(Y, U, out)
+                self.assertTrue(np.array_equal(out, man.retr(Y, U)))
+
+    def test_proj_any_rank(self):
+        for rank in range(1, 7):
+            n = np.random.randint(rank + 1, 30)
+            man = PSDFixedRank(n, rank)
+            Y, Z = randn(n, rank), randn(n, rank)
+
+            # projected vectors are horizontal, Y^T P is symmetric
+            P = man.proj(Y, Z)
+            self.assertIsNone(assert_allclose(Y.T.dot(P), P.T.dot(Y), atol=1e-9))
+            self.assertIsNone(assert_allclose(man.proj(Y, P), P, atol=1e-9))
+
+            Y_batch, Z_batch = randn(5, n, rank), randn(5, n, rank)
+            P_batch = man.proj_batch(Y_batch, Z_batch)
+            for idx in range(5):
+                self.assertIsNone(
+                    assert_allclose(P_batch[idx], man.proj(Y_batch[idx], Z_batch[idx]))
+                )
+
+    def test_proj_rank_deficient(self):
+        for rank in range(2, 5):
+            n = np.random.randint(rank + 1, 30)
+            man = PSDFixedRank(n, rank)
+            Y, Z = randn(n, rank), randn(n, rank)
+            Y[:, -1] = 0  # Y^T Y has a zero eigenvalue
+
+            P = man.proj(Y, Z)
+            self.assertTrue(np.all(np.isfinite(P)))
+            self.assertIsNone(assert_allclose(Y.T.dot(P), P.T.dot(Y), atol=1e-9))
+
+            P_batch = man.proj_batch(np.stack([Y, 0 * Y]), np.stack([Z, Z]))
+            self.assertIsNone(assert_allclose(P_batch[0], P, atol=1e-9))
+            self.assertIsNone(assert_allclose(P_batch[1], Z))
+
+
+if __name__ == "__main__":
+    unittest.main()
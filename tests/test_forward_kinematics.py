@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import numpy as np
+import networkx as nx
+import unittest
+from numpy.testing import assert_allclose
+from numpy.random import rand, randint
+from numpy import pi
+from graphik.robots import RobotRevolute
+from graphik.utils.constants import ROOT
+
+
+class TestForwardKinematics(unittest.TestCase):
+    def check_pose_batch(self, robot):
+        joints = [node for node in robot.joint_ids if node != ROOT]
+        Q = np.array(
+            [[robot.random_configuration()[node] for node in joints] for _ in range(10)]
+        )
+        T = robot.pose_batch(Q)
+        for kdx in range(Q.shape[0]):
+            q = dict(zip(joints, Q[kdx]))
+            T_all = robot.get_all_poses(q)
+            for idx, node in enumerate(robot.joint_ids):
+                # pose walks the kinematic chain on its own, unlike the other two
+                T_ref = robot.T_base if node == ROOT else robot.pose(q, node)
+                self.assertIsNone(
+                    assert_allclose(T[kdx, idx], T_ref.as_matrix(), atol=1e-9)
+                )
+                self.assertIsNone(
+                    assert_allclose(T_all[node].as_matrix(), T_ref.as_matrix(), atol=1e-9)
+                )
+
+    def check_jacobian_batch(self, robot, eps=1e-6):
+        joints = [node for node in robot.joint_ids if node != ROOT]
+        ee = robot.joint_ids.index(robot.end_effectors[0])
+        Q = (2 * rand(5, len(joints)) - 1) * pi
+        J = robot.jacobian_batch(Q)
+        for kdx in range(Q.shape[0]):
+            T = robot.pose_batch(Q[kdx])[0, ee]
+            for jdx in range(len(joints)):
+                dq = np.zeros(len(joints))
+                dq[jdx] = eps
+                T_p = robot.pose_batch(Q[kdx] + dq)[0, ee]
+                T_m = robot.pose_batch(Q[kdx] - dq)[0, ee]
+                dT = (T_p - T_m) / (2 * eps)
+                W = dT[:3, :3] @ T[:3, :3].T  # skew-symmetric angular velocity
+                twist = np.concatenate([dT[:3, 3], [W[2, 1], W[0, 2], W[1, 0]]])
+                self.assertIsNone(assert_allclose(J[kdx, :, jdx], twist, atol=1e-6))
+
+    def test_pose_batch_3d_chain(self):
+        for _ in range(20):
+            n = randint(3, high=20)
+            params = {
+                "a": rand(n),
+                "alpha": rand(n) * pi / 2 - 2 * rand(n) * pi / 2,
+                "d": rand(n),
+                "theta": np.zeros(n),
+                "modified_dh": False,
+                "num_joints": n,
+            }
+            self.check_pose_batch(RobotRevolute(params))
+
+    def test_jacobian_batch_3d_chain(self):
+        for _ in range(10):
+            n = randint(3, high=10)
+            params = {
+                "a": rand(n),
+                "alpha": rand(n) * pi / 2 - 2 * rand(n) * pi / 2,
+                "d": rand(n),
+                "theta": np.zeros(n),
+                "modified_dh": False,
+                "num_joints": n,
+            }
+            self.check_jacobian_batch(RobotRevolute(params))
+
+    def test_pose_batch_3d_tree(self):
+        for _ in range(10):
+            height = randint(2, high=4)
+            gen = nx.balanced_tree(2, height, create_using=nx.DiGraph)
+            gen = nx.relabel_nodes(gen, {node: f"p{node}" for node in gen})
+            n = gen.number_of_edges()
+            nodes = [f"p{idx}" for idx in range(1, n + 1)]
+            params = {
+                "a": dict(zip(nodes, rand(n))),
+                "alpha": dict(zip(nodes, rand(n) * pi / 2)),
+                "d": dict(zip(nodes, rand(n))),
+                "theta": dict(zip(nodes, np.zeros(n))),
+                "modified_dh": False,
+                "parents": nx.to_dict_of_lists(gen),
+                "num_joints": n,
+            }
+            self.check_pose_batch(RobotRevolute(params))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from types import SimpleNamespace
+from numpy.testing import assert_allclose
+from graphik.solvers.gauss_newton import (
+    GaussNewton,
+    NormalEquations,
+    edge_cost,
+    edge_residuals,
+)
+
+
+def random_edges(N, rng):
+    i, j = np.nonzero(np.triu(rng.random((N, N)) < 0.5, 1))
+    E = i.shape[0]
+    lower = 2 * rng.random(E)
+    return (
+        i.astype(np.int64),
+        j.astype(np.int64),
+        3 * rng.random(E),
+        lower,
+        lower + rng.random(E),
+        rng.integers(0, 8, E).astype(np.int64),
+    )
+
+
+class TestGaussNewton(unittest.TestCase):
+    def test_normal_equations(self):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            N, dim = 8, 3
+            edges = random_edges(N, rng)
+            Y = rng.standard_normal((N, dim))
+
+            # finite difference gradient of the cost
+            grad = np.zeros(N * dim)
+            for idx in range(N * dim):
+                dY = np.zeros(N * dim)
+                dY[idx] = 1e-6
+                grad[idx] = (
+                    edge_cost(Y + dY.reshape(N, dim), *edges)
+                    - edge_cost(Y - dY.reshape(N, dim), *edges)
+                ) / 2e-6
+
+            system = NormalEquations(edges[0], edges[1], N, dim)
+            _, half_grad = system.assemble(*edge_residuals(Y, *edges))
+            self.assertIsNone(assert_allclose(2 * half_grad, grad, atol=1e-5))
+
+            # J^T J is positive semidefinite and the damping shifts its spectrum
+            A = system.damped(0.0).toarray()
+            self.assertIsNone(assert_allclose(A, A.T))
+            self.assertGreater(np.linalg.eigvalsh(A).min(), -1e-9)
+            A_damped = system.damped(0.5).toarray()
+            self.assertIsNone(assert_allclose(A_damped - A, 0.5 * np.eye(N * dim)))
+
+    def test_solve(self):
+        rng = np.random.default_rng(1)
+        for linear_solver in ["direct", "cg"]:
+            N = 12
+            P = rng.standard_normal((N, 3))
+            i, j = np.triu_indices(N, 1)
+            D = np.sum((P[i] - P[j]) ** 2, axis=1)
+            edges = (i, j, D, 0 * D, 0 * D, np.ones_like(i))
+            problem = SimpleNamespace(edges=edges, verbosity=0)
+
+            solver = GaussNewton(linear_solver=linear_solver, logverbosity=2)
+            Y, optlog = solver.solve(problem, P + 0.1 * rng.standard_normal((N, 3)))
+            self.assertLess(optlog["final_values"]["f(x)"], 1e-12)
+            self.assertTrue(optlog["final_values"]["converged"])
+
+            # the callback stops the solver
+            solver.solve(problem, P + 0.1 * rng.standard_normal((N, 3)),
+                         callback=lambda Y, cost, k: k >= 2)
+            self.assertEqual(solver._optlog["final_values"]["iterations"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
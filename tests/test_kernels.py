@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from graphik.solvers import costs, kernels
+from graphik.solvers.riemannian_solver import RiemannianSolver, solve_with_riemannian
+from graphik.utils.dgp import adjacency_matrix_from_graph, distance_matrix_from_graph
+from helpers import planar_graph, random_problem
+
+
+class TestEdgeKernels(unittest.TestCase):
+    def test_matches_dense(self):
+        rng = np.random.default_rng(0)
+        names = ["lcost_edges", "lgrad_edges", "lhess_edges", "lcost_and_grad_edges"]
+        impls = [{name: getattr(costs, name) for name in names}]
+        if kernels.available():
+            impls += [{name: kernels.get(name) for name in names}]
+        for _ in range(10):
+            N = rng.integers(5, 30)
+            D_goal, omega, psi_L, psi_U = random_problem(N, rng)
+            Y = rng.standard_normal((N, 3))
+            W = rng.standard_normal((N, 3))
+
+            diff = psi_L != psi_U
+            inds = np.nonzero(
+                np.triu(omega) + np.triu(diff * (psi_L > 0)) + np.triu(diff * (psi_U > 0))
+            )
+            dense = (D_goal, omega, psi_L, psi_U, inds)
+            edges = RiemannianSolver.create_edge_list(D_goal, omega, psi_L, psi_U)
+            for fns in impls:
+                self.assertAlmostEqual(fns["lcost_edges"](Y, *edges), costs.lcost(Y, *dense))
+                grad = costs.lgrad(Y, *dense)
+                self.assertIsNone(
+                    assert_allclose(fns["lgrad_edges"](Y, *edges), grad, atol=1e-9)
+                )
+                self.assertIsNone(
+                    assert_allclose(
+                        fns["lhess_edges"](Y, W, *edges), costs.lhess(Y, W, *dense), atol=1e-9
+                    )
+                )
+                f, g = fns["lcost_and_grad_edges"](Y, *edges)
+                self.assertAlmostEqual(f, costs.lcost(Y, *dense))
+                self.assertIsNone(assert_allclose(g, grad, atol=1e-9))
+
+
+class TestNumPyBackend(unittest.TestCase):
+    def setUp(self):
+        kernels.configure("numpy")
+
+    def tearDown(self):
+        kernels.configure()
+
+    def test_backend(self):
+        self.assertFalse(kernels.available())
+        self.assertEqual(kernels.warmup(), {})
+        with self.assertRaises(RuntimeError):
+            kernels.get("lcost_edges")
+
+    def test_costs(self):
+        graph = planar_graph()
+        robot = graph.robot
+        q = robot.random_configuration()
+        G = graph.from_pose(robot.pose(q, f"p{robot.n}"))
+        D_goal = distance_matrix_from_graph(G)
+        omega = adjacency_matrix_from_graph(G)
+        psi_L, psi_U = graph.distance_bound_matrices()
+        Y = np.random.rand(graph.number_of_nodes(), graph.dim)
+        Z = np.random.rand(graph.number_of_nodes(), graph.dim)
+
+        # jit=True falls back to the NumPy cost functions
+        for fns, ref in [
+            (
+                RiemannianSolver.create_cost(D_goal, omega, jit=True),
+                RiemannianSolver.create_cost(D_goal, omega, jit=False),
+            ),
+            (
+                RiemannianSolver.create_cost_limits(D_goal, omega, psi_L, psi_U, jit=True),
+                RiemannianSolver.create_cost_limits(D_goal, omega, psi_L, psi_U, jit=False),
+            ),
+        ]:
+            self.assertAlmostEqual(fns[0](Y), ref[0](Y))
+            self.assertIsNone(assert_allclose(fns[1](Y), ref[1](Y), atol=1e-9))
+            self.assertIsNone(assert_allclose(fns[2](Y, Z), ref[2](Y, Z), atol=1e-9))
+
+    def test_solve(self):
+        graph = planar_graph()
+        robot = graph.robot
+        q = robot.random_configuration()
+        T_goal = robot.pose(q, f"p{robot.n}")
+        q_sol, _ = solve_with_riemannian(graph, T_goal, use_jit=True)
+        self.assertIsNotNone(q_sol)
+        T_sol = robot.pose(q_sol, f"p{robot.n}")
+        self.assertIsNone(
+            assert_allclose(T_sol.as_matrix(), T_goal.as_matrix(), atol=1e-3)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from graphik.utils.dgp import (
+    MDS,
+    factor,
+    gram_from_distance_matrix,
+    distance_matrix_from_pos,
+    linear_projection,
+)
+
+
+class TestMDS(unittest.TestCase):
+    def test_mds_recovers_distances(self):
+        rng = np.random.default_rng(0)
+        for N in [5, 20, 100]:
+            P = rng.standard_normal((N, 3))
+            D = distance_matrix_from_pos(P)
+            for k in [None, 3, 6]:
+                X = MDS(gram_from_distance_matrix(D), k=k)
+                self.assertEqual(X.shape, (N, 3))
+                self.assertIsNone(assert_allclose(distance_matrix_from_pos(X), D, atol=1e-8))
+
+    def test_partial_factor(self):
+        rng = np.random.default_rng(1)
+        N = 100
+        A = rng.standard_normal((N, N))
+        A = A + A.T
+        X_full = factor(A)
+        X = factor(A, 5)
+        self.assertIsNone(assert_allclose(np.abs(X), np.abs(X_full[:, :5]), atol=1e-9))
+        self.assertTrue(np.all(np.diff(np.sum(X ** 2, axis=0)) <= 0))
+
+    def test_linear_projection(self):
+        rng = np.random.default_rng(2)
+        N = 15
+        P = rng.standard_normal((N, 6))
+        F = np.triu(rng.random((N, N)) < 0.3, 1)
+        F = F + F.T
+        S = sum(np.outer(P[i] - P[j], P[i] - P[j]) for i, j in zip(*np.nonzero(F)))
+        Y = linear_projection(P, F, 3)
+        self.assertIsNone(
+            assert_allclose(np.abs(Y), np.abs(P @ np.linalg.eigh(S)[1][:, ::-1][:, :3]))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import multiprocessing as mp
+import pickle
+import threading
+import time
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from graphik.solvers import multistart
+from graphik.solvers.multistart import MultiStartSolver, _SolutionSet, enumerate_solutions
+from graphik.utils.utils import wraptopi
+from helpers import planar_graph
+
+
+def unreachable_goal(robot):
+    # far outside the workspace, the solver keeps iterating without these stopping
+    T = robot.pose(robot.random_configuration(), f"p{robot.n}")
+    return type(T)(T.rot, 10 * T.trans / np.linalg.norm(T.trans))
+
+
+# no stopping criterion other than success, deadline and cancellation is reached
+ENDLESS = {"jit": False, "mingradnorm": 0.0, "maxiter": 10 ** 9}
+
+
+class TestMultiStart(unittest.TestCase):
+    def test_solve(self):
+        graph = planar_graph(3)
+        robot = graph.robot
+        T_goal = robot.pose(robot.random_configuration(), f"p{robot.n}")
+        with MultiStartSolver(
+            graph, num_starts=16, num_workers=2, seed=0, params={"jit": False}
+        ) as solver:
+            q_sol, _, stats = solver.solve(T_goal)
+        self.assertTrue(stats["success"])
+        # the remaining attempts are cancelled after the first accepted one
+        self.assertLess(stats["attempts"], 16)
+        T_sol = robot.pose(q_sol, f"p{robot.n}")
+        self.assertIsNone(assert_allclose(T_sol.as_matrix(), T_goal.as_matrix(), atol=1e-3))
+
+    def test_deadline(self):
+        graph = planar_graph(3)
+        with MultiStartSolver(
+            graph, num_starts=4, num_workers=2, deadline=0.5, params=ENDLESS
+        ) as solver:
+            start = time.time()
+            _, _, stats = solver.solve(unreachable_goal(graph.robot))
+            elapsed = time.time() - start
+        self.assertFalse(stats["success"])
+        self.assertLess(elapsed, 2.0)
+
+    def test_cancellation(self):
+        graph = planar_graph(3)
+        cancelled = mp.get_context().Value("i", 0)
+        multistart._init_worker(pickle.dumps(graph), ENDLESS, cancelled)
+        T_goal = unreachable_goal(graph.robot)
+
+        # attempts of a cancelled solve do not start
+        self.assertIsNone(multistart._attempt(0, T_goal, None, 1e-5, None))
+
+        # running attempts stop at their next iteration
+        timer = threading.Timer(0.5, lambda: setattr(cancelled, "value", 1))
+        timer.start()
+        start = time.time()
+        _, _, stats = multistart._attempt(1, T_goal, 0, 1e-5, None)
+        timer.join()
+        self.assertFalse(stats["success"])
+        self.assertLess(time.time() - start, 5.0)
+
+    def test_solution_set(self):
+        rng = np.random.default_rng(0)
+        joints = [f"p{idx}" for idx in range(1, 8)]
+        found = _SolutionSet(1e-2)
+        configs = [dict(zip(joints, rng.uniform(-np.pi, np.pi, 7))) for _ in range(20)]
+        self.assertTrue(all(found.add(q) for q in configs))
+        for q in configs:
+            nearby = {node: val + rng.uniform(-5e-3, 5e-3) for node, val in q.items()}
+            self.assertFalse(found.add(nearby))
+
+        # angles are compared wrapped to [-pi, pi)
+        self.assertTrue(found.add({node: np.pi - 1e-3 for node in joints}))
+        self.assertFalse(found.add({node: -np.pi + 1e-3 for node in joints}))
+
+    def test_enumerate_solutions(self):
+        graph = planar_graph(3)
+        robot = graph.robot
+        q = robot.random_configuration()
+        T_goal = robot.pose(q, f"p{robot.n}")
+
+        solutions = enumerate_solutions(
+            graph, T_goal, max_solutions=8, budget=24, patience=12, num_workers=2,
+            seed=0, params={"jit": False},
+        )
+        # a planar arm with three joints has at most two solutions for a pose
+        self.assertGreaterEqual(len(solutions), 1)
+        self.assertLessEqual(len(solutions), 2)
+        joints = [f"p{idx}" for idx in range(1, robot.n + 1)]
+        for idx, (q_sol, _, stats) in enumerate(solutions):
+            self.assertTrue(stats["success"])
+            T_sol = robot.pose(q_sol, f"p{robot.n}")
+            self.assertIsNone(
+                assert_allclose(T_sol.as_matrix(), T_goal.as_matrix(), atol=1e-3)
+            )
+            for q_other, _, _ in solutions[:idx]:
+                diff = wraptopi(np.array([q_sol[node] - q_other[node] for node in joints]))
+                self.assertTrue(np.any(np.abs(diff) >= 1e-2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from graphik.solvers import parallel
+from graphik.solvers.parallel import ParallelIKExecutor
+from helpers import planar_graph
+
+
+class _EchoWorker:
+    # Returns the goals as solutions after params["delay"] seconds each, and exits every
+    # worker that sees the goal params["crash"] without posting results, only the first
+    # one if the file params["marker"] is given. The ids of the goals it starts are
+    # appended to the file params["log"]
+    def __init__(self, graph, params):
+        self.params = params
+
+    def __call__(self, goals):
+        out = []
+        for goal_id, goal in goals:
+            time.sleep(self.params.get("delay", 0))
+            if "log" in self.params:
+                with open(self.params["log"], "a") as f:
+                    f.write(f"{goal_id}\n")
+            marker = self.params.get("marker")
+            if goal_id == self.params.get("crash"):
+                if marker is None:
+                    os._exit(1)
+                if not os.path.exists(marker):
+                    open(marker, "w").close()
+                    os._exit(1)
+            out += [(goal_id, goal, {"success": True, "pid": os.getpid()})]
+        return out
+
+
+@mock.patch.dict(parallel.SOLVERS, {"echo": _EchoWorker})
+class TestParallelIKExecutor(unittest.TestCase):
+    def run_echo(self, num_goals, params={}, **kwargs):
+        goals = [(idx, 2 * idx) for idx in range(num_goals)]
+        executor = ParallelIKExecutor(
+            None, "echo", params, num_workers=2, start_method="fork", **kwargs
+        )
+        with executor:
+            results = list(executor.map(goals))
+        return executor, results
+
+    def test_all_results(self):
+        _, results = self.run_echo(50, chunk_size=3)
+        self.assertEqual(sorted(goal_id for goal_id, _, _ in results), list(range(50)))
+        for goal_id, q_sol, stats in results:
+            self.assertEqual(q_sol, 2 * goal_id)
+            self.assertTrue(stats["success"])
+
+    def test_worker_death(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            params = {"crash": 7, "marker": os.path.join(tmp, "crashed")}
+            executor, results = self.run_echo(40, params, chunk_size=2)
+            self.assertTrue(os.path.exists(params["marker"]))
+        self.assertEqual(sorted(goal_id for goal_id, _, _ in results), list(range(40)))
+        self.assertTrue(all(stats["success"] for _, _, stats in results))
+        self.assertGreater(executor._next_worker, executor.num_workers)
+
+    def test_worker_death_queued(self):
+        goals = [(idx, 2 * idx) for idx in range(12)]
+        with tempfile.TemporaryDirectory() as tmp:
+            params = {
+                "crash": 1,
+                "marker": os.path.join(tmp, "crashed"),
+                "log": os.path.join(tmp, "started"),
+                "delay": 0.3,
+            }
+            executor = ParallelIKExecutor(
+                None, "echo", params, num_workers=2, chunk_size=1, max_pending=12,
+                start_method="fork",
+            )
+            with executor:
+                # all chunks are queued before the worker dies
+                executor.submit(goals)
+                results = list(executor.results(timeout=10))
+            self.assertTrue(os.path.exists(params["marker"]))
+            with open(params["log"]) as f:
+                started = sorted(int(line) for line in f)
+        # only the chunk of the crashed worker is resubmitted, every goal comes back once
+        self.assertEqual(sorted(goal_id for goal_id, _, _ in results), list(range(12)))
+        self.assertTrue(all(stats["success"] for _, _, stats in results))
+        self.assertEqual(executor._retried, {1})
+        # queued chunks are solved once, the crashed one twice
+        self.assertEqual(started, sorted(list(range(12)) + [1]))
+
+    def test_retry_cap(self):
+        executor, results = self.run_echo(12, {"crash": 5}, chunk_size=1)
+        self.assertEqual(sorted(goal_id for goal_id, _, _ in results), list(range(12)))
+        # the chunk is resubmitted once, then returned as failed
+        self.assertEqual(executor._retried, {5})
+        for goal_id, q_sol, stats in results:
+            self.assertEqual(stats["success"], goal_id != 5)
+        self.assertIn("error", dict((goal_id, stats) for goal_id, _, stats in results)[5])
+
+    def test_max_tasks(self):
+        executor, results = self.run_echo(20, chunk_size=1, max_tasks_per_worker=2)
+        self.assertEqual(sorted(goal_id for goal_id, _, _ in results), list(range(20)))
+        # every worker is replaced after two chunks
+        self.assertGreaterEqual(executor._next_worker, 10)
+        self.assertGreater(len({stats["pid"] for _, _, stats in results}), 2)
+
+    def test_riemannian(self):
+        graph = planar_graph()
+        robot = graph.robot
+        goals = []
+        for idx in range(6):
+            q = robot.random_configuration()
+            goals += [(idx, robot.pose(q, f"p{robot.n}"))]
+        executor = ParallelIKExecutor(
+            graph, "riemannian", {"jit": False}, num_workers=2, chunk_size=2,
+            start_method="fork",
+        )
+        with executor:
+            results = list(executor.map(goals))
+        self.assertEqual(sorted(goal_id for goal_id, _, _ in results), list(range(6)))
+        for goal_id, q_sol, stats in results:
+            self.assertEqual(q_sol is None, not stats["success"])
+            self.assertIn("iterations", stats)
+
+    def test_cidgik_params(self):
+        with self.assertRaises(ValueError):
+            ParallelIKExecutor(planar_graph(), "cidgik", {"jit": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from liegroups.numpy import SE3, SO3
+from graphik.solvers.prescreen import (
+    GOAL_IN_OBSTACLE,
+    OUT_OF_REACH,
+    prescreen,
+)
+from graphik.utils.constants import OBSTACLE, POS, RADIUS, TYPE
+from graphik.utils.roboturdf import load_ur10
+from graphik.utils.utils import table_environment
+
+
+def in_collision(graph, q):
+    T_all = graph.robot.get_all_poses(q)
+    for _, data in graph.nodes(data=True):
+        if data.get(TYPE) == OBSTACLE:
+            for T in T_all.values():
+                if np.linalg.norm(T.trans - data[POS]) < data[RADIUS]:
+                    return True
+    return False
+
+
+class TestPrescreen(unittest.TestCase):
+    def setUp(self):
+        self.robot, self.graph = load_ur10()
+        self.obstacles = table_environment()
+        for idx, obs in enumerate(self.obstacles):
+            self.graph.add_spherical_obstacle(f"o{idx}", obs[0], obs[1])
+
+    def test_feasible_goals(self):
+        robot, graph = self.robot, self.graph
+        for _ in range(50):
+            q = robot.random_configuration()
+            if in_collision(graph, q):
+                continue
+            T_goal = robot.pose(q, f"p{robot.n}")
+            self.assertIsNone(prescreen(graph, T_goal))
+
+    def test_obstacle_arrays(self):
+        cache = self.graph.bound_smoothing_cache
+        self.assertEqual(len(cache.obstacles), len(self.obstacles))
+        for idx, radius in zip(cache.obstacles, cache.obstacle_radius):
+            data = self.graph.nodes[cache.node_ids[cache.anchors[idx]]]
+            self.assertEqual(data[TYPE], OBSTACLE)
+            self.assertEqual(data[RADIUS], radius)
+            self.assertIsNone(np.testing.assert_array_equal(cache.anchor_pos[idx], data[POS]))
+
+    def test_infeasible_goals(self):
+        for _ in range(20):
+            rot = SO3.exp(np.random.randn(3))
+            direction = np.random.randn(3)
+            far = 3 * direction / np.linalg.norm(direction)
+            self.assertEqual(prescreen(self.graph, SE3(rot, far)), OUT_OF_REACH)
+            center = self.obstacles[np.random.randint(len(self.obstacles))][0]
+            self.assertEqual(prescreen(self.graph, SE3(rot, center)), GOAL_IN_OBSTACLE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import numpy as np
+import unittest
+from unittest import mock
+from numpy.testing import assert_array_equal
+from numpy import pi
+from graphik.robots import RobotRevolute
+from graphik.solvers import reachability_map
+from graphik.solvers.reachability_map import ReachabilityMap, build_reachability_map
+
+
+def ur10():
+    params = {
+        "a": [0, -0.612, -0.5723, 0, 0, 0],
+        "alpha": [pi / 2, 0, 0, pi / 2, -pi / 2, 0],
+        "d": [0.1273, 0, 0, 0.1639, 0.1157, 0.0922],
+        "theta": [0, 0, 0, 0, 0, 0],
+        "modified_dh": False,
+        "num_joints": 6,
+    }
+    return RobotRevolute(params)
+
+
+class TestReachabilityMap(unittest.TestCase):
+    def setUp(self):
+        self.robot = ur10()
+        self.dir = tempfile.TemporaryDirectory()
+        self.kwargs = {"resolution": 0.2, "num_samples": 20000, "chunk_size": 4000}
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_build(self):
+        robot = self.robot
+        path = os.path.join(self.dir.name, "serial.map")
+        rmap = build_reachability_map(robot, path, num_workers=0, **self.kwargs)
+        self.assertTrue(rmap.complete)
+        self.assertEqual(rmap.count.sum(), self.kwargs["num_samples"])
+
+        # the seed of every reached voxel is in that voxel
+        ee = robot.joint_ids.index(robot.end_effectors[0])
+        voxels = np.flatnonzero(rmap.count.sum(axis=1))
+        T = robot.pose_batch(rmap.seed[voxels].astype(float))[:, ee]
+        self.assertIsNone(assert_array_equal(rmap.cells(T)[0], voxels))
+        count, manip = rmap.lookup(T)
+        self.assertTrue(np.all(count > 0))
+        self.assertTrue(np.all(manip >= 0))
+        self.assertIsNotNone(rmap.q0(T[0]))
+
+        T_far = np.eye(4)
+        T_far[:3, 3] = 10
+        self.assertEqual(rmap.lookup(T_far), (0, 0.0))
+        self.assertIsNone(rmap.q0(T_far))
+
+        # parallel and resumed builds give the same map
+        path = os.path.join(self.dir.name, "parallel.map")
+        other = build_reachability_map(robot, path, num_workers=2, **self.kwargs)
+        other = build_reachability_map(robot, path, num_workers=2, **self.kwargs)
+        for name in ["count", "manipulability", "seed", "seed_manipulability"]:
+            self.assertIsNone(assert_array_equal(getattr(rmap, name), getattr(other, name)))
+        self.assertEqual(ReachabilityMap(path).header, rmap.header)
+
+        with self.assertRaises(ValueError):
+            build_reachability_map(robot, path, num_workers=0, seed=1, **self.kwargs)
+
+    def test_interrupted(self):
+        robot = self.robot
+        path = os.path.join(self.dir.name, "serial.map")
+        rmap = build_reachability_map(robot, path, num_workers=0, **self.kwargs)
+
+        # the build stops while the third chunk is written, with only its counts added
+        apply = reachability_map._apply
+        calls = []
+
+        def interrupted(rmap, update):
+            calls.append(int(update["chunk"]))
+            if len(calls) < 3:
+                return apply(rmap, update)
+            rmap.count.reshape(-1)[update["cells"]] = update["count"]
+            rmap.count.flush()
+            raise KeyboardInterrupt
+
+        path = os.path.join(self.dir.name, "interrupted.map")
+        with mock.patch.object(reachability_map, "_apply", interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                build_reachability_map(robot, path, num_workers=0, **self.kwargs)
+        self.assertEqual(ReachabilityMap(path).done.sum(), 2)
+        self.assertTrue(os.path.exists(path + ".journal"))
+
+        other = build_reachability_map(robot, path, num_workers=0, **self.kwargs)
+        self.assertFalse(os.path.exists(path + ".journal"))
+        self.assertTrue(other.complete)
+        for name in ["count", "manipulability", "seed", "seed_manipulability"]:
+            self.assertIsNone(assert_array_equal(getattr(rmap, name), getattr(other, name)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import time
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from graphik.solvers.result_cache import IKResultCache
+from helpers import planar_graph
+
+
+class TestIKResultCache(unittest.TestCase):
+    def setUp(self):
+        self.graph = planar_graph()
+        self.robot = self.graph.robot
+        self.N = self.graph.number_of_nodes()
+
+    def random_entry(self):
+        q = self.robot.random_configuration()
+        T = self.robot.pose(q, f"p{self.robot.n}").as_matrix()
+        return T, q, np.random.rand(self.N, 2)
+
+    def test_hit_and_miss(self):
+        cache = IKResultCache(self.graph, tolerance=1e-3)
+        T, q, Y = self.random_entry()
+        self.assertIsNone(cache.get(T))
+        cache.put(T, q, Y)
+
+        q_hit, Y_hit = cache.get(T + 1e-9)
+        self.assertEqual(q_hit, q)
+        self.assertIsNone(assert_allclose(Y_hit, Y))
+        Y_hit[:] = 0  # returned arrays are copies
+        self.assertIsNone(assert_allclose(cache.get(T)[1], Y))
+
+        T_far = T.copy()
+        T_far[0, -1] += 0.1
+        self.assertIsNone(cache.get(T_far))
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_eviction_and_ttl(self):
+        cache = IKResultCache(self.graph, capacity=5)
+        entries = [self.random_entry() for _ in range(6)]
+        for T, q, Y in entries[:5]:
+            cache.put(T, q, Y)
+        cache.get(entries[0][0])
+        cache.put(*entries[5])
+        # the least recently used entry is the second one
+        self.assertIsNotNone(cache.get(entries[0][0]))
+        self.assertIsNone(cache.get(entries[1][0]))
+        self.assertEqual(len(cache), 5)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache = IKResultCache(self.graph, ttl=0.05)
+        cache.put(*entries[0])
+        self.assertIsNotNone(cache.get(entries[0][0]))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(entries[0][0]))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_invalidation(self):
+        cache = IKResultCache(self.graph)
+        T, q, Y = self.random_entry()
+        cache.put(T, q, Y)
+        key = cache.key(T)
+
+        self.graph.add_spherical_obstacle("o0", np.array([2.0, 2.0]), 0.5)
+        self.assertIsNone(cache.get(T))
+        self.assertNotEqual(cache.key(T), key)
+        cache.put(T, q, Y)
+        self.graph.clear_obstacles()
+        self.assertIsNone(cache.get(T))
+        self.assertEqual(cache.key(T), key)
+        self.assertEqual(cache.stats()["invalidations"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
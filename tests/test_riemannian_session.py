@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from graphik.solvers.riemannian_solver import RiemannianSession, RiemannianSolver
+from graphik.utils.dgp import (
+    adjacency_matrix_from_graph,
+    distance_matrix_from_graph,
+    distance_matrix_from_pos,
+)
+from helpers import planar_graph
+
+
+def random_goal(graph):
+    robot = graph.robot
+    G = graph.from_pose(robot.pose(robot.random_configuration(), f"p{robot.n}"))
+    return distance_matrix_from_graph(G), adjacency_matrix_from_graph(G)
+
+
+class TestRiemannianSolver(unittest.TestCase):
+    def test_solver_names(self):
+        graph = planar_graph()
+        for name in ["TrustRegions", "ConjugateGradient", "GaussNewton"]:
+            self.assertEqual(type(RiemannianSolver(graph, {"solver": name}).solver).__name__, name)
+        with self.assertRaises(ValueError):
+            RiemannianSolver(graph, {"solver": "SteepestDescent"})
+
+
+class TestRiemannianSession(unittest.TestCase):
+    def setUp(self):
+        self.graph = planar_graph()
+
+    def test_matches_solver(self):
+        for use_limits in [True, False]:
+            session = RiemannianSession(self.graph, use_limits=use_limits, jit=False)
+            # the first goal sets the sparsity pattern, the others only the distances
+            for _ in range(3):
+                D_goal, omega = random_goal(self.graph)
+                Y_init = np.random.rand(self.graph.number_of_nodes(), self.graph.dim)
+                session.update_goal(D_goal, omega)
+                sol = session.solve(Y_init=Y_init.copy())
+                ref = RiemannianSolver(self.graph).solve(
+                    D_goal, omega, use_limits=use_limits, Y_init=Y_init, jit=False
+                )
+                self.assertAlmostEqual(sol["f(x)"], ref["f(x)"])
+                self.assertIsNone(
+                    assert_allclose(
+                        distance_matrix_from_pos(sol["x"]),
+                        distance_matrix_from_pos(ref["x"]),
+                        atol=1e-6,
+                    )
+                )
+
+    def test_update_goal(self):
+        session = RiemannianSession(self.graph, jit=False)
+        D_goal, omega = random_goal(self.graph)
+        with self.assertRaises(RuntimeError):
+            session.solve(Y_init=np.zeros([self.graph.number_of_nodes(), self.graph.dim]))
+        with self.assertRaises(ValueError):
+            session.update_goal(D_goal)
+
+        session.update_goal(D_goal, omega)
+        D_next, _ = random_goal(self.graph)
+        session.update_goal(D_next)
+        Y_init = np.random.rand(self.graph.number_of_nodes(), self.graph.dim)
+        sol = session.solve(Y_init=Y_init.copy())
+        ref = RiemannianSolver(self.graph).solve(
+            D_next, omega, use_limits=True, Y_init=Y_init, jit=False
+        )
+        self.assertAlmostEqual(sol["f(x)"], ref["f(x)"])
+
+
+class TestLiftedSolve(unittest.TestCase):
+    def test_truncate(self):
+        # a planar configuration embedded in a rotated 4-dimensional space
+        X = np.random.rand(8, 2)
+        Q, _ = np.linalg.qr(np.random.rand(4, 4))
+        Y = np.hstack([X, np.zeros([8, 2])]).dot(Q) + np.random.rand(4)
+        Y_trunc = RiemannianSolver.truncate(Y, 2)
+        self.assertEqual(Y_trunc.shape, (8, 2))
+        self.assertIsNone(assert_allclose(Y_trunc.mean(axis=0), 0, atol=1e-9))
+        self.assertIsNone(
+            assert_allclose(
+                distance_matrix_from_pos(Y_trunc), distance_matrix_from_pos(X), atol=1e-9
+            )
+        )
+
+        # only the largest eigenvalues of the Gram matrix are kept
+        Y = np.hstack([X, 1e-3 * np.random.rand(8, 1)])
+        Y_trunc = RiemannianSolver.truncate(Y, 2)
+        self.assertIsNone(
+            assert_allclose(
+                distance_matrix_from_pos(Y_trunc), distance_matrix_from_pos(X), atol=1e-4
+            )
+        )
+
+        # configurations of at most dim columns are only centered
+        self.assertIsNone(assert_allclose(RiemannianSolver.truncate(X, 2), X - X.mean(axis=0)))
+
+    def test_lift(self):
+        X = np.random.rand(8, 2)
+        Y = RiemannianSolver.lift(X, 4)
+        self.assertEqual(Y.shape, (8, 4))
+        self.assertIsNone(assert_allclose(Y[:, :2], X))
+        self.assertIs(RiemannianSolver.lift(X, 2), X)
+
+    def test_solve_lifted(self):
+        graph = planar_graph()
+        solver = RiemannianSolver(graph)
+        D_goal, omega = random_goal(graph)
+        Y_init = np.random.rand(graph.number_of_nodes(), graph.dim)
+        stopping = (solver.solver._mingradnorm, solver.solver._maxiter)
+
+        sol = solver.solve_lifted(D_goal, omega, rank=4, Y_init=Y_init, jit=False)
+        self.assertEqual(sol["x"].shape, (graph.number_of_nodes(), graph.dim))
+        self.assertIn("f(x) lifted", sol)
+        times = sol["stage_times"]
+        self.assertEqual(set(times), {"lifted", "truncation", "refinement"})
+        self.assertTrue(all(t >= 0 for t in times.values()))
+        self.assertAlmostEqual(sol["time"], sum(times.values()))
+        # the stopping criteria of the lifted solve are restored
+        self.assertEqual((solver.solver._mingradnorm, solver.solver._maxiter), stopping)
+
+        iterations = []
+        solver.solve_lifted(
+            D_goal,
+            omega,
+            Y_init=Y_init,
+            jit=False,
+            callback=lambda Y, f, k: iterations.append(Y.shape[1]),
+        )
+        # the callback sees the lifted iterates, then the truncated ones
+        self.assertEqual(iterations[0], graph.dim + 1)
+        self.assertEqual(iterations[-1], graph.dim)
+        self.assertEqual(iterations, sorted(iterations, reverse=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
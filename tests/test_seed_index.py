@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import tempfile
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from scipy.spatial.transform import Rotation
+from graphik.solvers.seed_index import IKSeedIndex, pose_embedding
+
+JOINTS = [f"p{idx}" for idx in range(1, 7)]
+
+
+def random_poses(num, rng):
+    T = np.tile(np.eye(4), (num, 1, 1))
+    T[:, :3, :3] = Rotation.random(num, random_state=rng.integers(1 << 31)).as_matrix()
+    T[:, :3, 3] = rng.uniform(-1, 1, (num, 3))
+    return T
+
+
+def fill(index, T, rng):
+    for T_goal in T:
+        q = dict(zip(JOINTS, rng.random(len(JOINTS))))
+        index.insert(T_goal, q, rng.random(index.Y.shape[1:]))
+
+
+class TestIKSeedIndex(unittest.TestCase):
+    def check_nearest(self, index, rng, k=3):
+        for T_goal in random_poses(20, rng):
+            inds, dists = index.query(T_goal, k)
+            E = index.embedding[: index.size]
+            brute = np.sort(np.linalg.norm(E - pose_embedding(T_goal), axis=1))[:k]
+            self.assertIsNone(assert_allclose(dists, brute))
+            self.assertIsNone(
+                assert_allclose(np.linalg.norm(E[inds] - pose_embedding(T_goal), axis=1), dists)
+            )
+
+    def test_nearest(self):
+        rng = np.random.default_rng(0)
+        index = IKSeedIndex(JOINTS, 10, capacity=2000)
+        for _ in range(5):
+            fill(index, random_poses(300, rng), rng)
+            self.check_nearest(index, rng)
+
+    def test_eviction(self):
+        rng = np.random.default_rng(1)
+        index = IKSeedIndex(JOINTS, 10, capacity=200)
+        T = random_poses(1000, rng)
+        fill(index, T, rng)
+        self.assertEqual(len(index), 200)
+        self.check_nearest(index, rng)
+
+        # the most recently inserted entries are kept, recently queried ones too
+        self.assertEqual(index.query(T[-1])[1][0], 0)
+        idx = index.query(T[-150])[0][0]
+        fill(index, random_poses(100, rng), rng)
+        self.assertIsNone(assert_allclose(index.T[idx], T[-150]))
+
+    def test_save_load(self):
+        rng = np.random.default_rng(2)
+        index = IKSeedIndex(JOINTS, 10, capacity=500)
+        fill(index, random_poses(300, rng), rng)
+        T_goal = random_poses(1, rng)[0]
+        with tempfile.TemporaryDirectory() as path:
+            index.save(path)
+            for mmap_mode in ["c", None]:
+                loaded = IKSeedIndex.load(path, mmap_mode)
+                self.assertEqual(len(loaded), 300)
+                self.assertIsNone(
+                    assert_allclose(loaded.Y_init(T_goal), index.Y_init(T_goal))
+                )
+                self.assertEqual(loaded.q0(T_goal), index.q0(T_goal))
+                fill(loaded, random_poses(10, rng), rng)
+                self.check_nearest(loaded, rng)
+            self.assertEqual(IKSeedIndex.load(path).size, 300)
+
+    def test_empty(self):
+        rng = np.random.default_rng(3)
+        T_goal = random_poses(1, rng)[0]
+        with tempfile.TemporaryDirectory() as path:
+            IKSeedIndex(JOINTS, 10, capacity=100).save(path)
+            for index in [IKSeedIndex.load(path), IKSeedIndex(JOINTS, 10, capacity=0)]:
+                self.assertEqual(index.capacity, 0)
+                self.assertIsNone(index.Y_init(T_goal))
+                self.assertIsNone(index.insert(T_goal, dict.fromkeys(JOINTS, 0.0), None))
+                self.assertEqual(len(index), 0)
+                self.assertIsNone(index.q0(T_goal))
+            loaded = IKSeedIndex.load(path, mmap_mode=None)
+            self.assertEqual(loaded.capacity, 100)
+            fill(loaded, random_poses(10, rng), rng)
+            self.check_nearest(loaded, rng)
+
+
+if __name__ == "__main__":
+    unittest.main()
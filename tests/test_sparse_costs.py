@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from numpy.testing import assert_allclose
+from graphik.solvers.riemannian_solver import RiemannianSolver
+from graphik.solvers.sparse_costs import use_sparse
+from helpers import random_problem
+
+
+class TestSparseCosts(unittest.TestCase):
+    def test_matches_dense(self):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            N = rng.integers(5, 30)
+            D_goal, omega, psi_L, psi_U = random_problem(N, rng)
+            Y = rng.standard_normal((N, 3))
+            Z = rng.standard_normal((N, 3))
+            for limits in [False, True]:
+                if limits:
+                    sparse, dense = [
+                        RiemannianSolver.create_cost_limits(
+                            D_goal, omega, psi_L, psi_U, jit=False, sparse=s
+                        )
+                        for s in [True, False]
+                    ]
+                else:
+                    sparse, dense = [
+                        RiemannianSolver.create_cost(D_goal, omega, jit=False, sparse=s)
+                        for s in [True, False]
+                    ]
+                self.assertAlmostEqual(sparse[0](Y), dense[0](Y))
+                self.assertIsNone(assert_allclose(sparse[1](Y), dense[1](Y), atol=1e-9))
+                self.assertIsNone(
+                    assert_allclose(sparse[2](Y, Z), dense[2](Y, Z), atol=1e-9)
+                )
+
+    def test_use_sparse(self):
+        N = 100
+        pairs = N * (N - 1) // 2
+        self.assertTrue(use_sparse(pairs // 10, N))
+        self.assertFalse(use_sparse(pairs, N))
+        self.assertTrue(use_sparse(pairs, N, limits=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import numpy as np
+import unittest
+from unittest import mock
+from numpy.testing import assert_allclose
+from graphik.solvers.riemannian_solver import (
+    solve_batch,
+    solve_trajectory,
+    solve_trajectory_stream,
+    solve_with_riemannian,
+)
+from graphik.utils.utils import wraptopi
+from helpers import planar_graph
+
+
+def path_goals(robot, num_goals, step=0.02):
+    q0 = np.random.uniform(-1, 1, robot.n)
+    dq = np.random.uniform(-1, 1, robot.n)
+    joints = [f"p{idx}" for idx in range(1, robot.n + 1)]
+    return [
+        robot.pose(dict(zip(joints, q0 + step * k * dq)), f"p{robot.n}")
+        for k in range(num_goals)
+    ]
+
+
+class TestTrajectory(unittest.TestCase):
+    def setUp(self):
+        self.graph = planar_graph()
+        self.robot = self.graph.robot
+
+    def check_poses(self, q_sols, goals, success):
+        for q_sol, T_goal, ok in zip(q_sols, goals, success):
+            if ok:
+                T_sol = self.robot.pose(q_sol, f"p{self.robot.n}")
+                self.assertIsNone(
+                    assert_allclose(T_sol.as_matrix(), T_goal.as_matrix(), atol=1e-3)
+                )
+
+    def test_solve_trajectory(self):
+        goals = path_goals(self.robot, 10)
+        Q, Y, status = solve_trajectory(self.graph, goals, use_jit=False)
+        self.assertEqual(Q.shape, (10, self.robot.n))
+        self.assertEqual(Y.shape, (10, self.graph.number_of_nodes(), self.graph.dim))
+        for key in ["success", "f(x)", "iterations", "time", "latency"]:
+            self.assertEqual(status[key].shape, (10,))
+
+        # a warm start is attempted after every solved waypoint
+        attempted, used = status["warm_attempted"], status["warm_success"]
+        self.assertFalse(attempted[0])
+        self.assertTrue(np.array_equal(attempted[1:], status["success"][:-1]))
+        self.assertFalse(np.any(used & ~attempted))
+        self.assertTrue(np.any(used))
+
+        joints = [f"p{idx}" for idx in range(1, self.robot.n + 1)]
+        q_sols = [dict(zip(joints, q)) for q in Q]
+        self.check_poses(q_sols, goals, status["success"])
+
+    def test_stream(self):
+        goals = path_goals(self.robot, 6)
+        for warm_start in [True, False]:
+            results = list(
+                solve_trajectory_stream(
+                    self.graph, iter(goals), use_jit=False, warm_start=warm_start
+                )
+            )
+            self.assertEqual(len(results), len(goals))
+            for _, _, stats in results:
+                self.assertGreaterEqual(stats["iterations"], 0)
+                self.assertGreaterEqual(stats["latency"], stats["time"])
+                if not warm_start:
+                    self.assertFalse(stats["warm_attempted"])
+                if stats["warm_success"]:
+                    self.assertTrue(stats["warm_attempted"])
+            self.check_poses(
+                [q_sol for q_sol, _, _ in results],
+                goals,
+                [stats["success"] for _, _, stats in results],
+            )
+        self.assertEqual(list(solve_trajectory_stream(self.graph, [])), [])
+
+
+class TestSolveBatch(unittest.TestCase):
+    def broken_limits(self, failed):
+        # check_distance_limits that reports a broken limit for the solve with index failed
+        calls = []
+
+        def check_distance_limits(G, tol=1e-6):
+            calls.append(G)
+            if len(calls) - 1 == failed:
+                return [{"edge": ("p1", "p2"), "value": -1.0, "type": "joint", "side": "lower"}]
+            return []
+
+        return mock.patch.object(self.graph, "check_distance_limits", check_distance_limits)
+
+    def test_solve_batch(self):
+        self.graph = planar_graph()
+        robot = self.graph.robot
+        goals = [robot.pose(robot.random_configuration(), f"p{robot.n}") for _ in range(6)]
+
+        np.random.seed(0)
+        with self.broken_limits(2):
+            Q, Y, status = solve_batch(self.graph, goals, use_jit=False)
+        self.assertEqual(Q.shape, (6, robot.n))
+        self.assertEqual(Y.shape, (6, self.graph.number_of_nodes(), self.graph.dim))
+        self.assertEqual(set(status), {"success", "f(x)", "iterations", "time"})
+        for key in status:
+            self.assertEqual(status[key].shape, (6,))
+
+        # a failed goal has a NaN row
+        self.assertFalse(status["success"][2])
+        self.assertTrue(np.all(np.isnan(Q[2])))
+        self.assertTrue(np.all(np.isnan(Y[2])))
+
+        # the random initializations are drawn in the same order as by separate solves
+        np.random.seed(0)
+        joints = [node for node in robot.joint_ids if node != "p0"]
+        with self.broken_limits(2):
+            results = [solve_with_riemannian(self.graph, T, use_jit=False) for T in goals]
+        for idx, (T_goal, (q_sol, Y_sol)) in enumerate(zip(goals, results)):
+            self.assertEqual(q_sol is not None, status["success"][idx])
+            if q_sol is None:
+                continue
+            # columns are ordered as robot.joint_ids
+            diff = wraptopi(Q[idx] - np.array([q_sol[node] for node in joints]))
+            self.assertIsNone(assert_allclose(diff, 0, atol=1e-5))
+            self.assertIsNone(assert_allclose(Y[idx], Y_sol, atol=1e-5))
+            if status["f(x)"][idx] < 1e-9:
+                T_sol = robot.pose(dict(zip(joints, Q[idx])), f"p{robot.n}")
+                self.assertIsNone(
+                    assert_allclose(T_sol.as_matrix(), T_goal.as_matrix(), atol=1e-3)
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import time
+import numpy as np
+import unittest
+import pymanopt
+from pymanopt.manifolds import Euclidean
+from graphik.solvers.trust_region import TrustRegions
+
+
+def rosenbrock(delay=0.0):
+    def cost(x):
+        time.sleep(delay)
+        return (1 - x[0]) ** 2 + 100 * (x[1] - x[0] ** 2) ** 2
+
+    def egrad(x):
+        return np.array(
+            [-2 * (1 - x[0]) - 400 * x[0] * (x[1] - x[0] ** 2), 200 * (x[1] - x[0] ** 2)]
+        )
+
+    def ehess(x, u):
+        H = np.array([[2 - 400 * x[1] + 1200 * x[0] ** 2, -400 * x[0]], [-400 * x[0], 200]])
+        return H.dot(u)
+
+    return pymanopt.Problem(Euclidean(2), cost=cost, egrad=egrad, ehess=ehess, verbosity=0)
+
+
+X0 = np.array([-1.2, 1.0])
+
+
+class TestTrustRegions(unittest.TestCase):
+    def test_solve(self):
+        problem = rosenbrock()
+        x, optlog = TrustRegions(logverbosity=2).solve(problem, x=X0.copy())
+        self.assertIsNone(np.testing.assert_allclose(x, [1, 1], atol=1e-6))
+        self.assertIn("min grad norm", optlog["stoppingreason"])
+
+    def test_deadline(self):
+        problem = rosenbrock()
+        solver = TrustRegions(logverbosity=2)
+
+        # a deadline that has passed stops after the first iteration, without a step
+        x, optlog = solver.solve(problem, x=X0.copy(), deadline=time.time())
+        self.assertIn("deadline", optlog["stoppingreason"])
+        self.assertEqual(optlog["final_values"]["iterations"], 1)
+        self.assertLessEqual(problem.cost(x), problem.cost(X0))
+
+        problem = rosenbrock(delay=2e-3)
+        costs = []
+        x, optlog = solver.solve(
+            problem,
+            x=X0.copy(),
+            deadline=time.time() + 0.05,
+            callback=lambda x, fx, k: costs.append(fx),
+        )
+        self.assertIn("deadline", optlog["stoppingreason"])
+        self.assertGreater(np.linalg.norm(x - [1, 1]), 1e-6)
+        # the returned iterate is the accepted one with the lowest cost, the callback is
+        # not called in the iteration that reaches the deadline
+        self.assertEqual(costs, sorted(costs, reverse=True))
+        self.assertAlmostEqual(optlog["final_values"]["f(x)"], problem.cost(x))
+        self.assertLessEqual(problem.cost(x), min(costs))
+
+    def test_callback(self):
+        problem = rosenbrock()
+        iterates = []
+
+        def callback(x, fx, k):
+            iterates.append((x, fx, k))
+            return k >= 5
+
+        x, optlog = TrustRegions(logverbosity=2).solve(problem, x=X0.copy(), callback=callback)
+        self.assertIn("callback", optlog["stoppingreason"])
+        self.assertEqual([k for _, _, k in iterates], list(range(1, 6)))
+        # the callback gets copies of the iterates
+        self.assertEqual(len({id(x_k) for x_k, _, _ in iterates}), 5)
+        for x_k, fx, _ in iterates:
+            self.assertAlmostEqual(problem.cost(x_k), fx)
+        self.assertIsNone(np.testing.assert_array_equal(x, iterates[-1][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()